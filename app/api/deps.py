@@ -1,29 +1,40 @@
 from typing import Optional
 
-from fastapi import Depends, Header, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import Depends, Header, HTTPException, Query, status
 
 from app.core.security import get_current_username
 from app.db import models
-from app.db.session import get_db
+from app.services.principals import Principal, principal_cache
 
 
-def get_current_user(
-    token: Optional[str] = Header(None, alias="Authorization"),
-    db: Session = Depends(get_db),
-) -> models.User:
+def get_current_user(token: Optional[str] = Header(None, alias="Authorization")) -> Principal:
     if token is None or not token.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
-    raw_token = token.split()[1]
-    username = get_current_username(raw_token)
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or not user.is_active:
+    return _active_user(token.split()[1])
+
+
+def get_stream_user(
+    token: Optional[str] = Header(None, alias="Authorization"),
+    access_token: Optional[str] = Query(None),
+) -> Principal:
+    # EventSource cannot send headers, so streams also accept the token as a query parameter.
+    if token is not None and token.lower().startswith("bearer "):
+        return _active_user(token.split()[1])
+    if not access_token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
+    return _active_user(access_token)
+
+
+def _active_user(raw_token: str) -> Principal:
+    # Both lookups are served from memory on the common path.
+    principal = principal_cache.get(get_current_username(raw_token))
+    if not principal or not principal.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
-    return user
+    return principal
 
 
-def require_role(*roles: models.RoleEnum):
-    def role_checker(user: models.User = Depends(get_current_user)) -> models.User:
+def require_role(*roles: models.RoleEnum, user_dependency=get_current_user):
+    def role_checker(user: Principal = Depends(user_dependency)) -> Principal:
         if user.role not in roles:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
         return user
@@ -31,5 +42,5 @@ def require_role(*roles: models.RoleEnum):
     return role_checker
 
 
-async def ensure_admin(user: models.User = Depends(require_role(models.RoleEnum.ADMIN))):
+async def ensure_admin(user: Principal = Depends(require_role(models.RoleEnum.ADMIN))):
     return user
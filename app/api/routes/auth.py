@@ -1,34 +1,55 @@
+import secrets
 from datetime import datetime, timedelta
+from functools import lru_cache
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Header, HTTPException, Request, status
 
 from app.core.config import get_settings
-from app.core.security import create_access_token, revoke_token, verify_password
+from app.core.security import create_access_token, get_password_hash, revoke_token, verify_password
 from app.db import models
-from app.db.session import get_db
+from app.db.session import SessionLocal
 from app.schemas import auth as auth_schemas
+from app.services.login_guard import LoginRejected, login_guard
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
 @router.post("/login", response_model=auth_schemas.Token)
-def login(payload: auth_schemas.LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == payload.username).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    if not user.is_active:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive account")
-
-    settings = get_settings()
-    expires_minutes = settings.access_token_expire_minutes
-    token = create_access_token(user.username, expires_minutes)
+async def login(payload: auth_schemas.LoginRequest, request: Request):
+    client_ip = request.client.host if request.client else "unknown"
+    expires_minutes = get_settings().access_token_expire_minutes
+    try:
+        login_guard.admit(payload.username, client_ip)
+        token = await login_guard.run(_authenticate, payload.username, payload.password, expires_minutes)
+    except LoginRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail, headers={"Retry-After": str(exc.retry_after)})
     return auth_schemas.Token(
         access_token=token,
         expires_at=datetime.utcnow() + timedelta(minutes=expires_minutes),
     )
 
 
+def _authenticate(username: str, password: str, expires_minutes: int) -> str:
+    # Runs on the login pool: the user lookup, hashing and token creation all stay off the event loop.
+    with SessionLocal() as db:
+        login_guard.load_shared(db, username)
+        user = db.query(models.User).filter(models.User.username == username).first()
+        # Unknown usernames still pay for one hash so response time does not reveal which accounts exist.
+        password_ok = verify_password(password, user.hashed_password if user else _dummy_hash())
+        if not user or not password_ok:
+            login_guard.record_failure(db, username)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        if not user.is_active:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive account")
+        login_guard.record_success(db, username)
+        return create_access_token(user.username, expires_minutes)
+
+
+@lru_cache()
+def _dummy_hash() -> str:
+    return get_password_hash(secrets.token_urlsafe(16))
+
+
 @router.post("/logout")
 def logout(authorization: str = Header(..., alias="Authorization")):
     if not authorization or not authorization.lower().startswith("bearer "):
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/api/backup", tags=["backup"])
 @router.post("", response_model=backup_schemas.BackupRecordOut)
 def create_backup(
     payload: backup_schemas.BackupRecordCreate,
-    user: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    user: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     record = models.BackupRecord(
@@ -28,7 +28,7 @@ def create_backup(
 
 @router.get("", response_model=list[backup_schemas.BackupRecordOut])
 def list_backups(
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     return db.query(models.BackupRecord).order_by(models.BackupRecord.created_at.desc()).all()
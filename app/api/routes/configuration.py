@@ -7,13 +7,15 @@ from app.api import deps
 from app.db import models
 from app.db.session import get_db
 from app.schemas import configuration as config_schemas
+from app.services.config_cache import CONFIG_CACHE, config_cache
+from app.services.versioning import bump_version
 
 router = APIRouter(prefix="/api/config", tags=["configuration"])
 
 
 @router.get("", response_model=List[config_schemas.ConfigurationOut])
 def list_configurations(
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     return db.query(models.SystemConfiguration).all()
@@ -22,15 +24,17 @@ def list_configurations(
 @router.post("", response_model=config_schemas.ConfigurationOut)
 def create_configuration(
     payload: config_schemas.ConfigurationCreate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     if db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key == payload.key).first():
         raise HTTPException(status_code=400, detail="Configuration already exists")
     config = models.SystemConfiguration(**payload.dict())
     db.add(config)
+    bump_version(db, CONFIG_CACHE)
     db.commit()
     db.refresh(config)
+    config_cache.refresh(db)
     return config
 
 
@@ -38,7 +42,7 @@ def create_configuration(
 def update_configuration(
     config_key: str,
     payload: config_schemas.ConfigurationUpdate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     config = db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key == config_key).first()
@@ -46,6 +50,8 @@ def update_configuration(
         raise HTTPException(status_code=404, detail="Configuration not found")
     for key, value in payload.dict(exclude_unset=True).items():
         setattr(config, key, value)
+    bump_version(db, CONFIG_CACHE)
     db.commit()
     db.refresh(config)
+    config_cache.refresh(db)
     return config
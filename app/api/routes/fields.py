@@ -1,15 +1,51 @@
+import zipfile
+from tempfile import SpooledTemporaryFile
 from typing import List, Optional
+from xml.etree.ElementTree import ParseError
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import NoSuchTableError
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.crypto import blind_index
 from app.db import models
-from app.db.session import get_db
+from app.db.session import SessionLocal, engine, get_db, target_engine
+from app.db.target import get_target_table, single_primary_key
+from app.services import export, imports
+from app.services.audit import audit_sink
+from app.services.field_import import FIELD_COLUMNS, FieldImporter
+from app.services.field_registry import FIELD_REGISTRY, field_registry
+from app.services.versioning import bump_version
 from app.schemas import fields as field_schemas
 
 router = APIRouter(prefix="/api/fields", tags=["fields"])
 
+EXPORT_BATCH_SIZE = 2000
+# Uploads larger than this are spooled to a temporary file while the workbook is read.
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def _field_filters(
+    table_name: Optional[str],
+    field_name: Optional[str],
+    status_filter: Optional[str],
+    algorithm_type: Optional[str],
+) -> list:
+    filters = []
+    if table_name:
+        filters.append(models.SensitiveField.table_name == table_name)
+    if field_name:
+        filters.append(models.SensitiveField.field_name == field_name)
+    if status_filter:
+        filters.append(models.SensitiveField.status == status_filter)
+    if algorithm_type:
+        filters.append(models.SensitiveField.algorithm_type == algorithm_type)
+    return filters
+
 
 @router.get("/sensitive", response_model=List[field_schemas.SensitiveFieldOut])
 def list_sensitive_fields(
@@ -17,33 +53,99 @@ def list_sensitive_fields(
     field_name: Optional[str] = Query(None),
     status_filter: Optional[str] = Query(None, alias="status"),
     algorithm_type: Optional[str] = Query(None),
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
     db: Session = Depends(get_db),
 ):
-    query = db.query(models.SensitiveField)
-    if table_name:
-        query = query.filter(models.SensitiveField.table_name == table_name)
-    if field_name:
-        query = query.filter(models.SensitiveField.field_name == field_name)
-    if status_filter:
-        query = query.filter(models.SensitiveField.status == status_filter)
-    if algorithm_type:
-        query = query.filter(models.SensitiveField.algorithm_type == algorithm_type)
-    return query.all()
+    return db.query(models.SensitiveField).filter(*_field_filters(table_name, field_name, status_filter, algorithm_type)).all()
+
+
+@router.get("/sensitive/export")
+def export_sensitive_fields(
+    format: str = Query("csv"),
+    table_name: Optional[str] = Query(None),
+    field_name: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    algorithm_type: Optional[str] = Query(None),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+):
+    if format not in {"csv", "xlsx"}:
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    statement = (
+        select(*[models.SensitiveField.__table__.c[column] for column in FIELD_COLUMNS])
+        .where(*_field_filters(table_name, field_name, status_filter, algorithm_type))
+        .order_by(models.SensitiveField.table_name, models.SensitiveField.field_name)
+    )
+
+    def batches():
+        # Own connection: request-scoped dependencies are closed before the body is streamed.
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(statement)
+            for partition in result.partitions(EXPORT_BATCH_SIZE):
+                yield partition
+
+    # The header uses column keys so an exported file can be edited and imported again.
+    if format == "csv":
+        content, media_type, filename = export.iter_csv(FIELD_COLUMNS, batches()), export.CSV_MEDIA_TYPE, "sensitive_fields.csv"
+    else:
+        content, media_type, filename = (
+            export.iter_xlsx(FIELD_COLUMNS, batches(), sheet_name="敏感字段"),
+            export.XLSX_MEDIA_TYPE,
+            "sensitive_fields.xlsx",
+        )
+    return StreamingResponse(content, media_type=media_type, headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+
+@router.post("/sensitive/import", response_model=field_schemas.FieldImportResult)
+async def import_sensitive_fields(
+    request: Request,
+    format: Optional[str] = Query(None),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+):
+    # The body is the raw CSV or XLSX file, read as it arrives rather than buffered whole.
+    if format is None:
+        format = "xlsx" if export.XLSX_MEDIA_TYPE in request.headers.get("content-type", "") else "csv"
+    if format not in {"csv", "xlsx"}:
+        raise HTTPException(status_code=400, detail="Unsupported import format")
+    importer = FieldImporter()
+    try:
+        if format == "csv":
+            async for values in imports.iter_csv_rows(request.stream()):
+                if importer.add(values):
+                    await run_in_threadpool(importer.flush)
+            await run_in_threadpool(importer.finish)
+        else:
+            with SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as spool:
+                async for chunk in request.stream():
+                    spool.write(chunk)
+                spool.seek(0)
+                await run_in_threadpool(importer.run, imports.iter_xlsx_rows(spool))
+    except (UnicodeDecodeError, zipfile.BadZipFile, ParseError, KeyError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Unreadable {format} upload: {exc}")
+    finally:
+        if importer.created or importer.updated:
+            await run_in_threadpool(_refresh_registry)
+    return importer.result()
+
+
+def _refresh_registry() -> None:
+    with SessionLocal() as db:
+        field_registry.refresh(db)
 
 
 @router.post("/sensitive", response_model=field_schemas.SensitiveFieldOut)
 def create_sensitive_field(
     payload: field_schemas.SensitiveFieldCreate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     if db.query(models.SensitiveField).filter(models.SensitiveField.field_id == payload.field_id).first():
         raise HTTPException(status_code=400, detail="Field already exists")
     field = models.SensitiveField(**payload.dict())
     db.add(field)
+    bump_version(db, FIELD_REGISTRY)
     db.commit()
     db.refresh(field)
+    field_registry.refresh(db)
     return field
 
 
@@ -51,7 +153,7 @@ def create_sensitive_field(
 def update_sensitive_field(
     field_id: str,
     payload: field_schemas.SensitiveFieldUpdate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     field = db.query(models.SensitiveField).filter(models.SensitiveField.field_id == field_id).first()
@@ -59,20 +161,69 @@ def update_sensitive_field(
         raise HTTPException(status_code=404, detail="Field not found")
     for key, value in payload.dict(exclude_unset=True).items():
         setattr(field, key, value)
+    bump_version(db, FIELD_REGISTRY)
     db.commit()
     db.refresh(field)
+    field_registry.refresh(db)
     return field
 
 
+@router.post("/sensitive/{field_id}/lookup", response_model=field_schemas.BlindIndexLookupResult)
+def lookup_by_blind_index(
+    field_id: str,
+    payload: field_schemas.BlindIndexLookup,
+    request: Request,
+    user: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+):
+    field = field_registry.get(field_id)
+    if not field:
+        raise HTTPException(status_code=404, detail="Field not found")
+    if not field.blind_index_column:
+        raise HTTPException(status_code=400, detail="Blind index not enabled for this field")
+    column_name = field.blind_index_column
+    try:
+        table = get_target_table(field.table_name)
+        primary_key = single_primary_key(table)
+        column = table.c[column_name]
+    except (NoSuchTableError, KeyError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Blind index column unavailable: {exc}")
+
+    with target_engine.connect() as conn:
+        matches = (
+            conn.execute(select(primary_key).where(column == blind_index.blind_index(payload.value)).limit(payload.limit))
+            .scalars()
+            .all()
+        )
+    audit_sink.submit(
+        models.AuditLogType.PROXY,
+        username=user.username,
+        ip_address=request.client.host if request.client else None,
+        table_name=field.table_name,
+        field_name=field.field_name,
+        operation="blind_index_lookup",
+        status="success",
+        details={"matches": len(matches)},
+    )
+    return field_schemas.BlindIndexLookupResult(
+        table_name=field.table_name,
+        field_name=field.field_name,
+        blind_index_column=column_name,
+        primary_key=primary_key.name,
+        matches=matches,
+    )
+
+
 @router.delete("/sensitive/{field_id}")
 def delete_sensitive_field(
     field_id: str,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     field = db.query(models.SensitiveField).filter(models.SensitiveField.field_id == field_id).first()
     if not field:
         raise HTTPException(status_code=404, detail="Field not found")
     field.is_enabled = False
+    bump_version(db, FIELD_REGISTRY)
     db.commit()
+    field_registry.refresh(db)
     return {"message": "Field disabled"}
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/api/help", tags=["help"])
 
 @router.get("", response_model=List[help_schemas.HelpDocumentOut])
 def list_help(
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
     db: Session = Depends(get_db),
 ):
     return db.query(models.HelpDocument).all()
@@ -22,7 +22,7 @@ def list_help(
 @router.post("", response_model=help_schemas.HelpDocumentOut)
 def create_help(
     payload: help_schemas.HelpDocumentCreate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     doc = models.HelpDocument(**payload.dict())
@@ -36,7 +36,7 @@ def create_help(
 def update_help(
     doc_id: int,
     payload: help_schemas.HelpDocumentUpdate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     doc = db.query(models.HelpDocument).filter(models.HelpDocument.id == doc_id).first()
@@ -1,47 +1,118 @@
-import csv
-import io
-from typing import List, Optional
+import base64
+import binascii
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.db import models
-from app.db.session import get_db
+from app.db.session import engine, get_db
 from app.schemas import logs as log_schemas
+from app.services import export
+from app.services.audit import audit_sink
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
+EXPORT_BATCH_SIZE = 2000
+EXPORT_HEADER = ["时间", "用户", "类型", "表名", "字段名", "任务", "操作", "状态", "错误信息"]
+EXPORT_COLUMNS = [
+    models.AuditLog.created_at,
+    models.AuditLog.username,
+    models.AuditLog.log_type,
+    models.AuditLog.table_name,
+    models.AuditLog.field_name,
+    models.AuditLog.task_id,
+    models.AuditLog.operation,
+    models.AuditLog.status,
+    models.AuditLog.error_message,
+]
 
-@router.get("", response_model=List[log_schemas.AuditLogOut])
+
+def _log_filters(
+    log_type: Optional[models.AuditLogType],
+    user: Optional[str],
+    table_name: Optional[str],
+    field_name: Optional[str],
+    task_id: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> list:
+    filters = []
+    if log_type:
+        filters.append(models.AuditLog.log_type == log_type)
+    if user:
+        filters.append(models.AuditLog.username == user)
+    if table_name:
+        filters.append(models.AuditLog.table_name == table_name)
+    if field_name:
+        filters.append(models.AuditLog.field_name == field_name)
+    if task_id:
+        filters.append(models.AuditLog.task_id == task_id)
+    if start:
+        filters.append(models.AuditLog.created_at >= start)
+    if end:
+        filters.append(models.AuditLog.created_at < end)
+    return filters
+
+
+def _encode_cursor(log: models.AuditLog) -> str:
+    raw = f"{log.created_at.isoformat()}|{log.id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, log_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("", response_model=log_schemas.AuditLogPage)
 def list_logs(
     log_type: Optional[models.AuditLogType] = Query(None),
     user: Optional[str] = Query(None),
     table_name: Optional[str] = Query(None),
     field_name: Optional[str] = Query(None),
     task_id: Optional[str] = Query(None),
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(200, ge=1, le=1000),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
     db: Session = Depends(get_db),
 ):
-    query = db.query(models.AuditLog)
-    if log_type:
-        query = query.filter(models.AuditLog.log_type == log_type)
-    if user:
-        query = query.filter(models.AuditLog.username == user)
-    if table_name:
-        query = query.filter(models.AuditLog.table_name == table_name)
-    if field_name:
-        query = query.filter(models.AuditLog.field_name == field_name)
-    if task_id:
-        query = query.filter(models.AuditLog.task_id == task_id)
-    return query.order_by(models.AuditLog.created_at.desc()).limit(200).all()
+    query = db.query(models.AuditLog).filter(*_log_filters(log_type, user, table_name, field_name, task_id, start, end))
+    if cursor:
+        # Seek past the last row of the previous page on (created_at, id) instead of OFFSET,
+        # so every page is an index range scan of the same size.
+        created_at, log_id = _decode_cursor(cursor)
+        query = query.filter(
+            models.AuditLog.created_at <= created_at,
+            or_(
+                models.AuditLog.created_at < created_at,
+                and_(models.AuditLog.created_at == created_at, models.AuditLog.id < log_id),
+            ),
+        )
+    logs = (
+        query.order_by(models.AuditLog.created_at.desc(), models.AuditLog.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = _encode_cursor(logs[limit - 1]) if len(logs) > limit else None
+    return log_schemas.AuditLogPage(items=logs[:limit], next_cursor=next_cursor)
 
 
 @router.post("", response_model=log_schemas.AuditLogOut)
 def create_log(
     payload: log_schemas.AuditLogCreate,
-    user: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    user: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     log = models.AuditLog(**payload.dict())
@@ -52,32 +123,48 @@ def create_log(
     return log
 
 
+@router.post("/batch", response_model=log_schemas.AuditLogBatchResult, status_code=202)
+def create_logs(
+    payload: log_schemas.AuditLogBatch,
+    user: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+):
+    events = [{**event.dict(), "username": event.username or user.username} for event in payload.events]
+    return log_schemas.AuditLogBatchResult(accepted=audit_sink.submit_many(events))
+
+
 @router.get("/export")
 def export_logs(
     format: str = Query("csv"),
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
-    db: Session = Depends(get_db),
+    log_type: Optional[models.AuditLogType] = Query(None),
+    user: Optional[str] = Query(None),
+    table_name: Optional[str] = Query(None),
+    field_name: Optional[str] = Query(None),
+    task_id: Optional[str] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
 ):
-    logs = db.query(models.AuditLog).order_by(models.AuditLog.created_at.desc()).limit(1000).all()
     if format not in {"csv", "excel"}:
         raise HTTPException(status_code=400, detail="Unsupported format")
+    statement = (
+        select(*EXPORT_COLUMNS)
+        .where(*_log_filters(log_type, user, table_name, field_name, task_id, start, end))
+        .order_by(models.AuditLog.created_at.desc(), models.AuditLog.id.desc())
+    )
+
+    # Runs after the request's dependencies are torn down, so it holds its own connection.
+    def batches() -> Iterator[List[Row]]:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(statement)
+            for partition in result.partitions(EXPORT_BATCH_SIZE):
+                yield partition
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["时间", "用户", "类型", "表名", "字段名", "任务", "操作", "状态", "错误信息"])
-    for log in logs:
-        writer.writerow([
-            log.created_at.isoformat(),
-            log.username,
-            log.log_type.value,
-            log.table_name,
-            log.field_name,
-            log.task_id,
-            log.operation,
-            log.status,
-            log.error_message,
-        ])
-    output.seek(0)
-    media_type = "text/csv"
-    filename = "audit_logs.csv" if format == "csv" else "audit_logs.xlsx"
-    return StreamingResponse(output, media_type=media_type, headers={"Content-Disposition": f"attachment; filename={filename}"})
+    if format == "csv":
+        content, media_type, filename = export.iter_csv(EXPORT_HEADER, batches()), export.CSV_MEDIA_TYPE, "audit_logs.csv"
+    else:
+        content, media_type, filename = (
+            export.iter_xlsx(EXPORT_HEADER, batches(), sheet_name="审计日志"),
+            export.XLSX_MEDIA_TYPE,
+            "audit_logs.xlsx",
+        )
+    return StreamingResponse(content, media_type=media_type, headers={"Content-Disposition": f"attachment; filename={filename}"})
@@ -8,6 +8,8 @@ from app.api import deps
 from app.db import models
 from app.db.models import MigrationTaskStatus
 from app.db.session import get_db
+from app.migration import executor, planner
+from app.migration.scheduler import scheduler
 from app.schemas import migration as migration_schemas
 
 router = APIRouter(prefix="/api/migration", tags=["migration"])
@@ -15,7 +17,7 @@ router = APIRouter(prefix="/api/migration", tags=["migration"])
 
 @router.get("/tasks", response_model=List[migration_schemas.MigrationTaskOut])
 def list_tasks(
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
     db: Session = Depends(get_db),
 ):
     return db.query(models.MigrationTask).all()
@@ -24,7 +26,7 @@ def list_tasks(
 @router.post("/tasks", response_model=migration_schemas.MigrationTaskOut)
 def create_task(
     payload: migration_schemas.MigrationTaskCreate,
-    user: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    user: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     if db.query(models.MigrationTask).filter(models.MigrationTask.task_id == payload.task_id).first():
@@ -40,10 +42,63 @@ def create_task(
     return task
 
 
+@router.post("/plan", response_model=migration_schemas.MigrationPlanOut)
+def plan_tasks(
+    payload: migration_schemas.MigrationPlanRequest,
+    user: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    db: Session = Depends(get_db),
+):
+    plan = planner.plan_migration(db, payload.table_names)
+    prefix = payload.task_prefix or f"PLAN-{datetime.utcnow():%Y%m%d%H%M%S}"
+    items = [
+        migration_schemas.PlannedMigrationTask(
+            task_id=f"{prefix}-{position:03d}",
+            table_name=planned.table_name,
+            field_names=planned.field_names,
+            estimated_rows=planned.estimate.rows,
+            estimated_bytes=planned.estimate.bytes,
+            estimate_source=planned.estimate.source,
+            batch_size=planned.batch_size,
+            concurrency=planned.concurrency,
+        )
+        for position, planned in enumerate(plan.tasks, start=1)
+    ]
+    if items and not payload.dry_run:
+        task_ids = [item.task_id for item in items]
+        if db.query(models.MigrationTask.id).filter(models.MigrationTask.task_id.in_(task_ids)).first():
+            raise HTTPException(status_code=400, detail="Task already exists")
+        db.add_all(
+            models.MigrationTask(
+                task_id=item.task_id,
+                table_name=item.table_name,
+                field_name=item.field_names[0],
+                field_names=item.field_names,
+                batch_size=item.batch_size,
+                concurrency=item.concurrency,
+                overwrite_plaintext=payload.overwrite_plaintext,
+                execution_mode=payload.execution_mode,
+                adaptive=payload.adaptive,
+                priority=payload.priority,
+                operator_id=user.id,
+                status=MigrationTaskStatus.PENDING,
+            )
+            for item in items
+        )
+        db.commit()
+    return migration_schemas.MigrationPlanOut(
+        dry_run=payload.dry_run,
+        tasks=items,
+        skipped=[
+            migration_schemas.SkippedPlanField(table_name=table_name, field_name=field_name, reason=reason)
+            for table_name, field_name, reason in plan.skipped
+        ],
+    )
+
+
 @router.get("/tasks/{task_id}", response_model=migration_schemas.MigrationTaskOut)
 def get_task(
     task_id: str,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
     db: Session = Depends(get_db),
 ):
     task = db.query(models.MigrationTask).filter(models.MigrationTask.task_id == task_id).first()
@@ -66,24 +121,32 @@ def control_task(
     task_id: str,
     action: str,
     db: Session = Depends(get_db),
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
 ):
     task = db.query(models.MigrationTask).filter(models.MigrationTask.task_id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    # Starting only queues the task; the scheduler admits it once its worker budget allows.
     if action == "start":
-        _transition_task(task, MigrationTaskStatus.RUNNING)
+        if task.status not in {MigrationTaskStatus.RUNNING, MigrationTaskStatus.PAUSED, MigrationTaskStatus.QUEUED}:
+            task.checkpoint = None
+        if task.status != MigrationTaskStatus.RUNNING:
+            _transition_task(task, MigrationTaskStatus.QUEUED)
     elif action == "pause":
         _transition_task(task, MigrationTaskStatus.PAUSED)
     elif action == "resume":
         if task.status != MigrationTaskStatus.PAUSED:
             raise HTTPException(status_code=400, detail="Task not paused")
-        _transition_task(task, MigrationTaskStatus.RUNNING)
+        _transition_task(task, MigrationTaskStatus.QUEUED)
     elif action == "cancel":
         _transition_task(task, MigrationTaskStatus.CANCELLED)
     else:
         raise HTTPException(status_code=400, detail="Unsupported action")
     db.commit()
+    if task.status == MigrationTaskStatus.QUEUED:
+        scheduler.wake()
+    elif task.status != MigrationTaskStatus.RUNNING:
+        executor.stop(task_id)
     db.refresh(task)
     return task
 
@@ -92,7 +155,7 @@ def control_task(
 def report_progress(
     task_id: str,
     payload: migration_schemas.MigrationTaskUpdate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
     db: Session = Depends(get_db),
 ):
     task = db.query(models.MigrationTask).filter(models.MigrationTask.task_id == task_id).first()
@@ -1,13 +1,20 @@
-from datetime import datetime
-from typing import List
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.db import models
+from app.core.config import get_settings
 from app.db.session import get_db
-from app.schemas.monitor import MonitorSnapshot, RecentError, ServiceStatus, SystemLoad, KeyStatus
+from app.schemas.monitor import DailyOperationStat, MonitorSnapshot, RecentError, ServiceStatus, SystemLoad, KeyStatus
+from app.services.config_cache import config_cache
+from app.services.live import live_broker
+from app.services.rollups import read_daily, read_totals
+from app.services.system_load import load_sampler
 
 router = APIRouter(prefix="/api/monitor", tags=["monitor"])
 
@@ -16,15 +23,54 @@ SERVICE_START_TIME = datetime.utcnow()
 
 @router.get("/status", response_model=MonitorSnapshot)
 def get_status(
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
     db: Session = Depends(get_db),
 ):
+    return build_snapshot(db)
+
+
+@router.get("/stream")
+async def stream_updates(
+    task_id: Optional[str] = Query(None),
+    _: deps.Principal = Depends(
+        deps.require_role(
+            models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR, user_dependency=deps.get_stream_user
+        )
+    ),
+):
+    heartbeat = get_settings().live_heartbeat_seconds
+    subscription = live_broker.subscribe(task_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield event.encode()
+        finally:
+            live_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def build_snapshot(db: Session) -> MonitorSnapshot:
     now = datetime.utcnow()
     uptime_seconds = int((now - SERVICE_START_TIME).total_seconds())
     running_tasks = db.query(models.MigrationTask).filter(models.MigrationTask.status == models.MigrationTaskStatus.RUNNING).count()
-    total_encryptions = db.query(models.AuditLog).filter(models.AuditLog.log_type == models.AuditLogType.ENCRYPTION).count()
-    total_decryptions = db.query(models.AuditLog).filter(models.AuditLog.log_type == models.AuditLogType.DECRYPTION).count()
-    total_errors = db.query(models.AuditLog).filter(models.AuditLog.status == "error").count()
+    queued_tasks = db.query(models.MigrationTask).filter(models.MigrationTask.status == models.MigrationTaskStatus.QUEUED).count()
+    sample = load_sampler.latest()
+    # Running totals from the rollup table: a few rows regardless of how large audit_logs grows.
+    totals = read_totals(db)
 
     recent_errors = (
         db.query(models.AuditLog)
@@ -39,33 +85,22 @@ def get_status(
         for log in recent_errors
     ]
 
-    config_key_version = db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key == "key_version").first()
-    config_valid_until = db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key == "key_valid_until").first()
-    config_last_rotation = db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key == "key_last_rotation").first()
-
-    key_version = config_key_version.value if config_key_version else "v1"
-    valid_until = (
-        datetime.fromisoformat(config_valid_until.value)
-        if config_valid_until and config_valid_until.value
-        else now.replace(year=now.year + 1)
-    )
-    last_rotation = (
-        datetime.fromisoformat(config_last_rotation.value)
-        if config_last_rotation and config_last_rotation.value
-        else SERVICE_START_TIME
-    )
+    key_version = config_cache.get("key_version") or "v1"
+    valid_until = config_cache.get_datetime("key_valid_until") or now.replace(year=now.year + 1)
+    last_rotation = config_cache.get_datetime("key_last_rotation") or SERVICE_START_TIME
     is_expired = valid_until < now
     expires_soon = (valid_until - now).days <= 30
 
-    snapshot = MonitorSnapshot(
+    return MonitorSnapshot(
         service=ServiceStatus(
             service_start_time=SERVICE_START_TIME,
             uptime_seconds=uptime_seconds,
-            current_threads=4,
+            current_threads=sample.threads,
             current_tasks=running_tasks,
-            total_encryptions=total_encryptions,
-            total_decryptions=total_decryptions,
-            total_errors=total_errors,
+            queued_tasks=queued_tasks,
+            total_encryptions=totals["encryptions"],
+            total_decryptions=totals["decryptions"],
+            total_errors=totals["errors"],
         ),
         key=KeyStatus(
             version=key_version,
@@ -75,11 +110,32 @@ def get_status(
             expires_soon=expires_soon,
         ),
         load=SystemLoad(
-            cpu_percent=35.5,
-            memory_percent=48.2,
-            disk_io=120.4,
-            db_connections=1,
+            cpu_percent=sample.cpu_percent,
+            memory_percent=sample.memory_percent,
+            disk_io=sample.disk_io,
+            db_connections=sample.db_connections,
+            sampled_at=sample.sampled_at,
+            rss_mb=sample.rss_mb,
+            disk_read_kbps=sample.disk_read_kbps,
+            disk_write_kbps=sample.disk_write_kbps,
+            target_db_connections=sample.target_db_connections,
+            pool_size=sample.pool_size,
+            pool_overflow=sample.pool_overflow,
+            migration_threads=sample.migration_threads,
         ),
         recent_errors=error_items,
     )
-    return snapshot
+
+
+@router.get("/reports/daily", response_model=List[DailyOperationStat])
+def daily_operation_report(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+    db: Session = Depends(get_db),
+):
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="Report range must be between 1 and 367 days")
+    return read_daily(db, start, end)
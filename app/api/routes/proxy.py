@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api import deps
+from app.crypto import CipherError
+from app.db import models
+from app.proxy import ProxyError, SQLSyntaxError, proxy
+from app.schemas import proxy as proxy_schemas
+from app.services.audit import audit_sink
+
+router = APIRouter(prefix="/api/proxy", tags=["proxy"])
+
+
+@router.post("/execute", response_model=proxy_schemas.ProxyStatementResult)
+def execute_statement(
+    payload: proxy_schemas.ProxyStatement,
+    request: Request,
+    user: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR)),
+):
+    try:
+        result = proxy.execute(payload.sql, payload.params)
+    except (ProxyError, SQLSyntaxError, CipherError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except SQLAlchemyError as exc:
+        raise HTTPException(status_code=400, detail=f"Statement failed: {getattr(exc, 'orig', exc)}")
+    if result.fields:
+        tables = sorted({name.split(".", 1)[0] for name in result.fields})
+        audit_sink.submit(
+            models.AuditLogType.PROXY,
+            username=user.username,
+            ip_address=request.client.host if request.client else None,
+            table_name=",".join(tables)[:100],
+            field_name=",".join(name.split(".", 1)[1] for name in result.fields)[:100],
+            operation=result.statement.lower(),
+            status="success",
+            details={
+                "fingerprint": result.fingerprint,
+                "rowcount": result.rowcount,
+                "cache_hit": result.cache_hit,
+                "elapsed_ms": result.elapsed_ms,
+            },
+        )
+    return result
+
+
+@router.get("/stats", response_model=proxy_schemas.ProxyCacheStats)
+def proxy_stats(
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN, models.RoleEnum.OPERATOR, models.RoleEnum.AUDITOR)),
+):
+    return proxy_schemas.ProxyCacheStats(
+        size=len(proxy.cache),
+        hits=proxy.cache.hits,
+        misses=proxy.cache.misses,
+        registry_version=proxy.registry.version,
+        statements=proxy.stats(),
+    )
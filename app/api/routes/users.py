@@ -8,6 +8,8 @@ from app.core.security import get_password_hash
 from app.db import models
 from app.db.session import get_db
 from app.schemas import user as user_schemas
+from app.services.principals import USER_CACHE, principal_cache
+from app.services.versioning import bump_version
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -15,7 +17,7 @@ router = APIRouter(prefix="/api/users", tags=["users"])
 @router.post("", response_model=user_schemas.UserOut)
 def create_user(
     payload: user_schemas.UserCreate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     if db.query(models.User).filter(models.User.username == payload.username).first():
@@ -34,7 +36,7 @@ def create_user(
 
 @router.get("", response_model=List[user_schemas.UserOut])
 def list_users(
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     return db.query(models.User).all()
@@ -44,7 +46,7 @@ def list_users(
 def update_user(
     user_id: int,
     payload: user_schemas.UserUpdate,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     user = db.query(models.User).filter(models.User.id == user_id).first()
@@ -58,20 +60,24 @@ def update_user(
         user.role = payload.role
     if payload.is_active is not None:
         user.is_active = payload.is_active
+    bump_version(db, USER_CACHE)
     db.commit()
     db.refresh(user)
+    principal_cache.forget(user.username)
     return user
 
 
 @router.delete("/{user_id}")
 def delete_user(
     user_id: int,
-    _: models.User = Depends(deps.require_role(models.RoleEnum.ADMIN)),
+    _: deps.Principal = Depends(deps.require_role(models.RoleEnum.ADMIN)),
     db: Session = Depends(get_db),
 ):
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
+    bump_version(db, USER_CACHE)
     db.commit()
+    principal_cache.forget(user.username)
     return {"message": "User deleted"}
@@ -1,4 +1,6 @@
 from functools import lru_cache
+from typing import Optional
+
 from pydantic import BaseSettings, Field
 
 
@@ -6,7 +8,33 @@ class Settings(BaseSettings):
     app_name: str = Field(default="GMDB Security Middleware")
     secret_key: str = Field(default="change-this-secret")
     access_token_expire_minutes: int = Field(default=60)
+    session_idle_minutes: int = Field(default=10)
+    session_backend: str = Field(default="memory")
+    session_cache_size: int = Field(default=10000)
+    login_hash_workers: int = Field(default=4)
+    login_max_pending: int = Field(default=64)
+    login_ip_per_minute: float = Field(default=60)
+    login_user_per_minute: float = Field(default=30)
+    login_lockout_shared: bool = Field(default=False)
     database_url: str = Field(default="sqlite:///./gmdb_middleware.db")
+    target_database_url: Optional[str] = Field(default=None)
+    data_key: str = Field(default="0123456789abcdeffedcba9876543210")
+    blind_index_key: Optional[str] = Field(default=None)
+    cache_poll_seconds: float = Field(default=2.0)
+    config_cache_ttl_seconds: float = Field(default=60.0)
+    load_sample_seconds: float = Field(default=5.0)
+    live_push_seconds: float = Field(default=1.0)
+    live_heartbeat_seconds: float = Field(default=15.0)
+    scheduler_interval_seconds: float = Field(default=5.0)
+    migration_heartbeat_timeout_seconds: float = Field(default=60.0)
+    bulk_update_strategy: Optional[str] = Field(default=None)
+    metrics_token: Optional[str] = Field(default=None)
+    proxy_statement_cache_size: int = Field(default=4096)
+    audit_queue_size: int = Field(default=10000)
+    audit_batch_size: int = Field(default=500)
+    audit_flush_ms: float = Field(default=200)
+    audit_overflow: str = Field(default="block")
+    audit_spill_path: str = Field(default="./audit_spill.jsonl")
     initial_admin_username: str = Field(default="admin")
     initial_admin_password: str = Field(default="ChangeMe123!")
 
@@ -1,16 +1,14 @@
 
 import secrets
-from datetime import datetime, timedelta
-
-from typing import Dict
+import time
 
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from app.services.sessions import session_store
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
-_sessions: Dict[str, Dict[str, str]] = {}
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 
 def get_password_hash(password: str) -> str:
@@ -23,20 +21,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def create_access_token(username: str, expires_minutes: int) -> str:
     token = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(minutes=expires_minutes)
-    _sessions[token] = {"username": username, "expires_at": expires_at.isoformat()}
+    session_store.create(token, username, time.time() + expires_minutes * 60)
     return token
 
 
 def get_current_username(token: str) -> str:
-    session = _sessions.get(token)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    if datetime.fromisoformat(session["expires_at"]) < datetime.utcnow():
-        del _sessions[token]
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    return session["username"]
+    username = session_store.resolve(token)
+    if username is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    return username
 
 
 def revoke_token(token: str) -> None:
-    _sessions.pop(token, None)
+    session_store.revoke(token)
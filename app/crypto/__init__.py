@@ -0,0 +1,82 @@
+import base64
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.crypto.base import Cipher, CipherError
+from app.crypto.registry import (
+    available_algorithms,
+    canonical_name,
+    get_cipher,
+    is_supported,
+    register_cipher,
+    reset_ciphers,
+)
+from app.crypto.sm2 import SM2Cipher
+from app.crypto.sm3 import SM3Cipher
+from app.crypto.sm4 import SM4CBCCipher, SM4ECBCipher, SM4GCMCipher
+
+register_cipher("SM4-ECB", SM4ECBCipher, aliases=["SM4"])
+register_cipher("SM4-CBC", SM4CBCCipher)
+register_cipher("SM4-GCM", SM4GCMCipher)
+register_cipher("SM3", SM3Cipher)
+register_cipher("SM2", SM2Cipher)
+
+__all__ = [
+    "Cipher",
+    "CipherError",
+    "available_algorithms",
+    "canonical_name",
+    "decrypt_value",
+    "decrypt_values",
+    "encrypt_value",
+    "encrypt_values",
+    "get_cipher",
+    "is_encrypted",
+    "register_cipher",
+    "reset_ciphers",
+]
+
+
+def _split_envelope(value: str) -> Tuple[str, str]:
+    _, name, payload = value.split("$", 2)
+    return name, payload
+
+
+def is_encrypted(value: Optional[str]) -> bool:
+    if not isinstance(value, str) or not value.startswith("$") or value.count("$") < 2:
+        return False
+    return is_supported(_split_envelope(value)[0])
+
+
+def encrypt_values(algorithm: str, values: Sequence[Optional[str]]) -> List[Optional[str]]:
+    name = canonical_name(algorithm)
+    positions = [index for index, value in enumerate(values) if value is not None]
+    ciphertexts = get_cipher(name).encrypt_batch([values[index].encode("utf-8") for index in positions])
+    results: List[Optional[str]] = [None] * len(values)
+    for index, ciphertext in zip(positions, ciphertexts):
+        results[index] = f"${name}${base64.b64encode(ciphertext).decode('ascii')}"
+    return results
+
+
+def decrypt_values(values: Sequence[Optional[str]]) -> List[Optional[str]]:
+    groups: Dict[str, List[int]] = defaultdict(list)
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        if not is_encrypted(value):
+            raise CipherError("Value is not an encrypted envelope")
+        groups[canonical_name(_split_envelope(value)[0])].append(index)
+    results: List[Optional[str]] = [None] * len(values)
+    for name, positions in groups.items():
+        payloads = [base64.b64decode(_split_envelope(values[index])[1]) for index in positions]
+        for index, plaintext in zip(positions, get_cipher(name).decrypt_batch(payloads)):
+            results[index] = plaintext.decode("utf-8")
+    return results
+
+
+def encrypt_value(algorithm: str, plaintext: str) -> str:
+    return encrypt_values(algorithm, [plaintext])[0]
+
+
+def decrypt_value(value: str) -> str:
+    return decrypt_values([value])[0]
@@ -0,0 +1,19 @@
+import abc
+from typing import List, Sequence
+
+
+class CipherError(ValueError):
+    pass
+
+
+class Cipher(abc.ABC):
+    name = ""
+    reversible = True
+    deterministic = True
+
+    @abc.abstractmethod
+    def encrypt_batch(self, values: Sequence[bytes]) -> List[bytes]:
+        raise NotImplementedError
+
+    def decrypt_batch(self, values: Sequence[bytes]) -> List[bytes]:
+        raise CipherError(f"{self.name} is not reversible")
@@ -0,0 +1,30 @@
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+from app.core.config import get_settings
+from app.crypto.sm3 import hmac_sm3
+
+BLIND_INDEX_SUFFIX = "_bidx"
+BLIND_INDEX_LENGTH = 64
+
+
+@lru_cache()
+def _blind_index_key() -> bytes:
+    settings = get_settings()
+    if settings.blind_index_key:
+        return bytes.fromhex(settings.blind_index_key)
+    # Derived from, but never equal to, the data key so index digests reveal nothing about ciphertexts.
+    return hmac_sm3(bytes.fromhex(settings.data_key), b"gmdb-blind-index")
+
+
+def default_column(field_name: str) -> str:
+    return f"{field_name}{BLIND_INDEX_SUFFIX}"
+
+
+def blind_index(value: str) -> str:
+    return hmac_sm3(_blind_index_key(), value.encode("utf-8")).hex()
+
+
+def blind_indexes(values: Sequence[Optional[str]]) -> List[Optional[str]]:
+    key = _blind_index_key()
+    return [None if value is None else hmac_sm3(key, value.encode("utf-8")).hex() for value in values]
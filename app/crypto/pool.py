@@ -0,0 +1,55 @@
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from app import crypto
+
+Packed = Tuple[bytes, bytes]
+
+
+def pack(values: Sequence[bytes]) -> Packed:
+    return b"".join(values), array("I", [len(value) for value in values]).tobytes()
+
+
+def unpack(packed: Packed) -> List[bytes]:
+    data, raw_lengths = packed
+    lengths = array("I")
+    lengths.frombytes(raw_lengths)
+    values, offset = [], 0
+    for length in lengths:
+        values.append(data[offset : offset + length])
+        offset += length
+    return values
+
+
+def _warm_up(algorithm: str) -> None:
+    crypto.get_cipher(algorithm)
+
+
+def _encrypt_packed(algorithm: str, packed: Packed) -> Packed:
+    plaintexts = [value.decode("utf-8") for value in unpack(packed)]
+    return pack([envelope.encode("ascii") for envelope in crypto.encrypt_values(algorithm, plaintexts)])
+
+
+class CryptoProcessPool:
+    # Batches cross the process boundary as one concatenated buffer plus a length array instead of pickled str lists.
+    def __init__(self, algorithm: str, processes: int):
+        self.algorithm = crypto.canonical_name(algorithm)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up,
+            initargs=(self.algorithm,),
+        )
+
+    def encrypt_values(self, values: Sequence[str], algorithm: Optional[str] = None) -> List[str]:
+        if not values:
+            return []
+        packed = pack([value.encode("utf-8") for value in values])
+        name = crypto.canonical_name(algorithm) if algorithm else self.algorithm
+        result = self._executor.submit(_encrypt_packed, name, packed).result()
+        return [value.decode("ascii") for value in unpack(result)]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
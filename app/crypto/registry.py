@@ -0,0 +1,55 @@
+import threading
+from typing import Callable, Dict, Iterable, List
+
+from app.core.config import get_settings
+from app.crypto.base import Cipher, CipherError
+
+CipherFactory = Callable[[bytes], Cipher]
+
+_factories: Dict[str, CipherFactory] = {}
+_aliases: Dict[str, str] = {}
+_instances: Dict[str, Cipher] = {}
+_lock = threading.Lock()
+
+
+def register_cipher(name: str, factory: CipherFactory, aliases: Iterable[str] = ()) -> None:
+    canonical = name.upper()
+    with _lock:
+        _factories[canonical] = factory
+        _aliases[canonical] = canonical
+        for alias in aliases:
+            _aliases[alias.upper()] = canonical
+        _instances.pop(canonical, None)
+
+
+def canonical_name(algorithm: str) -> str:
+    try:
+        return _aliases[algorithm.strip().upper()]
+    except KeyError:
+        raise CipherError(f"Unsupported algorithm '{algorithm}'") from None
+
+
+def is_supported(algorithm: str) -> bool:
+    return algorithm.strip().upper() in _aliases
+
+
+def available_algorithms() -> List[str]:
+    return sorted(_factories)
+
+
+def get_cipher(algorithm: str) -> Cipher:
+    # Instances hold precomputed key schedules, so they are built once per process and shared.
+    canonical = canonical_name(algorithm)
+    cipher = _instances.get(canonical)
+    if cipher is None:
+        with _lock:
+            cipher = _instances.get(canonical)
+            if cipher is None:
+                cipher = _factories[canonical](bytes.fromhex(get_settings().data_key))
+                _instances[canonical] = cipher
+    return cipher
+
+
+def reset_ciphers() -> None:
+    with _lock:
+        _instances.clear()
@@ -0,0 +1,137 @@
+import hmac
+import secrets
+from typing import List, Optional, Sequence, Tuple
+
+from app.crypto.base import Cipher, CipherError
+from app.crypto.sm3 import DIGEST_SIZE, sm3_hash
+
+P = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFF
+A = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFC
+B = 0x28E9FA9E9D9F5E344D5A9E4BCF6509A7F39789F515AB8F92DDBCBD414D940E93
+N = 0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFF7203DF6B21C6052B53BBF40939D54123
+G = (
+    0x32C4AE2C1F1981195F9904466A39C9948FE30BBFF2660BE1715A4589334C74C7,
+    0xBC3736A2F4F6779C59BDCEE36B692153D0A9877CC62A474002DF32E52139F0A0,
+)
+
+Point = Optional[Tuple[int, int]]
+_Jacobian = Tuple[int, int, int]
+
+
+def is_on_curve(point: Point) -> bool:
+    if point is None:
+        return False
+    x, y = point
+    return 0 <= x < P and 0 <= y < P and (y * y - x * x * x - A * x - B) % P == 0
+
+
+def _double(point: _Jacobian) -> _Jacobian:
+    x, y, z = point
+    if not y or not z:
+        return (0, 1, 0)
+    yy = y * y % P
+    s = 4 * x * yy % P
+    zz = z * z % P
+    m = (3 * x * x + A * zz * zz) % P
+    nx = (m * m - 2 * s) % P
+    return nx, (m * (s - nx) - 8 * yy * yy) % P, 2 * y * z % P
+
+
+def _add(left: _Jacobian, right: _Jacobian) -> _Jacobian:
+    if not left[2]:
+        return right
+    if not right[2]:
+        return left
+    x1, y1, z1 = left
+    x2, y2, z2 = right
+    z1z1, z2z2 = z1 * z1 % P, z2 * z2 % P
+    u1, u2 = x1 * z2z2 % P, x2 * z1z1 % P
+    s1, s2 = y1 * z2 * z2z2 % P, y2 * z1 * z1z1 % P
+    if u1 == u2:
+        return _double(left) if s1 == s2 else (0, 1, 0)
+    h, r = (u2 - u1) % P, (s2 - s1) % P
+    hh = h * h % P
+    hhh = h * hh % P
+    v = u1 * hh % P
+    nx = (r * r - hhh - 2 * v) % P
+    return nx, (r * (v - nx) - s1 * hhh) % P, h * z1 * z2 % P
+
+
+def _to_affine(point: _Jacobian) -> Point:
+    x, y, z = point
+    if not z:
+        return None
+    z_inv = pow(z, -1, P)
+    zz = z_inv * z_inv % P
+    return x * zz % P, y * zz * z_inv % P
+
+
+def scalar_mult(k: int, point: Tuple[int, int]) -> Point:
+    result: _Jacobian = (0, 1, 0)
+    addend: _Jacobian = (point[0], point[1], 1)
+    while k:
+        if k & 1:
+            result = _add(result, addend)
+        addend = _double(addend)
+        k >>= 1
+    return _to_affine(result)
+
+
+def _kdf(z: bytes, length: int) -> bytes:
+    output = bytearray()
+    counter = 1
+    while len(output) < length:
+        output += sm3_hash(z + counter.to_bytes(4, "big"))
+        counter += 1
+    return bytes(output[:length])
+
+
+def _encode_point(point: Tuple[int, int]) -> bytes:
+    return b"\x04" + point[0].to_bytes(32, "big") + point[1].to_bytes(32, "big")
+
+
+def private_key_from_seed(seed: bytes) -> int:
+    return int.from_bytes(sm3_hash(b"gmdb-sm2" + seed), "big") % (N - 1) + 1
+
+
+# SM2 public-key encryption (GB/T 32918.4) with the C1 || C3 || C2 ciphertext layout.
+class SM2Cipher(Cipher):
+    name = "SM2"
+    deterministic = False
+
+    def __init__(self, key: bytes):
+        self.private_key = private_key_from_seed(key)
+        self.public_key = scalar_mult(self.private_key, G)
+
+    def encrypt(self, message: bytes) -> bytes:
+        while True:
+            k = secrets.randbelow(N - 1) + 1
+            c1 = scalar_mult(k, G)
+            x2, y2 = scalar_mult(k, self.public_key)
+            x2_bytes, y2_bytes = x2.to_bytes(32, "big"), y2.to_bytes(32, "big")
+            t = _kdf(x2_bytes + y2_bytes, len(message))
+            if message and not any(t):
+                continue
+            c2 = bytes(m ^ s for m, s in zip(message, t))
+            c3 = sm3_hash(x2_bytes + message + y2_bytes)
+            return _encode_point(c1) + c3 + c2
+
+    def decrypt(self, ciphertext: bytes) -> bytes:
+        if len(ciphertext) < 65 + DIGEST_SIZE or ciphertext[0] != 4:
+            raise CipherError("Invalid SM2 ciphertext")
+        c1 = (int.from_bytes(ciphertext[1:33], "big"), int.from_bytes(ciphertext[33:65], "big"))
+        if not is_on_curve(c1):
+            raise CipherError("Invalid SM2 ciphertext point")
+        c3, c2 = ciphertext[65 : 65 + DIGEST_SIZE], ciphertext[65 + DIGEST_SIZE :]
+        x2, y2 = scalar_mult(self.private_key, c1)
+        x2_bytes, y2_bytes = x2.to_bytes(32, "big"), y2.to_bytes(32, "big")
+        message = bytes(c ^ s for c, s in zip(c2, _kdf(x2_bytes + y2_bytes, len(c2))))
+        if not hmac.compare_digest(c3, sm3_hash(x2_bytes + message + y2_bytes)):
+            raise CipherError("SM2 ciphertext integrity check failed")
+        return message
+
+    def encrypt_batch(self, values: Sequence[bytes]) -> List[bytes]:
+        return [self.encrypt(value) for value in values]
+
+    def decrypt_batch(self, values: Sequence[bytes]) -> List[bytes]:
+        return [self.decrypt(value) for value in values]
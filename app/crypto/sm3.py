@@ -0,0 +1,96 @@
+import hashlib
+import hmac
+import struct
+from typing import List, Sequence
+
+from app.crypto.base import Cipher
+
+DIGEST_SIZE = 32
+
+_IV = (0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600, 0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E)
+_MASK32 = 0xFFFFFFFF
+
+
+def _rotl(value: int, shift: int) -> int:
+    shift %= 32
+    return ((value << shift) | (value >> (32 - shift))) & _MASK32
+
+
+_T = [_rotl(0x79CC4519 if j < 16 else 0x7A879D8A, j) for j in range(64)]
+
+
+def _compress(v: List[int], block: bytes) -> List[int]:
+    w = list(struct.unpack(">16I", block))
+    for j in range(16, 68):
+        x = w[j - 16] ^ w[j - 9] ^ _rotl(w[j - 3], 15)
+        w.append((x ^ _rotl(x, 15) ^ _rotl(x, 23)) ^ _rotl(w[j - 13], 7) ^ w[j - 6])
+    a, b, c, d, e, f, g, h = v
+    for j in range(64):
+        a12 = _rotl(a, 12)
+        ss1 = _rotl((a12 + e + _T[j]) & _MASK32, 7)
+        ss2 = ss1 ^ a12
+        if j < 16:
+            ff, gg = a ^ b ^ c, e ^ f ^ g
+        else:
+            ff, gg = (a & b) | (a & c) | (b & c), (e & f) | (~e & g)
+        tt1 = (ff + d + ss2 + (w[j] ^ w[j + 4])) & _MASK32
+        tt2 = (gg + h + ss1 + w[j]) & _MASK32
+        a, b, c, d = tt1, a, _rotl(b, 9), c
+        e, f, g, h = tt2 ^ _rotl(tt2, 9) ^ _rotl(tt2, 17), e, _rotl(f, 19), g
+    return [x ^ y for x, y in zip(v, (a, b, c, d, e, f, g, h))]
+
+
+def _sm3_python(data: bytes) -> bytes:
+    length = len(data) * 8
+    data += b"\x80" + b"\0" * ((55 - len(data)) % 64) + struct.pack(">Q", length)
+    v = list(_IV)
+    for offset in range(0, len(data), 64):
+        v = _compress(v, data[offset : offset + 64])
+    return struct.pack(">8I", *v)
+
+
+class _PythonSM3:
+    digest_size = DIGEST_SIZE
+    block_size = 64
+
+    def __init__(self, data: bytes = b""):
+        self._data = bytearray(data)
+
+    def update(self, data: bytes) -> None:
+        self._data += data
+
+    def copy(self) -> "_PythonSM3":
+        return _PythonSM3(bytes(self._data))
+
+    def digest(self) -> bytes:
+        return _sm3_python(bytes(self._data))
+
+
+if "sm3" in hashlib.algorithms_available:
+
+    def sm3_new(data: bytes = b""):
+        return hashlib.new("sm3", data)
+
+else:  # pragma: no cover - depends on the OpenSSL build
+
+    def sm3_new(data: bytes = b""):
+        return _PythonSM3(data)
+
+
+def sm3_hash(data: bytes) -> bytes:
+    return sm3_new(data).digest()
+
+
+def hmac_sm3(key: bytes, data: bytes) -> bytes:
+    return hmac.new(key, data, sm3_new).digest()
+
+
+class SM3Cipher(Cipher):
+    name = "SM3"
+    reversible = False
+
+    def __init__(self, key: bytes = b""):
+        pass
+
+    def encrypt_batch(self, values: Sequence[bytes]) -> List[bytes]:
+        return [sm3_hash(value) for value in values]
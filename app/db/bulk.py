@@ -0,0 +1,181 @@
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Column, MetaData, Table, bindparam, func, text
+from sqlalchemy.engine import Connection
+
+EXECUTEMANY = "executemany"
+TEMP_TABLE = "temp_table"
+MERGE = "merge"
+STRATEGIES = (EXECUTEMANY, TEMP_TABLE, MERGE)
+
+# Fastest write-back per backend: PostgreSQL/MySQL stage the batch with one multi-row INSERT
+# (psycopg2 execute_values, MySQL driver rewriting) and join it in a single UPDATE; Oracle binds
+# the batch as an array to one MERGE; SQL Server merges from a VALUES list; SQLite is in-process
+# and staging buys little over a prepared executemany (see benchmarks/bulk_update.py).
+DEFAULT_STRATEGIES = {
+    "postgresql": TEMP_TABLE,
+    "mysql": TEMP_TABLE,
+    "oracle": MERGE,
+    "mssql": MERGE,
+    "sqlite": EXECUTEMANY,
+}
+SUPPORTED_STRATEGIES = {
+    "postgresql": {EXECUTEMANY, TEMP_TABLE},
+    "mysql": {EXECUTEMANY, TEMP_TABLE},
+    "oracle": {EXECUTEMANY, MERGE},
+    "mssql": {EXECUTEMANY, MERGE},
+    "sqlite": {EXECUTEMANY, TEMP_TABLE},
+}
+MSSQL_MAX_PARAMETERS = 2100
+_STAGING_INFO_KEY = "gmdb_bulk_staging"
+
+
+def strategy_for(dialect_name: str, requested: Optional[str] = None) -> str:
+    strategy = requested or DEFAULT_STRATEGIES.get(dialect_name, EXECUTEMANY)
+    if strategy not in SUPPORTED_STRATEGIES.get(dialect_name, {EXECUTEMANY}):
+        raise ValueError(f"Bulk update strategy '{strategy}' is not available on {dialect_name}")
+    return strategy
+
+
+def bulk_update(
+    conn: Connection,
+    table: Table,
+    key: Column,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    strategy: Optional[str] = None,
+) -> int:
+    # rows are (key, value for columns[0], value for columns[1], ...); None leaves that column
+    # unchanged, so rows needing different subsets of columns still go out together. The whole batch is
+    # one statement (one executemany, MERGE or staged UPDATE); only SQL Server's parameter cap splits it.
+    if not rows or not columns:
+        return 0
+    strategy = strategy_for(conn.dialect.name, strategy)
+    if strategy == TEMP_TABLE:
+        _update_from_staging(conn, table, key, columns, rows)
+    elif strategy == MERGE and conn.dialect.name == "oracle":
+        _merge_oracle(conn, table, key, columns, rows)
+    elif strategy == MERGE:
+        _merge_values(conn, table, key, columns, rows)
+    else:
+        _executemany(conn, table, key, columns, rows)
+    return len(rows)
+
+
+def _executemany(conn, table, key, columns, rows) -> None:
+    statement = (
+        table.update()
+        .where(key == bindparam("_pk"))
+        .values(
+            {
+                name: func.coalesce(bindparam(f"_v{position}", type_=table.c[name].type), table.c[name])
+                for position, name in enumerate(columns)
+            }
+        )
+    )
+    conn.execute(statement, [_params(row) for row in rows])
+
+
+def _update_from_staging(conn, table, key, columns, rows) -> None:
+    staging = _staging_table(conn, table, key, columns)
+    conn.execute(staging.delete())
+    conn.execute(
+        staging.insert(),
+        [{"pk": row[0], **{f"v{position}": value for position, value in enumerate(row[1:])}} for row in rows],
+    )
+    if conn.dialect.name == "sqlite":
+        # SQLite has UPDATE ... FROM since 3.33, but SQLAlchemy 1.4 only renders it for other backends.
+        preparer = conn.dialect.identifier_preparer
+        target = preparer.format_table(table)
+        assignments = ", ".join(
+            f"{preparer.quote(name)} = COALESCE(s.v{position}, {target}.{preparer.quote(name)})"
+            for position, name in enumerate(columns)
+        )
+        statement = text(
+            f"UPDATE {target} SET {assignments} FROM {preparer.format_table(staging)} AS s "
+            f"WHERE {target}.{preparer.quote(key.name)} = s.pk"
+        )
+    else:
+        statement = (
+            table.update()
+            .where(key == staging.c.pk)
+            .values(
+                {
+                    name: func.coalesce(staging.c[f"v{position}"], table.c[name])
+                    for position, name in enumerate(columns)
+                }
+            )
+        )
+    conn.execute(statement)
+    conn.execute(staging.delete())
+
+
+def _staging_table(conn, table, key, columns) -> Table:
+    # One temporary table per (table, columns) shape, created once per pooled connection.
+    signature = "|".join([table.name, key.name, *columns])
+    name = f"gmdb_stage_{zlib.crc32(signature.encode('utf-8')):08x}"
+    staging = Table(
+        name,
+        MetaData(),
+        Column("pk", key.type, primary_key=True, autoincrement=False),
+        *[Column(f"v{position}", table.c[column].type) for position, column in enumerate(columns)],
+        prefixes=["TEMPORARY"],
+    )
+    created = conn.connection.info.setdefault(_STAGING_INFO_KEY, set())
+    if name not in created:
+        staging.create(conn, checkfirst=True)
+        created.add(name)
+    return staging
+
+
+def _merge_oracle(conn, table, key, columns, rows) -> None:
+    # The driver binds the batch as arrays, so the whole batch is one round trip.
+    quote = conn.dialect.identifier_preparer.quote
+    selected = ", ".join([":_pk AS pk", *[f":_v{position} AS v{position}" for position in range(len(columns))]])
+    assignments = ", ".join(
+        f"t.{quote(name)} = COALESCE(s.v{position}, t.{quote(name)})" for position, name in enumerate(columns)
+    )
+    statement = text(
+        f"MERGE INTO {conn.dialect.identifier_preparer.format_table(table)} t "
+        f"USING (SELECT {selected} FROM dual) s ON (t.{quote(key.name)} = s.pk) "
+        f"WHEN MATCHED THEN UPDATE SET {assignments}"
+    )
+    conn.execute(statement, [_params(row) for row in rows])
+
+
+def _merge_values(conn, table, key, columns, rows) -> None:
+    # SQL Server caps a statement at 2100 parameters, so chunks shrink as columns are added.
+    quote = conn.dialect.identifier_preparer.quote
+    width = len(columns) + 1
+    chunk_size = (MSSQL_MAX_PARAMETERS - 1) // width
+    names = ", ".join(["pk", *[f"v{position}" for position in range(len(columns))]])
+    assignments = ", ".join(
+        f"t.{quote(name)} = COALESCE(s.v{position}, t.{quote(name)})" for position, name in enumerate(columns)
+    )
+    target = conn.dialect.identifier_preparer.format_table(table)
+    for chunk in _chunks(rows, chunk_size):
+        params: Dict[str, Any] = {}
+        tuples: List[str] = []
+        for index, row in enumerate(chunk):
+            placeholders = []
+            for position, value in enumerate(row):
+                params[f"p{index}_{position}"] = value
+                placeholders.append(f":p{index}_{position}")
+            tuples.append(f"({', '.join(placeholders)})")
+        conn.execute(
+            text(
+                f"MERGE INTO {target} AS t USING (VALUES {', '.join(tuples)}) AS s ({names}) "
+                f"ON t.{quote(key.name)} = s.pk WHEN MATCHED THEN UPDATE SET {assignments};"
+            ),
+            params,
+        )
+
+
+def _params(row: Sequence[Any]) -> Dict[str, Any]:
+    return {"_pk": row[0], **{f"_v{position}": value for position, value in enumerate(row[1:])}}
+
+
+def _chunks(rows: Sequence[Sequence[Any]], size: int) -> Iterator[Sequence[Sequence[Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
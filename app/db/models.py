@@ -5,11 +5,14 @@ from sqlalchemy import (
     Column,
     DateTime,
     Enum as SqlEnum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     JSON,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 
@@ -46,6 +49,8 @@ class SensitiveField(Base):
     algorithm_type = Column(String(20), nullable=False)
     status = Column(String(20), default="未加密")
     allow_plain_text_read = Column(Boolean, default=False)
+    blind_index_enabled = Column(Boolean, default=False)
+    blind_index_column = Column(String(100))
     remarks = Column(Text)
     is_enabled = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -54,6 +59,7 @@ class SensitiveField(Base):
 
 class MigrationTaskStatus(str, Enum):
     PENDING = "待启动"
+    QUEUED = "排队中"
     RUNNING = "进行中"
     COMPLETED = "完成"
     FAILED = "失败"
@@ -61,6 +67,11 @@ class MigrationTaskStatus(str, Enum):
     CANCELLED = "已取消"
 
 
+class MigrationExecutionMode(str, Enum):
+    THREAD = "thread"
+    PROCESS = "process"
+
+
 class MigrationTask(Base):
     __tablename__ = "migration_tasks"
 
@@ -68,16 +79,32 @@ class MigrationTask(Base):
     task_id = Column(String(50), unique=True, nullable=False)
     table_name = Column(String(100), nullable=False)
     field_name = Column(String(100), nullable=False)
+    # Every column encrypted by the task in one pass over the table; NULL means just field_name.
+    field_names = Column(JSON)
     batch_size = Column(Integer, default=1000)
     concurrency = Column(Integer, default=1)
     overwrite_plaintext = Column(Boolean, default=False)
+    # Higher runs first when the scheduler has fewer workers than queued tasks ask for.
+    priority = Column(Integer, default=0)
+    execution_mode = Column(SqlEnum(MigrationExecutionMode))
+    adaptive = Column(Boolean, default=True)
+    effective_batch_size = Column(Integer)
+    effective_concurrency = Column(Integer)
+    avg_batch_latency_ms = Column(Float)
     status = Column(SqlEnum(MigrationTaskStatus), default=MigrationTaskStatus.PENDING)
     progress = Column(Integer, default=0)
+    total_rows = Column(Integer, default=0)
+    processed_count = Column(Integer, default=0)
     started_at = Column(DateTime)
     finished_at = Column(DateTime)
     success_count = Column(Integer, default=0)
     failure_count = Column(Integer, default=0)
+    # field name -> {"success": n, "failure": n}
+    column_counts = Column(JSON)
     failure_reason = Column(Text)
+    checkpoint = Column(JSON)
+    # Refreshed by every scheduler tick of the process running the task; stale means that process is gone.
+    heartbeat_at = Column(DateTime)
     operator_id = Column(Integer, ForeignKey("users.id"))
 
     operator = relationship("User", back_populates="tasks")
@@ -108,6 +135,17 @@ class AuditLog(Base):
 
     details = Column(JSON, default=dict)
 
+    # One index per filter the log list and monitor use, each suffixed with the (created_at, id)
+    # sort key so filtered pages and "latest N" reads are ordered index range scans.
+    # Names stay within Oracle's 30-character limit.
+    __table_args__ = (
+        Index("ix_audit_logs_created_id", "created_at", "id"),
+        Index("ix_audit_logs_type_created", "log_type", "created_at", "id"),
+        Index("ix_audit_logs_status_created", "status", "created_at", "id"),
+        Index("ix_audit_logs_user_created", "username", "created_at", "id"),
+        Index("ix_audit_logs_tbl_fld_created", "table_name", "field_name", "created_at", "id"),
+        Index("ix_audit_logs_task_created", "task_id", "created_at", "id"),
+    )
 
 
 class SystemConfiguration(Base):
@@ -120,6 +158,49 @@ class SystemConfiguration(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class AuditRollup(Base):
+    __tablename__ = "audit_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String(10), nullable=False)
+    bucket = Column(DateTime, nullable=False)
+    log_type = Column(SqlEnum(AuditLogType), nullable=False)
+    status = Column(String(20), nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("period", "bucket", "log_type", "status", name="uq_audit_rollups_key"),)
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), unique=True, nullable=False)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AuthSession(Base):
+    __tablename__ = "auth_sessions"
+
+    # SHA-256 of the bearer token; the token itself is never stored.
+    token_hash = Column(String(64), primary_key=True)
+    username = Column(String(50), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    last_seen_at = Column(DateTime, nullable=False)
+
+
+class LoginLockout(Base):
+    __tablename__ = "login_lockouts"
+
+    username = Column(String(50), primary_key=True)
+    failures = Column(Integer, nullable=False, default=0)
+    locked_until = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class BackupRecord(Base):
     __tablename__ = "backup_records"
 
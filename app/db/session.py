@@ -1,6 +1,6 @@
 from sqlalchemy import create_engine
 
-from sqlalchemy.engine import make_url
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import get_settings
@@ -9,25 +9,41 @@ SUPPORTED_BACKENDS = {"sqlite", "postgresql", "mysql", "oracle", "mssql"}
 
 settings = get_settings()
 
-database_url = settings.database_url
-url = make_url(database_url)
-backend = url.get_backend_name()
 
-if backend not in SUPPORTED_BACKENDS:
-    raise ValueError(
-        f"Unsupported database backend '{backend}'. Supported backends: {', '.join(sorted(SUPPORTED_BACKENDS))}."
-    )
+def _build_engine(database_url: str) -> tuple[Engine, str]:
+    backend_name = make_url(database_url).get_backend_name()
+    if backend_name not in SUPPORTED_BACKENDS:
+        raise ValueError(
+            f"Unsupported database backend '{backend_name}'. Supported backends: {', '.join(sorted(SUPPORTED_BACKENDS))}."
+        )
+    connect_args: dict[str, object] = {}
+    if backend_name == "sqlite":
+        connect_args = {"check_same_thread": False}
+    return create_engine(database_url, connect_args=connect_args, pool_pre_ping=True), backend_name
+
 
-connect_args: dict[str, object] = {}
-if backend == "sqlite":
-    connect_args = {"check_same_thread": False}
+database_url = settings.database_url
+engine, backend = _build_engine(database_url)
 
-engine = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+# Business tables (HIS/LIS...) that migration tasks encrypt. Defaults to the management database.
+target_database_url = settings.target_database_url or database_url
+if target_database_url == database_url:
+    target_engine, target_backend = engine, backend
+else:
+    target_engine, target_backend = _build_engine(target_database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def ensure_indexes(bind: Engine = engine) -> None:
+    # create_all() skips indexes of tables that already exist, so upgraded deployments get
+    # indexes declared after their tables were first created from here.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+
 def get_db():
     db = SessionLocal()
     try:
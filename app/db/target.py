@@ -0,0 +1,34 @@
+import threading
+from typing import Dict
+
+from sqlalchemy import MetaData, Table
+
+from app.db.session import target_engine
+
+_metadata = MetaData()
+_tables: Dict[str, Table] = {}
+_lock = threading.Lock()
+
+
+def get_target_table(table_name: str) -> Table:
+    table = _tables.get(table_name)
+    if table is None:
+        with _lock:
+            table = _tables.get(table_name)
+            if table is None:
+                table = Table(table_name, _metadata, autoload_with=target_engine)
+                _tables[table_name] = table
+    return table
+
+
+def single_primary_key(table: Table):
+    columns = list(table.primary_key.columns)
+    if len(columns) != 1:
+        raise ValueError(f"Table '{table.name}' must have a single-column primary key")
+    return columns[0]
+
+
+def clear_target_tables() -> None:
+    with _lock:
+        _tables.clear()
+        _metadata.clear()
@@ -1,15 +1,32 @@
+import os
 from datetime import datetime
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 
 from app.api.router import api_router
+from app.api.routes import monitor
 from app.core.config import get_settings
 from app.core.security import get_password_hash
 from app.db import models
 from app.db.models import RoleEnum
-from app.db.session import Base, SessionLocal, engine
+from app.db.session import Base, SessionLocal, engine, ensure_indexes
+from app.migration import executor
+from app.migration.scheduler import scheduler
+from app.services import metrics
+from app.services.audit import audit_sink
+from app.services.live import live_broker
+from app.services.login_guard import login_guard
+from app.services.principals import USER_CACHE, principal_cache
+from app.services.rollups import ensure_rollups
+from app.services.sessions import SESSION_STORE, session_store
+from app.services.system_load import load_sampler
+from app.services.config_cache import CONFIG_CACHE, config_cache
+from app.services.field_registry import FIELD_REGISTRY, field_registry
+from app.services.versioning import ensure_version, poller, read_version
 
 settings = get_settings()
 
@@ -23,14 +40,45 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+poller.register(FIELD_REGISTRY, field_registry.sync)
+poller.register(CONFIG_CACHE, config_cache.load)
+poller.register(SESSION_STORE, session_store.invalidate)
+poller.register(USER_CACHE, principal_cache.invalidate)
+live_broker.register_snapshot("monitor", lambda db: monitor.build_snapshot(db).dict())
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
+    with engine.begin() as conn:
+        ensure_rollups(conn)
     with SessionLocal() as session:
         _ensure_default_admin(session)
         _seed_defaults(session)
+        field_registry.load(session, read_version(session, FIELD_REGISTRY))
+        config_cache.load(session, read_version(session, CONFIG_CACHE))
+    audit_sink.start()
+    poller.start()
+    load_sampler.start()
+    session_store.start()
+    live_broker.start()
+    executor.recover()
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    scheduler.stop()
+    executor.shutdown()
+    live_broker.stop()
+    poller.stop()
+    load_sampler.stop()
+    session_store.stop()
+    login_guard.shutdown()
+    audit_sink.stop()
 
 
 @app.get("/health")
@@ -38,6 +86,13 @@ def health_check():
     return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint(authorization: Optional[str] = Header(default=None)):
+    if settings.metrics_token and authorization != f"Bearer {settings.metrics_token}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 def _ensure_default_admin(session: Session) -> None:
     if not session.query(models.User).filter(models.User.username == settings.initial_admin_username).first():
         admin = models.User(
@@ -54,7 +109,15 @@ def _seed_defaults(session: Session) -> None:
     defaults = {
         "default_concurrency": "4",
         "default_batch_size": "500",
+        "migration_execution_mode": "thread",
+        "migration_target_batch_ms": "500",
+        "migration_db_workers": "8",
+        "migration_host_workers": str(os.cpu_count() or 8),
+        "migration_window": "",
+        "migration_off_window_workers": "1",
         "log_retention_days": "30",
+        "login_max_failures": "5",
+        "login_lockout_minutes": "15",
         "default_algorithm": "SM4",
         "key_version": "v1",
         "key_valid_until": datetime.utcnow().replace(year=datetime.utcnow().year + 1).isoformat(),
@@ -65,6 +128,8 @@ def _seed_defaults(session: Session) -> None:
         if not config:
             config = models.SystemConfiguration(key=key, value=value)
             session.add(config)
+    ensure_version(session, FIELD_REGISTRY)
+    ensure_version(session, CONFIG_CACHE)
     if not session.query(models.HelpDocument).first():
         session.add(
             models.HelpDocument(
@@ -0,0 +1,3 @@
+from app.migration.executor import MigrationExecutor, MigrationRunner, executor
+
+__all__ = ["MigrationExecutor", "MigrationRunner", "executor"]
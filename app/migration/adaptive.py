@@ -0,0 +1,118 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 20000
+EWMA_WEIGHT = 0.3
+# Write latency this many times above the best seen so far is treated as source-DB pressure.
+WRITE_PRESSURE_FACTOR = 3.0
+COOLDOWN_SECONDS = 2.0
+
+
+class AdaptiveController:
+    def __init__(
+        self,
+        batch_size: int,
+        max_concurrency: int,
+        target_latency_ms: float,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.target_latency = max(0.01, target_latency_ms / 1000)
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.concurrency = self.max_concurrency
+        self.quota: Optional[int] = None
+        self.batch_latency: Optional[float] = None
+        self.write_latency: Optional[float] = None
+        self._best_write_latency: Optional[float] = None
+        self._backoff_until = 0.0
+        self._active = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._condition:
+            while self._active >= self.concurrency:
+                self._condition.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+
+    @property
+    def ceiling(self) -> int:
+        return min(self.max_concurrency, self.quota) if self.quota is not None else self.max_concurrency
+
+    def set_quota(self, workers: Optional[int]) -> None:
+        # Scheduler-imposed worker limit; applies whether or not adaptation is enabled.
+        with self._condition:
+            self.quota = None if workers is None else max(1, workers)
+            if self.enabled:
+                self.concurrency = min(self.concurrency, self.ceiling)
+            else:
+                self.concurrency = self.ceiling
+            self._condition.notify_all()
+
+    def next_batch_size(self) -> int:
+        with self._condition:
+            return self.batch_size
+
+    def observe(self, rows: int, batch_seconds: float, write_seconds: float) -> None:
+        if not self.enabled or rows <= 0:
+            return
+        with self._condition:
+            self.batch_latency = _ewma(self.batch_latency, batch_seconds)
+            self.write_latency = _ewma(self.write_latency, write_seconds)
+            if self._best_write_latency is None or self.write_latency < self._best_write_latency:
+                self._best_write_latency = self.write_latency
+            if self.write_latency > self._best_write_latency * WRITE_PRESSURE_FACTOR + 0.05:
+                self._back_off()
+                return
+            # Scale the next batch toward the latency target using the observed per-row cost.
+            per_row = batch_seconds / rows
+            wanted = self.target_latency / per_row if per_row > 0 else self.batch_size * 2
+            wanted = min(self.batch_size * 2, max(self.batch_size / 2, wanted))
+            self.batch_size = int(min(MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, wanted)))
+            now = time.monotonic()
+            if (
+                now >= self._backoff_until
+                and self.concurrency < self.ceiling
+                and self.batch_latency < self.target_latency * 1.2
+            ):
+                self.concurrency += 1
+                self._backoff_until = now + COOLDOWN_SECONDS
+                self._condition.notify_all()
+
+    def observe_lock_wait(self) -> None:
+        if not self.enabled:
+            return
+        with self._condition:
+            self._back_off()
+
+    def _back_off(self) -> None:
+        now = time.monotonic()
+        if now < self._backoff_until:
+            return
+        self.concurrency = max(1, self.concurrency // 2)
+        self.batch_size = max(MIN_BATCH_SIZE, self.batch_size // 2)
+        self._backoff_until = now + COOLDOWN_SECONDS
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._condition:
+            return {
+                "effective_batch_size": self.batch_size,
+                "effective_concurrency": self.concurrency,
+                "avg_batch_latency_ms": round(self.batch_latency * 1000, 1) if self.batch_latency is not None else None,
+            }
+
+
+def _ewma(current: Optional[float], sample: float) -> float:
+    if current is None:
+        return sample
+    return current * (1 - EWMA_WEIGHT) + sample * EWMA_WEIGHT
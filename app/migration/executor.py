@@ -0,0 +1,569 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, Index, MetaData, Table, func, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app import crypto
+from app.crypto import blind_index
+from app.crypto.pool import CryptoProcessPool
+from app.core.config import get_settings
+from app.db import bulk, models
+from app.db.models import MigrationExecutionMode, MigrationTaskStatus
+from app.db.session import SessionLocal, target_engine
+from app.migration.adaptive import AdaptiveController
+from app.migration.planner import task_field_names
+from app.services.config_cache import config_cache
+from app.services.metrics import migration_batch_duration, migration_rows, migration_throughput
+
+logger = logging.getLogger(__name__)
+
+CIPHER_COLUMN_SUFFIX = "_cipher"
+LOCK_RETRY_ATTEMPTS = 3
+LOCK_ERROR_MARKERS = ("lock", "deadlock", "busy", "timeout")
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class KeyRange:
+    lower: Any  # exclusive, None means the start of the table
+    upper: Any  # inclusive
+
+
+@dataclass(frozen=True)
+class ColumnPlan:
+    name: str
+    algorithm: str
+    source: Column
+    destination: Column
+    index_column: Optional[Column]
+
+
+@dataclass
+class BatchResult:
+    rows: int = 0
+    success: int = 0
+    failure: int = 0
+    error: Optional[str] = None
+    seconds: float = 0.0
+    write_seconds: float = 0.0
+    # field name -> [encrypted, failed]
+    columns: Dict[str, List[int]] = field(default_factory=dict)
+
+
+class MigrationRunner:
+    def __init__(self, task_id: str, session_factory=SessionLocal, target: Engine = target_engine):
+        self.task_id = task_id
+        self.session_factory = session_factory
+        self.target = target
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[CryptoProcessPool] = None
+        self.success_count = 0
+        self.failure_count = 0
+        self.processed_count = 0
+        self.last_error: Optional[str] = None
+        self.total_rows = 0
+        self.column_counts: Dict[str, Dict[str, int]] = {}
+        self.controller: Optional[AdaptiveController] = None
+        self.quota: Optional[int] = None
+        self.write_strategy = get_settings().bulk_update_strategy
+        # Ranges handed to the queue but not yet committed, in key order, mapped to the worker holding them.
+        self._pending: Dict[KeyRange, Optional[str]] = {}
+        self._frontier: Any = None
+        self._resume_ranges: List[KeyRange] = []
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name=f"migration-{self.task_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def set_quota(self, workers: Optional[int]) -> None:
+        self.quota = workers
+        if self.controller is not None:
+            self.controller.set_quota(workers)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self) -> None:
+        try:
+            self._run()
+        finally:
+            # Per-task series would otherwise pile up in every scrape for each task ever run.
+            for metric in (migration_batch_duration, migration_rows, migration_throughput):
+                metric.remove(task_id=self.task_id)
+
+    def _run(self) -> None:
+        try:
+            if not self._prepare():
+                return
+            self._execute()
+        except Exception as exc:
+            logger.exception("Migration task %s failed", self.task_id)
+            self._finish(MigrationTaskStatus.FAILED, str(exc))
+            return
+        if self.stop_event.is_set():
+            return
+        if self.success_count == 0 and self.failure_count > 0:
+            # Nothing was encrypted, so the task did not do its job even though every range was visited.
+            self._finish(MigrationTaskStatus.FAILED, self.last_error or f"All {self.failure_count} rows failed")
+        else:
+            self._finish(MigrationTaskStatus.COMPLETED)
+
+    def _prepare(self) -> bool:
+        with self.session_factory() as db:
+            task = db.query(models.MigrationTask).filter(models.MigrationTask.task_id == self.task_id).first()
+            if not task or task.status != MigrationTaskStatus.RUNNING:
+                return False
+            self.table_name = task.table_name
+            self.field_names = task_field_names(task)
+            self.batch_size = max(1, task.batch_size or 1)
+            self.concurrency = max(1, task.concurrency or 1)
+            settings = []
+            for field_name in self.field_names:
+                sensitive = _resolve_field(db, task.table_name, field_name)
+                algorithm = crypto.canonical_name(
+                    sensitive.algorithm_type if sensitive else config_cache.get("default_algorithm", "SM4")
+                )
+                index_name = None
+                if sensitive and sensitive.blind_index_enabled:
+                    index_name = sensitive.blind_index_column or blind_index.default_column(sensitive.field_name)
+                target_name = field_name if task.overwrite_plaintext else f"{field_name}{CIPHER_COLUMN_SUFFIX}"
+                settings.append((field_name, algorithm, target_name, index_name))
+            self.controller = AdaptiveController(
+                self.batch_size,
+                self.concurrency,
+                config_cache.get_float("migration_target_batch_ms", 500.0),
+                enabled=task.adaptive is not False,
+            )
+            self.controller.set_quota(self.quota)
+            self.execution_mode = MigrationExecutionMode(
+                task.execution_mode or config_cache.get("migration_execution_mode", MigrationExecutionMode.THREAD.value)
+            )
+            checkpoint = task.checkpoint or {}
+            if checkpoint:
+                self.success_count = task.success_count or 0
+                self.failure_count = task.failure_count or 0
+                self.processed_count = task.processed_count or 0
+                self.total_rows = task.total_rows or 0
+                self.column_counts = dict(task.column_counts or {})
+                self._frontier = checkpoint.get("frontier")
+                self._resume_ranges = [
+                    KeyRange(item["lower"], item["upper"]) for item in checkpoint.get("in_flight", [])
+                ]
+
+        table = Table(self.table_name, MetaData(), autoload_with=self.target)
+        primary_key = list(table.primary_key.columns)
+        if len(primary_key) != 1:
+            raise MigrationError(f"Table '{self.table_name}' must have a single-column primary key")
+        for field_name, _, target_name, index_name in settings:
+            for column_name in {field_name, target_name, index_name} - {None}:
+                if column_name not in table.c:
+                    raise MigrationError(f"Column '{self.table_name}.{column_name}' does not exist")
+        self.table = table
+        self.pk = primary_key[0]
+        self.write_strategy = bulk.strategy_for(self.target.dialect.name, self.write_strategy)
+        self.columns = [
+            ColumnPlan(
+                name=field_name,
+                algorithm=algorithm,
+                source=table.c[field_name],
+                destination=table.c[target_name],
+                index_column=table.c[index_name] if index_name else None,
+            )
+            for field_name, algorithm, target_name, index_name in settings
+        ]
+        for plan in self.columns:
+            if plan.index_column is not None:
+                Index(f"ix_{self.table_name}_{plan.index_column.name}", plan.index_column).create(
+                    self.target, checkfirst=True
+                )
+
+        if checkpoint:
+            logger.info(
+                "Resuming migration task %s from %s with %d unfinished ranges",
+                self.task_id,
+                checkpoint.get("high_water_mark"),
+                len(self._resume_ranges),
+            )
+            return True
+        with self.target.connect() as conn:
+            self.total_rows = conn.execute(select(func.count()).select_from(table)).scalar() or 0
+        self.column_counts = {plan.name: {"success": 0, "failure": 0} for plan in self.columns}
+        self._update_task(
+            total_rows=self.total_rows,
+            success_count=0,
+            failure_count=0,
+            column_counts=self.column_counts,
+            processed_count=0,
+            progress=0,
+            checkpoint=self._checkpoint(),
+        )
+        return True
+
+    def _execute(self) -> None:
+        ranges: "queue.Queue[Optional[KeyRange]]" = queue.Queue(maxsize=self.concurrency)
+        workers = [
+            threading.Thread(target=self._work, args=(ranges,), name=f"migration-{self.task_id}-w{index}", daemon=True)
+            for index in range(self.concurrency)
+        ]
+        if self.execution_mode == MigrationExecutionMode.PROCESS:
+            self._pool = CryptoProcessPool(self.columns[0].algorithm, self.concurrency)
+        for worker in workers:
+            worker.start()
+        resumed = set(self._resume_ranges)
+        try:
+            for key_range in self._iter_ranges():
+                if self.stop_event.is_set():
+                    break
+                with self._lock:
+                    self._pending[key_range] = None
+                    if key_range not in resumed:
+                        self._frontier = key_range.upper
+                ranges.put(key_range)
+        finally:
+            for _ in workers:
+                ranges.put(None)
+            for worker in workers:
+                worker.join()
+            if self._pool is not None:
+                self._pool.shutdown()
+            with self._lock:
+                self._update_task(checkpoint=self._checkpoint())
+
+    def _iter_ranges(self):
+        yield from self._resume_ranges
+        lower = self._frontier
+        while not self.stop_event.is_set():
+            with self.target.connect() as conn:
+                keys = select(self.pk)
+                if lower is not None:
+                    keys = keys.where(self.pk > lower)
+                batch_size = self.controller.next_batch_size()
+                upper = conn.execute(keys.order_by(self.pk).offset(batch_size - 1).limit(1)).scalar()
+                if upper is None:
+                    tail = select(func.max(self.pk))
+                    if lower is not None:
+                        tail = tail.where(self.pk > lower)
+                    upper = conn.execute(tail).scalar()
+                    if upper is not None:
+                        yield KeyRange(lower, upper)
+                    return
+            yield KeyRange(lower, upper)
+            lower = upper
+
+    def _work(self, ranges: "queue.Queue[Optional[KeyRange]]") -> None:
+        while True:
+            key_range = ranges.get()
+            if key_range is None:
+                return
+            if self.stop_event.is_set():
+                continue
+            with self._lock:
+                self._pending[key_range] = threading.current_thread().name
+            with self.controller.slot():
+                result = self._process_with_retry(key_range)
+            self._record(key_range, result)
+
+    def _process_with_retry(self, key_range: KeyRange) -> BatchResult:
+        for attempt in range(1, LOCK_RETRY_ATTEMPTS + 1):
+            try:
+                return self._process(key_range)
+            except OperationalError as exc:
+                if attempt == LOCK_RETRY_ATTEMPTS or not _is_lock_error(exc):
+                    logger.exception("Migration task %s failed on range %s", self.task_id, key_range)
+                    return self._failed(key_range, str(exc))
+                # Lock waits on the source database: shrink the load and retry the same range.
+                self.controller.observe_lock_wait()
+                time.sleep(0.2 * attempt)
+            except Exception as exc:
+                logger.exception("Migration task %s failed on range %s", self.task_id, key_range)
+                return self._failed(key_range, str(exc))
+        return self._failed(key_range, None)
+
+    def _failed(self, key_range: KeyRange, error: Optional[str]) -> BatchResult:
+        # Every row of the range stays unencrypted, so each one is a failure, not the batch as a whole.
+        try:
+            with self.target.connect() as conn:
+                failed = conn.execute(
+                    select(func.count()).select_from(self.table).where(self._range_condition(key_range))
+                ).scalar()
+        except Exception:
+            logger.warning("Migration task %s could not count the rows of range %s", self.task_id, key_range)
+            failed = 1
+        return BatchResult(failure=failed or 0, error=error)
+
+    def _range_condition(self, key_range: KeyRange):
+        condition = self.pk <= key_range.upper
+        if key_range.lower is not None:
+            condition = condition & (self.pk > key_range.lower)
+        return condition
+
+    def _process(self, key_range: KeyRange) -> BatchResult:
+        condition = self._range_condition(key_range)
+        # Every column of the task is read by one SELECT and written back by one UPDATE per batch.
+        columns = [self.pk]
+        positions = [
+            (
+                _position(columns, plan.source),
+                _position(columns, plan.destination),
+                _position(columns, plan.index_column) if plan.index_column is not None else None,
+            )
+            for plan in self.columns
+        ]
+
+        started = time.perf_counter()
+        with self.target.begin() as conn:
+            rows = conn.execute(select(*columns).where(condition)).all()
+            result = BatchResult(rows=len(rows))
+            assignments: Dict[Any, Dict[str, Any]] = defaultdict(dict)
+            encrypted, failed = set(), set()
+            for plan, (source, current, index) in zip(self.columns, positions):
+                pending = [row for row in rows if row[source] is not None and not crypto.is_encrypted(row[current])]
+                plaintexts = [str(row[source]) for row in pending]
+                try:
+                    ciphertexts = self._encrypt(plan.algorithm, plaintexts)
+                except Exception as exc:
+                    # The other columns of the batch are still written; this one stays plaintext for a rerun.
+                    logger.warning("Migration task %s could not encrypt %s: %s", self.task_id, plan.name, exc)
+                    result.columns[plan.name] = [0, len(pending)]
+                    result.error = f"{plan.name}: {exc}"
+                    failed.update(row[0] for row in pending)
+                    continue
+                result.columns[plan.name] = [len(pending), 0]
+                for row, ciphertext in zip(pending, ciphertexts):
+                    assignments[row[0]][plan.destination.name] = ciphertext
+                    encrypted.add(row[0])
+                if plan.index_column is not None:
+                    for row, digest in zip(pending, blind_index.blind_indexes(plaintexts)):
+                        assignments[row[0]][plan.index_column.name] = digest
+                    for key, digest in self._backfill_index(plan, rows, current, index):
+                        assignments[key][plan.index_column.name] = digest
+            write_started = time.perf_counter()
+            if assignments:
+                # NULL leaves a column as it is (ciphertexts and digests never are), so every row of
+                # the batch goes out in one bulk UPDATE whichever of its columns changed.
+                names = sorted({name for values in assignments.values() for name in values})
+                bulk.bulk_update(
+                    conn,
+                    self.table,
+                    self.pk,
+                    names,
+                    [(key, *(values.get(name) for name in names)) for key, values in assignments.items()],
+                    strategy=self.write_strategy,
+                )
+            result.success = len(encrypted - failed)
+            result.failure = len(failed)
+        finished = time.perf_counter()
+        result.seconds = finished - started
+        result.write_seconds = finished - write_started
+        return result
+
+    def _backfill_index(self, plan: ColumnPlan, rows, current: int, index: int) -> List[Tuple[Any, str]]:
+        # Rows encrypted before the blind index was enabled only have ciphertext left to derive it from.
+        missing = [row for row in rows if row[index] is None and crypto.is_encrypted(row[current])]
+        if not missing or not crypto.get_cipher(plan.algorithm).reversible:
+            return []
+        plaintexts = crypto.decrypt_values([row[current] for row in missing])
+        return [(row[0], digest) for row, digest in zip(missing, blind_index.blind_indexes(plaintexts))]
+
+    def _encrypt(self, algorithm: str, values: List[str]) -> List[str]:
+        if self._pool is not None:
+            return self._pool.encrypt_values(values, algorithm)
+        return crypto.encrypt_values(algorithm, values)
+
+    def _record(self, key_range: KeyRange, result: BatchResult) -> None:
+        migration_batch_duration.observe(result.seconds, task_id=self.task_id)
+        migration_rows.inc(result.success, task_id=self.task_id, outcome="success")
+        migration_rows.inc(result.failure, task_id=self.task_id, outcome="failure")
+        if result.seconds > 0:
+            migration_throughput.set(round(result.rows / result.seconds, 1), task_id=self.task_id)
+        with self._lock:
+            self._pending.pop(key_range, None)
+            self.success_count += result.success
+            self.failure_count += result.failure
+            self.processed_count += result.rows
+            for name, (success, failure) in result.columns.items():
+                counts = self.column_counts.setdefault(name, {"success": 0, "failure": 0})
+                counts["success"] += success
+                counts["failure"] += failure
+            self.controller.observe(result.rows, result.seconds, result.write_seconds)
+            values: Dict[str, Any] = {
+                **self.controller.snapshot(),
+                "success_count": self.success_count,
+                "failure_count": self.failure_count,
+                "column_counts": {name: dict(counts) for name, counts in self.column_counts.items()},
+                "processed_count": self.processed_count,
+                "progress": _percent(self.processed_count, self.total_rows),
+                "checkpoint": self._checkpoint(),
+            }
+            if result.error:
+                self.last_error = result.error
+                values["failure_reason"] = result.error
+            self._update_task(**values)
+
+    def _checkpoint(self) -> Dict[str, Any]:
+        high_water_mark = next(iter(self._pending)).lower if self._pending else self._frontier
+        return {
+            "high_water_mark": high_water_mark,
+            "frontier": self._frontier,
+            "in_flight": [
+                {"worker": worker, "lower": key_range.lower, "upper": key_range.upper}
+                for key_range, worker in self._pending.items()
+            ],
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+
+    def _update_task(self, **values: Any) -> None:
+        with self.session_factory() as db:
+            db.query(models.MigrationTask).filter(models.MigrationTask.task_id == self.task_id).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+
+    def _finish(self, status: MigrationTaskStatus, reason: Optional[str] = None) -> None:
+        with self.session_factory() as db:
+            task = db.query(models.MigrationTask).filter(models.MigrationTask.task_id == self.task_id).first()
+            if not task or task.status != MigrationTaskStatus.RUNNING:
+                return
+            task.status = status
+            task.finished_at = datetime.utcnow()
+            if status == MigrationTaskStatus.COMPLETED:
+                task.progress = 100
+            if reason:
+                task.failure_reason = reason
+            db.add(
+                models.AuditLog(
+                    log_type=models.AuditLogType.MIGRATION,
+                    username="system",
+                    table_name=task.table_name,
+                    field_name=task.field_name,
+                    task_id=task.task_id,
+                    operation="migration_finished",
+                    status="success" if status == MigrationTaskStatus.COMPLETED else "error",
+                    error_message=reason,
+                    details={
+                        "field_names": task_field_names(task),
+                        "success_count": task.success_count,
+                        "failure_count": task.failure_count,
+                        "column_counts": task.column_counts,
+                        "processed_count": task.processed_count,
+                    },
+                )
+            )
+            db.commit()
+
+
+class MigrationExecutor:
+    def __init__(self):
+        self._runners: Dict[str, MigrationRunner] = {}
+        self._lock = threading.Lock()
+
+    def start(self, task_id: str, quota: Optional[int] = None) -> None:
+        with self._lock:
+            previous = self._runners.get(task_id)
+        if previous is not None and previous.is_alive():
+            # A paused/cancelled runner drains its in-flight batches before a new one may take over.
+            previous.stop()
+            previous.join()
+        with self._lock:
+            runner = MigrationRunner(task_id)
+            runner.set_quota(quota)
+            self._runners[task_id] = runner
+        runner.start()
+
+    def stop(self, task_id: str, wait: bool = False) -> None:
+        with self._lock:
+            runner = self._runners.get(task_id)
+        if runner is None:
+            return
+        runner.stop()
+        if wait:
+            runner.join()
+
+    def recover(self, timeout: Optional[float] = None) -> None:
+        # Tasks left running by a process that is gone go back in the queue with their checkpoint, so the
+        # scheduler re-admits them within the worker budget. Sibling workers keep heartbeating the tasks
+        # they run, so those are left alone.
+        timeout = timeout if timeout is not None else get_settings().migration_heartbeat_timeout_seconds
+        cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+        with SessionLocal() as db:
+            requeued = (
+                db.query(models.MigrationTask)
+                .filter(
+                    models.MigrationTask.status == MigrationTaskStatus.RUNNING,
+                    or_(models.MigrationTask.heartbeat_at.is_(None), models.MigrationTask.heartbeat_at < cutoff),
+                )
+                .update({"status": MigrationTaskStatus.QUEUED}, synchronize_session=False)
+            )
+            db.commit()
+        if requeued:
+            logger.info("Re-queued %d interrupted migration tasks", requeued)
+
+    def set_quota(self, task_id: str, workers: Optional[int]) -> None:
+        with self._lock:
+            runner = self._runners.get(task_id)
+        if runner is not None:
+            runner.set_quota(workers)
+
+    def is_running(self, task_id: str) -> bool:
+        with self._lock:
+            runner = self._runners.get(task_id)
+        return runner is not None and runner.is_alive()
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            runners = list(self._runners.values())
+            self._runners.clear()
+        for runner in runners:
+            runner.stop()
+        for runner in runners:
+            runner.join(timeout)
+
+
+def _resolve_field(db, table_name: str, field_name: str) -> Optional[models.SensitiveField]:
+    return (
+        db.query(models.SensitiveField)
+        .filter(models.SensitiveField.table_name == table_name, models.SensitiveField.field_name == field_name)
+        .first()
+    )
+
+
+def _position(columns: List[Column], column: Column) -> int:
+    for position, existing in enumerate(columns):
+        if existing is column:
+            return position
+    columns.append(column)
+    return len(columns) - 1
+
+
+def _is_lock_error(exc: OperationalError) -> bool:
+    message = str(exc.orig if exc.orig is not None else exc).lower()
+    return any(marker in message for marker in LOCK_ERROR_MARKERS)
+
+
+def _percent(done: int, total: int) -> int:
+    if total <= 0:
+        return 100
+    return min(100, done * 100 // total)
+
+
+executor = MigrationExecutor()
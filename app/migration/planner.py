@@ -0,0 +1,149 @@
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, inspect, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.models import MigrationTaskStatus
+from app.db.session import target_engine
+from app.services.config_cache import config_cache
+
+logger = logging.getLogger(__name__)
+
+# A batch should read roughly this much from the source table, whatever the row width.
+TARGET_BATCH_BYTES = 2 * 1024 * 1024
+MIN_BATCH_SIZE = 200
+MAX_BATCH_SIZE = 5000
+ROWS_PER_WORKER = 250000
+ACTIVE_STATUSES = (
+    MigrationTaskStatus.PENDING,
+    MigrationTaskStatus.QUEUED,
+    MigrationTaskStatus.RUNNING,
+    MigrationTaskStatus.PAUSED,
+)
+
+# Catalog estimates per backend; each returns (rows, total bytes) for :name.
+_STATISTICS = {
+    "postgresql": (
+        "SELECT c.reltuples, pg_total_relation_size(c.oid) FROM pg_class c WHERE c.oid = to_regclass(:name)"
+    ),
+    "mysql": (
+        "SELECT table_rows, data_length + index_length FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = :name"
+    ),
+    "oracle": "SELECT num_rows, num_rows * avg_row_len FROM user_tables WHERE table_name = UPPER(:name)",
+    "mssql": (
+        "SELECT SUM(row_count), SUM(used_page_count) * 8192 FROM sys.dm_db_partition_stats "
+        "WHERE object_id = OBJECT_ID(:name) AND index_id IN (0, 1)"
+    ),
+    "sqlite": "SELECT NULL, SUM(pgsize) FROM dbstat WHERE name = :name",
+}
+
+
+@dataclass
+class TableEstimate:
+    rows: int
+    bytes: Optional[int]
+    source: str
+
+    @property
+    def bytes_per_row(self) -> Optional[float]:
+        if not self.bytes or not self.rows:
+            return None
+        return self.bytes / self.rows
+
+
+@dataclass
+class PlannedTask:
+    table_name: str
+    field_names: List[str]
+    estimate: TableEstimate
+    batch_size: int
+    concurrency: int
+
+
+@dataclass
+class MigrationPlan:
+    tasks: List[PlannedTask] = field(default_factory=list)
+    skipped: List[Tuple[str, str, str]] = field(default_factory=list)
+
+
+def estimate_table(target: Engine, table_name: str) -> TableEstimate:
+    rows: Optional[float] = None
+    size: Optional[float] = None
+    statement = _STATISTICS.get(target.dialect.name)
+    if statement is not None:
+        try:
+            with target.connect() as conn:
+                row = conn.execute(text(statement), {"name": table_name}).first()
+            if row is not None:
+                rows, size = row
+        except SQLAlchemyError:
+            # No privilege on the catalog, or SQLite built without dbstat.
+            logger.debug("No catalog statistics for %s", table_name, exc_info=True)
+    if rows is not None and rows >= 0:
+        return TableEstimate(int(rows), int(size) if size else None, "statistics")
+    # Never analysed (reltuples = -1, num_rows NULL) or no catalog estimate: count exactly.
+    with target.connect() as conn:
+        count = conn.execute(select(func.count()).select_from(table(table_name))).scalar() or 0
+    return TableEstimate(count, int(size) if size else None, "count")
+
+
+def batch_size_for(estimate: TableEstimate) -> int:
+    bytes_per_row = estimate.bytes_per_row
+    if bytes_per_row is None:
+        return config_cache.get_int("default_batch_size", 500)
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, int(TARGET_BATCH_BYTES // bytes_per_row)))
+
+
+def concurrency_for(estimate: TableEstimate) -> int:
+    limit = max(1, config_cache.get_int("default_concurrency", 4))
+    return max(1, min(limit, math.ceil(estimate.rows / ROWS_PER_WORKER)))
+
+
+def task_field_names(task: models.MigrationTask) -> List[str]:
+    return list(task.field_names or [task.field_name])
+
+
+def plan_migration(db: Session, table_names: Optional[Iterable[str]] = None, target: Engine = target_engine) -> MigrationPlan:
+    # One task per table covering every enabled sensitive column of it, so each table is scanned once.
+    query = db.query(models.SensitiveField).filter(models.SensitiveField.is_enabled.is_(True))
+    if table_names:
+        query = query.filter(models.SensitiveField.table_name.in_(list(table_names)))
+    covered: Set[Tuple[str, str]] = {
+        (task.table_name, name)
+        for task in db.query(models.MigrationTask).filter(models.MigrationTask.status.in_(ACTIVE_STATUSES))
+        for name in task_field_names(task)
+    }
+    plan = MigrationPlan()
+    grouped: Dict[str, List[str]] = defaultdict(list)
+    for sensitive in query.order_by(models.SensitiveField.table_name, models.SensitiveField.id):
+        if (sensitive.table_name, sensitive.field_name) in covered:
+            plan.skipped.append((sensitive.table_name, sensitive.field_name, "Covered by an unfinished task"))
+        elif sensitive.field_name not in grouped[sensitive.table_name]:
+            grouped[sensitive.table_name].append(sensitive.field_name)
+
+    inspector = inspect(target)
+    for table_name, field_names in grouped.items():
+        if not field_names:
+            continue
+        if not inspector.has_table(table_name):
+            plan.skipped.extend((table_name, name, "Table does not exist") for name in field_names)
+            continue
+        estimate = estimate_table(target, table_name)
+        plan.tasks.append(
+            PlannedTask(
+                table_name=table_name,
+                field_names=field_names,
+                estimate=estimate,
+                batch_size=batch_size_for(estimate),
+                concurrency=concurrency_for(estimate),
+            )
+        )
+    return plan
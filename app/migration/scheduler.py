@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, time as clock_time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.models import MigrationTaskStatus
+from app.db.session import SessionLocal
+from app.migration.executor import MigrationExecutor, executor
+from app.services.config_cache import config_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_WORKERS = 8
+DEFAULT_OFF_WINDOW_WORKERS = 1
+
+Clock = Callable[[], datetime]
+
+
+@dataclass(frozen=True)
+class Budget:
+    db_workers: int  # all running tasks against the target database, whichever process runs them
+    host_workers: int  # tasks executed by this process
+    in_window: bool
+
+
+def parse_window(value: Optional[str]) -> Optional[Tuple[clock_time, clock_time]]:
+    # "22:00-06:00"; a window ending before it starts wraps past midnight. Empty means always.
+    text = (value or "").strip()
+    if not text:
+        return None
+    start, end = (part.strip() for part in text.split("-", 1))
+    return clock_time.fromisoformat(start), clock_time.fromisoformat(end)
+
+
+def in_window(window: Optional[Tuple[clock_time, clock_time]], moment: datetime) -> bool:
+    if window is None:
+        return True
+    start, end = window
+    now = moment.time()
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+class MigrationScheduler:
+    # Tasks asking to run wait as QUEUED; every tick hands out the worker budget in priority order
+    # (running tasks ahead of queued ones of the same priority), admits queued tasks while workers
+    # remain, lowers the quota of running tasks that no longer fit and re-queues those left without any.
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        runners: MigrationExecutor = executor,
+        interval: Optional[float] = None,
+        clock: Clock = datetime.now,
+    ):
+        self.session_factory = session_factory
+        self.runners = runners
+        self.interval = interval if interval is not None else get_settings().scheduler_interval_seconds
+        self.clock = clock
+        self.quotas: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def budget(self) -> Budget:
+        db_workers = config_cache.get_int("migration_db_workers", DEFAULT_DB_WORKERS)
+        host_workers = config_cache.get_int("migration_host_workers", os.cpu_count() or DEFAULT_DB_WORKERS)
+        try:
+            window = parse_window(config_cache.get("migration_window"))
+        except ValueError:
+            logger.warning("Ignoring malformed migration_window %r", config_cache.get("migration_window"))
+            window = None
+        full_speed = in_window(window, self.clock())
+        if not full_speed:
+            off_window = config_cache.get_int("migration_off_window_workers", DEFAULT_OFF_WINDOW_WORKERS)
+            db_workers = min(db_workers, off_window)
+            host_workers = min(host_workers, off_window)
+        return Budget(max(0, db_workers), max(0, host_workers), full_speed)
+
+    def tick(self) -> None:
+        with self._lock:
+            budget = self.budget()
+            with self.session_factory() as db:
+                tasks = (
+                    db.query(models.MigrationTask)
+                    .filter(models.MigrationTask.status.in_((MigrationTaskStatus.RUNNING, MigrationTaskStatus.QUEUED)))
+                    .all()
+                )
+                tasks.sort(key=lambda task: (-(task.priority or 0), task.status != MigrationTaskStatus.RUNNING, task.id))
+                active = {task.task_id for task in tasks}
+                db_left, host_left = budget.db_workers, budget.host_workers
+                admitted: List[Tuple[str, int]] = []
+                throttled: List[Tuple[str, int]] = []
+                requeued: List[str] = []
+                alive: List[str] = []
+                for task in tasks:
+                    wanted = max(1, task.concurrency or 1)
+                    local = self.runners.is_running(task.task_id)
+                    if local:
+                        alive.append(task.task_id)
+                    if task.status == MigrationTaskStatus.RUNNING and not local:
+                        # Running in another worker process: it only draws on the database budget.
+                        db_left -= min(wanted, task.effective_concurrency or wanted)
+                        continue
+                    workers = min(wanted, db_left, host_left)
+                    if workers < 1:
+                        if task.status == MigrationTaskStatus.RUNNING:
+                            requeued.append(task.task_id)
+                        continue
+                    db_left -= workers
+                    host_left -= workers
+                    if task.status == MigrationTaskStatus.QUEUED:
+                        admitted.append((task.task_id, workers))
+                    elif self.quotas.get(task.task_id) != workers:
+                        throttled.append((task.task_id, workers))
+                admitted = [(task_id, workers) for task_id, workers in admitted if self._claim(db, task_id)]
+                for task_id in requeued:
+                    self._requeue(db, task_id)
+                if alive:
+                    db.query(models.MigrationTask).filter(models.MigrationTask.task_id.in_(alive)).update(
+                        {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+                    )
+                db.commit()
+            self.quotas = {task_id: workers for task_id, workers in self.quotas.items() if task_id in active}
+            for task_id in requeued:
+                logger.info("Migration task %s re-queued: no workers left in the budget", task_id)
+                self.quotas.pop(task_id, None)
+                self.runners.stop(task_id)
+            for task_id, workers in throttled:
+                self.quotas[task_id] = workers
+                self.runners.set_quota(task_id, workers)
+            for task_id, workers in admitted:
+                logger.info("Migration task %s admitted with %d workers", task_id, workers)
+                self.quotas[task_id] = workers
+                self.runners.start(task_id, quota=workers)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="migration-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Migration scheduler tick failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    @staticmethod
+    def _claim(db, task_id: str) -> bool:
+        # Conditional update, so two worker processes never both admit the same queued task.
+        claimed = (
+            db.query(models.MigrationTask)
+            .filter(models.MigrationTask.task_id == task_id, models.MigrationTask.status == MigrationTaskStatus.QUEUED)
+            .update(
+                {"status": MigrationTaskStatus.RUNNING, "heartbeat_at": datetime.utcnow()}, synchronize_session=False
+            )
+        )
+        if claimed:
+            db.query(models.MigrationTask).filter(
+                models.MigrationTask.task_id == task_id, models.MigrationTask.started_at.is_(None)
+            ).update({"started_at": datetime.utcnow()}, synchronize_session=False)
+        return bool(claimed)
+
+    @staticmethod
+    def _requeue(db, task_id: str) -> None:
+        db.query(models.MigrationTask).filter(
+            models.MigrationTask.task_id == task_id, models.MigrationTask.status == MigrationTaskStatus.RUNNING
+        ).update({"status": MigrationTaskStatus.QUEUED}, synchronize_session=False)
+
+
+scheduler = MigrationScheduler()
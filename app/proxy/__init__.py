@@ -0,0 +1,16 @@
+from app.core.config import get_settings
+from app.db import session
+from app.db.models import Base
+from app.proxy.engine import EncryptionProxy, ProxyResult
+from app.proxy.lexer import SQLSyntaxError
+from app.proxy.rewriter import ProxyError
+from app.services.field_registry import field_registry
+
+__all__ = ["EncryptionProxy", "ProxyError", "ProxyResult", "SQLSyntaxError", "proxy"]
+
+# When business tables share the management database, the proxy must not reach users, sessions, audit logs etc.
+_management_tables = frozenset(Base.metadata.tables) if session.target_engine is session.engine else frozenset()
+
+proxy = EncryptionProxy(
+    session.target_engine, field_registry, get_settings().proxy_statement_cache_size, blocked_tables=_management_tables
+)
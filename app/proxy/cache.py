@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from app.proxy.lexer import SlotSource, Token, fingerprint, tokenize
+from app.proxy.rewriter import RewritePlan, build_plan
+from app.services.field_registry import FieldRegistry
+
+# Raw statement texts outnumber fingerprints (literal-bearing SQL differs per call), so keep more of them.
+TEXTS_PER_STATEMENT = 4
+
+
+class StatementCache:
+    def __init__(self, registry: FieldRegistry, max_statements: int = 4096, blocked_tables: Iterable[str] = ()):
+        self.registry = registry
+        self.blocked_tables = frozenset(name.lower() for name in blocked_tables)
+        self.max_statements = max(1, max_statements)
+        self.max_texts = self.max_statements * TEXTS_PER_STATEMENT
+        # Exact SQL text -> lexed form; skips the lexer entirely for repeated parameterized statements.
+        self._texts: "OrderedDict[str, Tuple[str, List[Token], List[SlotSource]]]" = OrderedDict()
+        # Fingerprint -> rewrite plan; shared by every text that only differs in literal values.
+        self._plans: "OrderedDict[str, RewritePlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sql: str) -> Tuple[RewritePlan, List[SlotSource], bool]:
+        version = self.registry.version
+        with self._lock:
+            entry = self._texts.get(sql)
+            if entry is not None:
+                self._texts.move_to_end(sql)
+        if entry is None:
+            tokens, sources = tokenize(sql)
+            entry = (fingerprint(tokens), tokens, sources)
+            with self._lock:
+                self._texts[sql] = entry
+                if len(self._texts) > self.max_texts:
+                    self._texts.popitem(last=False)
+        key, tokens, sources = entry
+
+        with self._lock:
+            plan: Optional[RewritePlan] = self._plans.get(key)
+            # Plans built against an older field registry may miss (or wrongly keep) encrypted columns.
+            if plan is not None and plan.registry_version == version:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan, sources, True
+            self.misses += 1
+        plan = build_plan(tokens, self.registry, key, self.blocked_tables)
+        with self._lock:
+            self._plans[key] = plan
+            if len(self._plans) > self.max_statements:
+                self._plans.popitem(last=False)
+        return plan, sources, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._texts.clear()
+            self._plans.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
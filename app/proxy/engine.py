@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app import crypto
+from app.crypto import blind_index
+from app.proxy.cache import StatementCache
+from app.proxy.lexer import SlotSource
+from app.proxy.rewriter import BLIND_INDEX, ENCRYPT, ProxyError, RewritePlan
+from app.services.field_registry import FieldRegistry
+from app.services.metrics import proxy_statement_duration
+
+Params = Union[Sequence[Any], Mapping[str, Any], None]
+
+
+@dataclass
+class ProxyResult:
+    statement: str
+    fingerprint: str
+    columns: List[str]
+    rows: List[List[Any]]
+    rowcount: int
+    fields: List[str]
+    cache_hit: bool
+    rewrite_ms: float
+    elapsed_ms: float
+
+
+@dataclass
+class StatementStats:
+    statement: str
+    executions: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    cache_hits: int = 0
+    fields: List[str] = field(default_factory=list)
+
+
+class EncryptionProxy:
+    def __init__(self, bind: Engine, registry: FieldRegistry, cache_size: int = 4096, blocked_tables: Iterable[str] = ()):
+        self.bind = bind
+        self.registry = registry
+        self.cache = StatementCache(registry, cache_size, blocked_tables)
+        self._stats: Dict[str, StatementStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def execute(self, sql: str, params: Params = None) -> ProxyResult:
+        started = time.perf_counter()
+        plan, sources, cache_hit = self.cache.get(sql)
+        values = self._bind_values(plan, sources, params)
+        rewritten = time.perf_counter()
+        try:
+            with self.bind.begin() as conn:
+                result = conn.execute(text(plan.sql), values)
+                columns = list(result.keys()) if result.returns_rows else []
+                rows = [list(row) for row in result.fetchall()] if result.returns_rows else []
+                rowcount = result.rowcount
+        except Exception:
+            self._record(plan, cache_hit, time.perf_counter() - started, failed=True)
+            raise
+        if rows:
+            self._decrypt_rows(plan, columns, rows)
+        elapsed = time.perf_counter() - started
+        self._record(plan, cache_hit, elapsed)
+        return ProxyResult(
+            statement=plan.statement,
+            fingerprint=plan.fingerprint,
+            columns=columns,
+            rows=rows,
+            rowcount=rowcount,
+            fields=[f"{spec.table_name}.{spec.field_name}" for spec in plan.fields],
+            cache_hit=cache_hit,
+            rewrite_ms=round((rewritten - started) * 1000, 3),
+            elapsed_ms=round(elapsed * 1000, 3),
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._stats_lock:
+            items = list(self._stats.items())
+        return [
+            {
+                "fingerprint": key,
+                "statement": stats.statement,
+                "executions": stats.executions,
+                "errors": stats.errors,
+                "cache_hits": stats.cache_hits,
+                "avg_ms": round(stats.total_ms / stats.executions, 3) if stats.executions else 0.0,
+                "max_ms": round(stats.max_ms, 3),
+                "fields": stats.fields,
+            }
+            for key, stats in items
+        ]
+
+    def reset(self) -> None:
+        self.cache.clear()
+        with self._stats_lock:
+            self._stats.clear()
+
+    def _bind_values(self, plan: RewritePlan, sources: List[SlotSource], params: Params) -> Dict[str, Any]:
+        raw = [_slot_value(sources[bind.slot], params) for bind in plan.binds]
+        values = list(raw)
+        # One batched cipher call per (transform, algorithm), e.g. for multi-row INSERT ... VALUES.
+        groups: Dict[Tuple[str, Optional[str]], List[int]] = defaultdict(list)
+        for position, bind in enumerate(plan.binds):
+            if bind.transform and raw[position] is not None and not crypto.is_encrypted(raw[position]):
+                groups[(bind.transform, bind.algorithm)].append(position)
+        for (transform, algorithm), positions in groups.items():
+            plaintexts = [str(raw[position]) for position in positions]
+            if transform == ENCRYPT:
+                transformed = crypto.encrypt_values(algorithm, plaintexts)
+            elif transform == BLIND_INDEX:
+                transformed = blind_index.blind_indexes(plaintexts)
+            else:
+                raise ProxyError(f"Unknown transform {transform}")
+            for position, value in zip(positions, transformed):
+                values[position] = value
+        return {f"p{position}": value for position, value in enumerate(values)}
+
+    def _decrypt_rows(self, plan: RewritePlan, columns: List[str], rows: List[List[Any]]) -> None:
+        for position, spec in plan.result_fields(columns).items():
+            if not spec.allow_plain_text_read or not crypto.get_cipher(spec.algorithm_type).reversible:
+                continue
+            indexes = [index for index, row in enumerate(rows) if crypto.is_encrypted(row[position])]
+            if not indexes:
+                continue
+            plaintexts = crypto.decrypt_values([rows[index][position] for index in indexes])
+            for index, plaintext in zip(indexes, plaintexts):
+                rows[index][position] = plaintext
+
+    def _record(self, plan: RewritePlan, cache_hit: bool, seconds: float, failed: bool = False) -> None:
+        proxy_statement_duration.observe(seconds, statement=plan.statement)
+        milliseconds = seconds * 1000
+        with self._stats_lock:
+            stats = self._stats.get(plan.fingerprint)
+            if stats is None:
+                if len(self._stats) >= self.cache.max_statements:
+                    self._stats.pop(next(iter(self._stats)))
+                stats = self._stats[plan.fingerprint] = StatementStats(
+                    statement=plan.statement,
+                    fields=[f"{spec.table_name}.{spec.field_name}" for spec in plan.fields],
+                )
+            stats.executions += 1
+            stats.errors += int(failed)
+            stats.cache_hits += int(cache_hit)
+            stats.total_ms += milliseconds
+            stats.max_ms = max(stats.max_ms, milliseconds)
+
+
+def _slot_value(source: SlotSource, params: Params) -> Any:
+    kind, key = source
+    if kind == "literal":
+        return key
+    try:
+        if isinstance(key, int):
+            if isinstance(params, Mapping):
+                raise ProxyError("Positional placeholders need a list of parameters")
+            return params[key]
+        if not isinstance(params, Mapping):
+            raise ProxyError(f"Named placeholder :{key} needs a mapping of parameters")
+        return params[key]
+    except (IndexError, KeyError, TypeError):
+        raise ProxyError(f"Missing parameter {key!r}")
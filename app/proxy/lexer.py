@@ -0,0 +1,92 @@
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, List, Tuple
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:[^']|'')*')
+    |(?P<qident>"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+    |(?P<number>\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+    |(?P<param>\?|:[A-Za-z_]\w*|%s|%\([A-Za-z_]\w*\)s)
+    |(?P<ident>[A-Za-z_][\w$]*)
+    |(?P<op><>|!=|<=|>=|\|\||::|[=<>+\-*/%,.;()])
+    """,
+    re.S | re.X,
+)
+
+# Numbers after these keywords are row counts, not data, and stay inline (TOP 10 cannot be a bind on every backend).
+_INLINE_NUMBER_AFTER = {"LIMIT", "OFFSET", "TOP", "FIRST", "NEXT"}
+
+
+class SQLSyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str  # ident, qident, op, number, slot
+    text: str
+    slot: int = -1
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper() if self.kind == "ident" else self.text
+
+    @property
+    def name(self) -> str:
+        if self.kind == "qident":
+            return self.text[1:-1].replace('""', '"')
+        return self.text
+
+
+# Where each slot's value comes from at execution time: ("param", index or name) or ("literal", value).
+SlotSource = Tuple[str, Any]
+
+
+def tokenize(sql: str) -> Tuple[List[Token], List[SlotSource]]:
+    tokens: List[Token] = []
+    sources: List[SlotSource] = []
+    position = 0
+    positional = 0
+    while position < len(sql):
+        match = _TOKEN_RE.match(sql, position)
+        if not match:
+            raise SQLSyntaxError(f"Unexpected character {sql[position]!r} at offset {position}")
+        position = match.end()
+        kind, text = match.lastgroup, match.group()
+        if kind in ("ws", "comment"):
+            continue
+        if kind == "string":
+            sources.append(("literal", text[1:-1].replace("''", "'")))
+            tokens.append(Token("slot", "?", len(sources) - 1))
+        elif kind == "number":
+            if tokens and tokens[-1].upper in _INLINE_NUMBER_AFTER:
+                tokens.append(Token("number", text))
+                continue
+            value: Any = int(text) if text.isdigit() else Decimal(text)
+            sources.append(("literal", value))
+            tokens.append(Token("slot", "?", len(sources) - 1))
+        elif kind == "param":
+            if text in ("?", "%s"):
+                sources.append(("param", positional))
+                positional += 1
+            elif text.startswith("%("):
+                sources.append(("param", text[2:-2]))
+            else:
+                sources.append(("param", text[1:]))
+            tokens.append(Token("slot", "?", len(sources) - 1))
+        else:
+            tokens.append(Token(kind, text))
+    while tokens and tokens[-1].kind == "op" and tokens[-1].text == ";":
+        tokens.pop()
+    # A second statement would only be parameterised, never rewritten, and some drivers run it anyway.
+    if any(token.kind == "op" and token.text == ";" for token in tokens):
+        raise SQLSyntaxError("Only one statement can be proxied at a time")
+    return tokens, sources
+
+
+def fingerprint(tokens: List[Token]) -> str:
+    return " ".join(token.text.lower() if token.kind == "ident" else token.text for token in tokens)
@@ -0,0 +1,457 @@
+from dataclasses import dataclass, field
+from typing import AbstractSet, Dict, List, Optional, Sequence, Tuple
+
+from app.crypto import get_cipher
+from app.proxy.lexer import Token
+from app.services.field_registry import FieldRegistry, FieldSpec
+
+ENCRYPT = "encrypt"
+BLIND_INDEX = "blind_index"
+
+KEYWORDS = {
+    "ALL", "AND", "AS", "ASC", "BETWEEN", "BY", "CASE", "CROSS", "DELETE", "DESC", "DISTINCT", "ELSE", "END",
+    "EXCEPT", "EXISTS", "FETCH", "FIRST", "FOR", "FROM", "FULL", "GROUP", "HAVING", "IN", "INNER", "INSERT",
+    "INTERSECT", "INTO", "IS", "JOIN", "LEFT", "LIKE", "LIMIT", "NEXT", "NOT", "NULL", "OFFSET", "ON", "ONLY",
+    "OR", "ORDER", "OUTER", "RETURNING", "RIGHT", "ROWS", "SELECT", "SET", "THEN", "TOP", "UNION", "UPDATE",
+    "USING", "VALUES", "WHEN", "WHERE", "WINDOW",
+}
+_JOIN_WORDS = {"JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "OUTER"}
+_SELECT_TAIL = ("WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "FETCH", "UNION", "INTERSECT", "EXCEPT", "FOR", "WINDOW")
+_WHERE_TAIL = ("GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "FETCH", "UNION", "INTERSECT", "EXCEPT", "FOR", "RETURNING")
+
+
+class ProxyError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Bind:
+    slot: int
+    transform: Optional[str] = None
+    algorithm: Optional[str] = None
+
+
+@dataclass
+class RewritePlan:
+    statement: str
+    sql: str
+    fingerprint: str
+    binds: List[Bind]
+    fields: List[FieldSpec]
+    registry_version: int
+    output_fields: Dict[str, FieldSpec] = field(default_factory=dict)
+    star_fields: Dict[str, FieldSpec] = field(default_factory=dict)
+
+    def result_fields(self, columns: Sequence[str]) -> Dict[int, FieldSpec]:
+        resolved = {}
+        for position, column in enumerate(columns):
+            spec = self.output_fields.get(column.lower()) or self.star_fields.get(column.lower())
+            if spec is not None:
+                resolved[position] = spec
+        return resolved
+
+
+def build_plan(
+    tokens: Sequence[Token], registry: FieldRegistry, fingerprint: str, blocked_tables: AbstractSet[str] = frozenset()
+) -> RewritePlan:
+    version = registry.version
+    rewriter = _Rewriter(tokens, registry)
+    statement = tokens[0].upper if tokens else ""
+    handler = {
+        "SELECT": rewriter.select,
+        "INSERT": rewriter.insert,
+        "UPDATE": rewriter.update,
+        "DELETE": rewriter.delete,
+    }.get(statement)
+    if handler is None:
+        raise ProxyError("Only SELECT, INSERT, UPDATE and DELETE statements can be proxied")
+    # Any identifier naming a blocked table counts, so subqueries, joins and schema-qualified names are caught too.
+    for token in tokens:
+        if token.kind in ("ident", "qident") and token.name.lower() in blocked_tables:
+            raise ProxyError(f"Table {token.name} cannot be accessed through the proxy")
+    handler()
+    return RewritePlan(
+        statement=statement,
+        sql=render(rewriter.tokens),
+        fingerprint=fingerprint,
+        binds=rewriter.binds,
+        fields=list(rewriter.fields.values()),
+        registry_version=version,
+        output_fields=rewriter.output_fields,
+        star_fields=rewriter.star_fields,
+    )
+
+
+def render(tokens: Sequence[Token]) -> str:
+    parts: List[str] = []
+    previous = ""
+    for token in tokens:
+        text = f":p{token.slot}" if token.kind == "slot" else token.text
+        if parts and (previous in (".", "(") or (token.kind == "op" and token.text in (".", ",", ")"))):
+            parts[-1] += text
+        else:
+            parts.append(text)
+        previous = text
+    return " ".join(parts)
+
+
+class _Rewriter:
+    def __init__(self, tokens: Sequence[Token], registry: FieldRegistry):
+        self.tokens: List[Token] = list(tokens)
+        self.registry = registry
+        # The lexer numbers slots in order of appearance, so slot i starts out as bind i.
+        self.binds: List[Bind] = [Bind(token.slot) for token in self.tokens if token.kind == "slot"]
+        self.scope: Dict[str, str] = {}
+        self.tables: List[str] = []
+        self.fields: Dict[Tuple[str, str], FieldSpec] = {}
+        self.output_fields: Dict[str, FieldSpec] = {}
+        self.star_fields: Dict[str, FieldSpec] = {}
+        self._insertions: List[Tuple[int, List[Token]]] = []
+
+    # -- statements -------------------------------------------------------
+
+    def select(self) -> None:
+        end = len(self.tokens)
+        from_index = self._find(1, end, "FROM")
+        if from_index == end:
+            return
+        tail = self._find(from_index + 1, end, *_SELECT_TAIL)
+        self._from_clause(from_index + 1, tail)
+        self._select_list(1, from_index)
+        if tail < end and self.tokens[tail].upper == "WHERE":
+            self._predicates(tail + 1, self._find(tail + 1, end, *_WHERE_TAIL))
+
+    def insert(self) -> None:
+        end = len(self.tokens)
+        index = 1
+        if index < end and self.tokens[index].upper == "INTO":
+            index += 1
+        table, index = self._table_name(index)
+        self._add_table(table, table)
+        sensitive = self.registry.fields_for_table(table)
+        columns: Optional[List[str]] = None
+        if index < end and self.tokens[index].text == "(":
+            close = self._close(index)
+            columns = [self.tokens[start].name.lower() for start, _ in self._split(index + 1, close)]
+            column_close = close
+            index = close + 1
+        if not sensitive:
+            return
+        if columns is None:
+            raise ProxyError(f"INSERT into {table} needs an explicit column list because it has encrypted columns")
+        if index >= end or self.tokens[index].upper != "VALUES":
+            raise ProxyError(f"INSERT into {table} must use VALUES because it has encrypted columns")
+        targets = [(position, sensitive[name]) for position, name in enumerate(columns) if name in sensitive]
+        extra_columns = [
+            spec for _, spec in targets if spec.blind_index_column and spec.blind_index_column.lower() not in columns
+        ]
+        for _, spec in targets:
+            self._use(spec)
+        index += 1
+        while index < end and self.tokens[index].text == "(":
+            close = self._close(index)
+            items = self._split(index + 1, close)
+            if len(items) != len(columns):
+                raise ProxyError(f"INSERT into {table} has {len(columns)} columns but {len(items)} values")
+            appended: List[Token] = []
+            for position, spec in targets:
+                value = self._single_value(items[position], spec)
+                if value is not None:
+                    self._encrypt(value, spec)
+                if spec in extra_columns:
+                    appended += [Token("op", ","), self._blind_index_token(value)]
+            if appended:
+                self._insertions.append((close, appended))
+            index = close + 1
+            if index < end and self.tokens[index].text == ",":
+                index += 1
+            else:
+                break
+        if extra_columns:
+            added: List[Token] = []
+            for spec in extra_columns:
+                added += [Token("op", ","), Token("ident", spec.blind_index_column)]
+            self._insertions.append((column_close, added))
+        self._apply_insertions()
+
+    def update(self) -> None:
+        end = len(self.tokens)
+        table, index = self._table_name(1)
+        alias, index = self._alias(index)
+        self._add_table(table, alias or table)
+        if index >= end or self.tokens[index].upper != "SET":
+            raise ProxyError("UPDATE statement is missing SET")
+        set_end = self._find(index + 1, end, "WHERE", "FROM", "RETURNING")
+        for start, stop in self._split(index + 1, set_end):
+            qualifier, column, after = self._column_ref(start, stop)
+            if column is None or after >= stop or self.tokens[after].text != "=":
+                continue
+            spec = self._resolve(qualifier, column)
+            if spec is None:
+                continue
+            self._use(spec)
+            value = self._single_value((after + 1, stop), spec)
+            if value is not None:
+                self._encrypt(value, spec)
+            if spec.blind_index_column:
+                self._insertions.append(
+                    (stop, [Token("op", ","), Token("ident", spec.blind_index_column), Token("op", "="), self._blind_index_token(value)])
+                )
+        where = self._find(set_end, end, "WHERE")
+        if where < end:
+            self._predicates(where + 1, self._find(where + 1, end, *_WHERE_TAIL))
+        self._apply_insertions()
+
+    def delete(self) -> None:
+        end = len(self.tokens)
+        index = 1
+        if index < end and self.tokens[index].upper == "FROM":
+            index += 1
+        table, index = self._table_name(index)
+        alias, index = self._alias(index)
+        self._add_table(table, alias or table)
+        where = self._find(index, end, "WHERE")
+        if where < end:
+            self._predicates(where + 1, self._find(where + 1, end, *_WHERE_TAIL))
+
+    # -- clauses ----------------------------------------------------------
+
+    def _from_clause(self, start: int, end: int) -> None:
+        expect_table = True
+        conditions: List[Tuple[int, int]] = []
+        condition_start: Optional[int] = None
+        index = start
+        while index < end:
+            token = self.tokens[index]
+            if expect_table:
+                if token.text == "(":
+                    index = self._close(index) + 1
+                    _, index = self._alias(index)
+                else:
+                    table, index = self._table_name(index)
+                    alias, index = self._alias(index)
+                    self._add_table(table, alias or table)
+                expect_table = False
+                continue
+            if token.text == "(":
+                index = self._close(index) + 1
+                continue
+            if token.text == "," or token.upper in _JOIN_WORDS:
+                if condition_start is not None:
+                    conditions.append((condition_start, index))
+                    condition_start = None
+                expect_table = token.text == "," or token.upper == "JOIN"
+            elif token.upper == "ON":
+                condition_start = index + 1
+            index += 1
+        if condition_start is not None:
+            conditions.append((condition_start, end))
+        for condition in conditions:
+            self._predicates(*condition)
+
+    def _select_list(self, start: int, end: int) -> None:
+        while start < end and self.tokens[start].upper in ("DISTINCT", "ALL"):
+            start += 1
+        for item_start, item_end in self._split(start, end):
+            texts = [token.text for token in self.tokens[item_start:item_end]]
+            if texts == ["*"]:
+                for table in self.tables:
+                    self._star(table)
+                continue
+            if len(texts) == 3 and texts[1:] == [".", "*"]:
+                table = self.scope.get(self.tokens[item_start].name.lower())
+                if table:
+                    self._star(table)
+                continue
+            qualifier, column, after = self._column_ref(item_start, item_end)
+            if column is None:
+                continue
+            label = column
+            if after < item_end and self.tokens[after].upper == "AS":
+                after += 1
+            if after == item_end - 1 and self.tokens[after].kind in ("ident", "qident"):
+                label = self.tokens[after].name
+            elif after != item_end:
+                continue
+            spec = self._resolve(qualifier, column)
+            if spec is not None:
+                self._use(spec)
+                self.output_fields[label.lower()] = spec
+
+    def _predicates(self, start: int, end: int) -> None:
+        index = start
+        while index < end:
+            qualifier, column, after = self._column_ref(index, end)
+            if column is None:
+                index += 1
+                continue
+            spec = self._resolve(qualifier, column)
+            if spec is not None:
+                self._use(spec)
+                self._comparison(index, after - 1, after, end, spec)
+            index = after
+
+    def _comparison(self, ref_start: int, column_index: int, after: int, end: int, spec: FieldSpec) -> None:
+        tokens = self.tokens
+        values: List[int] = []
+        if after < end and tokens[after].upper == "IS":
+            return
+        if after + 1 < end and tokens[after].text in ("=", "<>", "!="):
+            if tokens[after + 1].kind in ("ident", "qident"):
+                return  # column-to-column comparison, both sides hold ciphertext
+            if tokens[after + 1].kind == "slot" and self._value_ends(after + 2, end):
+                values = [after + 1]
+        elif after < end and tokens[after].upper in ("IN", "NOT"):
+            open_index = after + 1 if tokens[after].upper == "IN" else after + 2
+            if open_index < end and tokens[open_index].text == "(":
+                items = self._split(open_index + 1, self._close(open_index))
+                if all(stop - item == 1 and tokens[item].kind == "slot" for item, stop in items):
+                    values = [item for item, _ in items]
+        elif ref_start >= 2 and tokens[ref_start - 1].text in ("=", "<>", "!=") and tokens[ref_start - 2].kind == "slot":
+            values = [ref_start - 2]
+        if not values:
+            raise ProxyError(f"Only equality and IN comparisons are supported on encrypted column {_label(spec)}")
+        if spec.blind_index_column:
+            self.tokens[column_index] = Token("ident", spec.blind_index_column)
+            for value in values:
+                self._transform(value, BLIND_INDEX)
+        elif get_cipher(spec.algorithm_type).deterministic:
+            for value in values:
+                self._encrypt(value, spec)
+        else:
+            raise ProxyError(f"Encrypted column {_label(spec)} needs a blind index to be used in a filter")
+
+    # -- helpers ----------------------------------------------------------
+
+    def _value_ends(self, index: int, end: int) -> bool:
+        return index >= end or self.tokens[index].upper in ("AND", "OR", "THEN") or self.tokens[index].text == ")"
+
+    def _use(self, spec: FieldSpec) -> None:
+        self.fields[(spec.table_name.lower(), spec.field_name.lower())] = spec
+
+    def _encrypt(self, index: int, spec: FieldSpec) -> None:
+        self._transform(index, ENCRYPT, spec.algorithm_type)
+
+    def _transform(self, index: int, transform: str, algorithm: Optional[str] = None) -> None:
+        bind = self.tokens[index].slot
+        self.binds[bind] = Bind(self.binds[bind].slot, transform, algorithm)
+
+    def _blind_index_token(self, value: Optional[int]) -> Token:
+        if value is None:
+            return Token("ident", "NULL")
+        self.binds.append(Bind(self.binds[self.tokens[value].slot].slot, BLIND_INDEX))
+        return Token("slot", "?", len(self.binds) - 1)
+
+    def _single_value(self, item: Tuple[int, int], spec: FieldSpec) -> Optional[int]:
+        start, stop = item
+        if stop - start == 1:
+            token = self.tokens[start]
+            if token.kind == "slot":
+                return start
+            if token.upper == "NULL":
+                return None
+        raise ProxyError(f"Encrypted column {_label(spec)} can only be assigned a parameter, literal or NULL")
+
+    def _add_table(self, table: str, alias: str) -> None:
+        self.tables.append(table)
+        self.scope[alias.lower()] = table
+        self.scope.setdefault(table, table)
+
+    def _star(self, table: str) -> None:
+        for name, spec in self.registry.fields_for_table(table).items():
+            self.star_fields.setdefault(name, spec)
+            self._use(spec)
+
+    def _resolve(self, qualifier: Optional[str], column: str) -> Optional[FieldSpec]:
+        if qualifier is not None:
+            table = self.scope.get(qualifier.lower())
+            return self.registry.lookup(table, column) if table else None
+        matches = {id(spec): spec for spec in (self.registry.lookup(table, column) for table in self.tables) if spec}
+        if len(matches) > 1:
+            raise ProxyError(f"Encrypted column {column} is ambiguous; qualify it with a table name")
+        return next(iter(matches.values()), None)
+
+    def _table_name(self, index: int) -> Tuple[str, int]:
+        end = len(self.tokens)
+        if index >= end or self.tokens[index].kind not in ("ident", "qident"):
+            raise ProxyError("Expected a table name")
+        name = self.tokens[index].name
+        index += 1
+        while index + 1 < end and self.tokens[index].text == "." and self.tokens[index + 1].kind in ("ident", "qident"):
+            name = self.tokens[index + 1].name
+            index += 2
+        return name.lower(), index
+
+    def _alias(self, index: int) -> Tuple[Optional[str], int]:
+        end = len(self.tokens)
+        if index < end and self.tokens[index].upper == "AS":
+            index += 1
+        if index < end and self._is_name(self.tokens[index]):
+            return self.tokens[index].name, index + 1
+        return None, index
+
+    def _column_ref(self, index: int, end: int) -> Tuple[Optional[str], Optional[str], int]:
+        tokens = self.tokens
+        if not self._is_name(tokens[index]) or (index > 0 and tokens[index - 1].text == "."):
+            return None, None, index + 1
+        if index + 1 < end and tokens[index + 1].text == "(":
+            return None, None, index + 1
+        if index + 2 < end and tokens[index + 1].text == "." and self._is_name(tokens[index + 2]):
+            if index + 3 < end and tokens[index + 3].text in (".", "("):
+                return None, None, index + 3
+            return tokens[index].name, tokens[index + 2].name, index + 3
+        return None, tokens[index].name, index + 1
+
+    @staticmethod
+    def _is_name(token: Token) -> bool:
+        return token.kind == "qident" or (token.kind == "ident" and token.upper not in KEYWORDS)
+
+    def _find(self, start: int, end: int, *keywords: str) -> int:
+        depth = 0
+        for index in range(start, end):
+            token = self.tokens[index]
+            if token.text == "(":
+                depth += 1
+            elif token.text == ")":
+                depth -= 1
+            elif depth == 0 and token.kind == "ident" and token.upper in keywords:
+                return index
+        return end
+
+    def _close(self, open_index: int) -> int:
+        depth = 0
+        for index in range(open_index, len(self.tokens)):
+            if self.tokens[index].text == "(":
+                depth += 1
+            elif self.tokens[index].text == ")":
+                depth -= 1
+                if depth == 0:
+                    return index
+        raise ProxyError("Unbalanced parentheses")
+
+    def _split(self, start: int, end: int) -> List[Tuple[int, int]]:
+        items: List[Tuple[int, int]] = []
+        depth = 0
+        item_start = start
+        for index in range(start, end):
+            text = self.tokens[index].text
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+            elif text == "," and depth == 0:
+                items.append((item_start, index))
+                item_start = index + 1
+        if item_start < end:
+            items.append((item_start, end))
+        return items
+
+    def _apply_insertions(self) -> None:
+        # Right to left so earlier positions stay valid.
+        for position, tokens in sorted(self._insertions, key=lambda item: item[0], reverse=True):
+            self.tokens[position:position] = tokens
+        self._insertions = []
+
+
+def _label(spec: FieldSpec) -> str:
+    return f"{spec.table_name}.{spec.field_name}"
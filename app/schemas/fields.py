@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -11,6 +11,8 @@ class SensitiveFieldBase(BaseModel):
     algorithm_type: str
     status: str = "未加密"
     allow_plain_text_read: bool = False
+    blind_index_enabled: bool = False
+    blind_index_column: Optional[str]
     remarks: Optional[str]
     is_enabled: bool = True
 
@@ -25,6 +27,8 @@ class SensitiveFieldUpdate(BaseModel):
     algorithm_type: Optional[str]
     status: Optional[str]
     allow_plain_text_read: Optional[bool]
+    blind_index_enabled: Optional[bool]
+    blind_index_column: Optional[str]
     remarks: Optional[str]
     is_enabled: Optional[bool]
 
@@ -36,3 +40,30 @@ class SensitiveFieldOut(SensitiveFieldBase):
 
     class Config:
         orm_mode = True
+
+
+class BlindIndexLookup(BaseModel):
+    value: str
+    limit: int = Field(default=100, ge=1, le=1000)
+
+
+class BlindIndexLookupResult(BaseModel):
+    table_name: str
+    field_name: str
+    blind_index_column: str
+    primary_key: str
+    matches: List[Any]
+
+
+class FieldImportError(BaseModel):
+    row: int
+    field_id: Optional[str]
+    message: str
+
+
+class FieldImportResult(BaseModel):
+    total: int
+    created: int
+    updated: int
+    failed: int
+    errors: List[FieldImportError]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -20,7 +20,6 @@ class AuditLogBase(BaseModel):
     details: Dict[str, Any] = Field(default_factory=dict)
 
 
-
 class AuditLogCreate(AuditLogBase):
     pass
 
@@ -31,3 +30,16 @@ class AuditLogOut(AuditLogBase):
 
     class Config:
         orm_mode = True
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogOut]
+    next_cursor: Optional[str]
+
+
+class AuditLogBatch(BaseModel):
+    events: List[AuditLogCreate] = Field(..., min_items=1, max_items=5000)
+
+
+class AuditLogBatchResult(BaseModel):
+    accepted: int
@@ -1,9 +1,9 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator
 
-from app.db.models import MigrationTaskStatus
+from app.db.models import MigrationExecutionMode, MigrationTaskStatus
 
 
 class MigrationTaskBase(BaseModel):
@@ -13,10 +13,26 @@ class MigrationTaskBase(BaseModel):
     batch_size: int = Field(default=1000, ge=1)
     concurrency: int = Field(default=1, ge=1)
     overwrite_plaintext: bool = False
+    execution_mode: Optional[MigrationExecutionMode]
+    adaptive: bool = True
+    priority: int = 0
 
 
 class MigrationTaskCreate(MigrationTaskBase):
-    pass
+    field_name: Optional[str]
+    # Columns of table_name encrypted together in one pass; field_name becomes the first of them.
+    field_names: Optional[List[str]] = Field(default=None, min_items=1)
+
+    @root_validator(skip_on_failure=True)
+    def _check_columns(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        field_names = values.get("field_names")
+        if field_names:
+            if len(set(field_names)) != len(field_names):
+                raise ValueError("field_names must not repeat a column")
+            values["field_name"] = field_names[0]
+        elif not values.get("field_name"):
+            raise ValueError("field_name or field_names is required")
+        return values
 
 
 class MigrationTaskUpdate(BaseModel):
@@ -29,14 +45,56 @@ class MigrationTaskUpdate(BaseModel):
 
 class MigrationTaskOut(MigrationTaskBase):
     id: int
+    field_names: Optional[List[str]]
     status: MigrationTaskStatus
     progress: int
+    total_rows: Optional[int]
+    processed_count: Optional[int]
+    effective_batch_size: Optional[int]
+    effective_concurrency: Optional[int]
+    avg_batch_latency_ms: Optional[float]
     started_at: Optional[datetime]
     finished_at: Optional[datetime]
+    heartbeat_at: Optional[datetime]
     success_count: int
     failure_count: int
+    column_counts: Optional[Dict[str, Dict[str, int]]]
     failure_reason: Optional[str]
+    checkpoint: Optional[Dict[str, Any]]
     operator_id: Optional[int]
 
     class Config:
         orm_mode = True
+
+
+class MigrationPlanRequest(BaseModel):
+    table_names: Optional[List[str]]
+    task_prefix: Optional[str] = Field(default=None, min_length=1, max_length=40)
+    overwrite_plaintext: bool = False
+    execution_mode: Optional[MigrationExecutionMode]
+    adaptive: bool = True
+    priority: int = 0
+    dry_run: bool = False
+
+
+class PlannedMigrationTask(BaseModel):
+    task_id: str
+    table_name: str
+    field_names: List[str]
+    estimated_rows: int
+    estimated_bytes: Optional[int]
+    estimate_source: str
+    batch_size: int
+    concurrency: int
+
+
+class SkippedPlanField(BaseModel):
+    table_name: str
+    field_name: str
+    reason: str
+
+
+class MigrationPlanOut(BaseModel):
+    dry_run: bool
+    tasks: List[PlannedMigrationTask]
+    skipped: List[SkippedPlanField]
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import List
+from datetime import date, datetime
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -9,6 +9,7 @@ class ServiceStatus(BaseModel):
     uptime_seconds: int
     current_threads: int
     current_tasks: int
+    queued_tasks: int = 0
     total_encryptions: int
     total_decryptions: int
     total_errors: int
@@ -27,6 +28,14 @@ class SystemLoad(BaseModel):
     memory_percent: float
     disk_io: float
     db_connections: int
+    sampled_at: Optional[datetime]
+    rss_mb: Optional[float]
+    disk_read_kbps: Optional[float]
+    disk_write_kbps: Optional[float]
+    target_db_connections: Optional[int]
+    pool_size: Optional[int]
+    pool_overflow: Optional[int]
+    migration_threads: Optional[int]
 
 
 class RecentError(BaseModel):
@@ -40,3 +49,11 @@ class MonitorSnapshot(BaseModel):
     key: KeyStatus
     load: SystemLoad
     recent_errors: List[RecentError]
+
+
+class DailyOperationStat(BaseModel):
+    day: date
+    encryptions: int
+    decryptions: int
+    errors: int
+    total: int
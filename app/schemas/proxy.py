@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+
+class ProxyStatement(BaseModel):
+    sql: str = Field(..., min_length=1)
+    params: Optional[Union[List[Any], Dict[str, Any]]]
+
+
+class ProxyStatementResult(BaseModel):
+    statement: str
+    fingerprint: str
+    columns: List[str]
+    rows: List[List[Any]]
+    rowcount: int
+    fields: List[str]
+    cache_hit: bool
+    rewrite_ms: float
+    elapsed_ms: float
+
+
+class ProxyStatementStats(BaseModel):
+    fingerprint: str
+    statement: str
+    executions: int
+    errors: int
+    cache_hits: int
+    avg_ms: float
+    max_ms: float
+    fields: List[str]
+
+
+class ProxyCacheStats(BaseModel):
+    size: int
+    hits: int
+    misses: int
+    registry_version: int
+    statements: List[ProxyStatementStats]
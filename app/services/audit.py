@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import engine
+from app.services import metrics, rollups
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_SPILL = "spill"
+OVERFLOW_POLICIES = {OVERFLOW_BLOCK, OVERFLOW_SPILL}
+
+AUDIT_COLUMNS = {column.name for column in models.AuditLog.__table__.columns} - {"id"}
+
+_STOP = object()
+
+
+class AuditSink:
+    def __init__(
+        self,
+        bind: Engine = engine,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_ms: float = 200,
+        overflow: str = OVERFLOW_BLOCK,
+        spill_path: str = "audit_spill.jsonl",
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy '{overflow}'")
+        self.bind = bind
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = max(0.001, flush_ms / 1000)
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.written = 0
+        self.spilled = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._spill_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, log_type: models.AuditLogType, **fields: Any) -> None:
+        self.submit_many([{"log_type": log_type, **fields}])
+
+    def submit_many(self, events: Iterable[Dict[str, Any]]) -> int:
+        rows = [_row(event) for event in events]
+        if not self.running:
+            self._write(rows)
+            return len(rows)
+        overflow: List[Dict[str, Any]] = []
+        for row in rows:
+            if self.overflow == OVERFLOW_BLOCK:
+                self._queue.put(row)
+                continue
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                overflow.append(row)
+        if overflow:
+            self._spill(overflow)
+        return len(rows)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        # Events submitted while the writer was shutting down.
+        leftovers = []
+        while True:
+            try:
+                leftovers.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        self._write([row for row in leftovers if row is not _STOP])
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def replay_spill(self) -> int:
+        # A leftover .replay file means an earlier replay was interrupted; finish it first.
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path) and not os.path.exists(replay_path):
+                os.replace(self.spill_path, replay_path)
+        if not os.path.exists(replay_path):
+            return 0
+        replayed = 0
+        with open(replay_path, encoding="utf-8") as handle:
+            batch: List[Dict[str, Any]] = []
+            for line in handle:
+                if line.strip():
+                    batch.append(_from_json(json.loads(line)))
+                if len(batch) >= self.batch_size:
+                    replayed += self._write(batch)
+                    batch = []
+            if batch:
+                replayed += self._write(batch)
+        os.remove(replay_path)
+        return replayed
+
+    def _run(self) -> None:
+        try:
+            self.replay_spill()
+        except Exception:
+            logger.exception("Replaying spilled audit events failed")
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            # Group commit: the first event opens a window that closes after batch_size events
+            # or flush_ms, whichever comes first; the whole window is one INSERT.
+            batch = [item]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        try:
+            with self.bind.begin() as conn:
+                conn.execute(models.AuditLog.__table__.insert(), rows)
+                rollups.record_rows(conn, rows)
+        except SQLAlchemyError:
+            # The database being down must not lose audit events or stall encryption; keep them on disk.
+            logger.exception("Writing %d audit events failed, spilling to %s", len(rows), self.spill_path)
+            self._spill(rows)
+            return 0
+        self.written += len(rows)
+        return len(rows)
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(_to_json(row), ensure_ascii=False) + "\n" for row in rows)
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as handle:
+                handle.write(lines)
+        self.spilled += len(rows)
+
+
+def _row(event: Dict[str, Any]) -> Dict[str, Any]:
+    row = {key: event.get(key) for key in AUDIT_COLUMNS}
+    # Stamp at submission so queueing delay never reorders the audit trail.
+    row["created_at"] = row["created_at"] or datetime.utcnow()
+    row["log_type"] = models.AuditLogType(row["log_type"])
+    row["details"] = row["details"] or {}
+    return row
+
+
+def _to_json(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {**row, "created_at": row["created_at"].isoformat(), "log_type": row["log_type"].value}
+
+
+def _from_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    return _row({**data, "created_at": datetime.fromisoformat(data["created_at"])})
+
+
+def _build_sink() -> AuditSink:
+    settings = get_settings()
+    return AuditSink(
+        max_queue=settings.audit_queue_size,
+        batch_size=settings.audit_batch_size,
+        flush_ms=settings.audit_flush_ms,
+        overflow=settings.audit_overflow,
+        spill_path=settings.audit_spill_path,
+    )
+
+
+audit_sink = _build_sink()
+
+metrics.registry.gauge(
+    "gmdb_audit_queue_depth", "Audit events waiting for the background writer.", sampler=lambda: [((), audit_sink.pending)]
+)
+metrics.registry.counter(
+    "gmdb_audit_events_written_total", "Audit events committed by the writer.", sampler=lambda: [((), audit_sink.written)]
+)
+metrics.registry.counter(
+    "gmdb_audit_events_spilled_total", "Audit events spilled to the local file.", sampler=lambda: [((), audit_sink.spilled)]
+)
@@ -0,0 +1,86 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.versioning import read_version
+
+CONFIG_CACHE = "system_configurations"
+
+T = TypeVar("T")
+_MISSING = object()
+_INVALID = object()
+
+
+def parse_bool(value: str) -> bool:
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+class ConfigCache:
+    # Every key is loaded in one query; the version poller reloads it when another worker writes,
+    # and the TTL bounds staleness for rows changed without a version bump (seeding, manual SQL).
+    def __init__(self, session_factory=SessionLocal, ttl: Optional[float] = None):
+        self.session_factory = session_factory
+        self.ttl = ttl if ttl is not None else get_settings().config_cache_ttl_seconds
+        self._values: Dict[str, str] = {}
+        self._parsed: Dict[Tuple[str, Callable], Any] = {}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        self._ensure_fresh()
+        return self._values.get(key, default)
+
+    def typed(self, key: str, parse: Callable[[str], T], default: T) -> T:
+        # Only parsed values are memoised: callers may pass different defaults for the same key.
+        self._ensure_fresh()
+        cached = self._parsed.get((key, parse), _MISSING)
+        if cached is _MISSING:
+            raw = self._values.get(key)
+            if raw is None:
+                return default
+            try:
+                cached = parse(raw)
+            except ValueError:
+                cached = _INVALID
+            self._parsed[(key, parse)] = cached
+        return default if cached is _INVALID else cached
+
+    def get_int(self, key: str, default: int) -> int:
+        return self.typed(key, int, default)
+
+    def get_float(self, key: str, default: float) -> float:
+        return self.typed(key, float, default)
+
+    def get_bool(self, key: str, default: bool) -> bool:
+        return self.typed(key, parse_bool, default)
+
+    def get_datetime(self, key: str, default: Optional[datetime] = None) -> Optional[datetime]:
+        return self.typed(key, datetime.fromisoformat, default)
+
+    def load(self, db: Session, version: Optional[int] = None) -> None:
+        values = dict(db.query(models.SystemConfiguration.key, models.SystemConfiguration.value))
+        with self._lock:
+            # Swap both dicts at once so lock-free readers never mix old and new values.
+            self._values, self._parsed = values, {}
+            self._expires_at = time.monotonic() + self.ttl
+            if version is not None:
+                self.version = version
+
+    def refresh(self, db: Session) -> None:
+        self.load(db, read_version(db, CONFIG_CACHE))
+
+    def _ensure_fresh(self) -> None:
+        if time.monotonic() < self._expires_at:
+            return
+        with self.session_factory() as db:
+            self.refresh(db)
+
+
+config_cache = ConfigCache()
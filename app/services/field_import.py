@@ -0,0 +1,145 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.schemas.fields import SensitiveFieldCreate
+from app.services.field_registry import FIELD_REGISTRY
+from app.services.imports import parse_flag
+from app.services.versioning import bump_version
+
+FIELD_COLUMNS = (
+    "field_id",
+    "table_name",
+    "field_name",
+    "algorithm_type",
+    "status",
+    "allow_plain_text_read",
+    "blind_index_enabled",
+    "blind_index_column",
+    "remarks",
+    "is_enabled",
+)
+REQUIRED_COLUMNS = ("field_id", "table_name", "field_name", "algorithm_type")
+FLAG_COLUMNS = {"allow_plain_text_read", "blind_index_enabled", "is_enabled"}
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+_fields = models.SensitiveField.__table__
+
+
+class FieldImporter:
+    # Rows are validated one at a time and upserted IMPORT_CHUNK_SIZE at a time, each chunk in
+    # its own transaction: one IN lookup, one executemany INSERT and one executemany UPDATE.
+    def __init__(self, session_factory=SessionLocal, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.session_factory = session_factory
+        self.chunk_size = max(1, chunk_size)
+        self.total = self.created = self.updated = self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._columns: Optional[List[str]] = None
+        self._row_number = 0
+        self._pending: List[Tuple[int, Dict[str, Any]]] = []
+        self._seen: Set[str] = set()
+
+    def add(self, values: Sequence[str]) -> bool:
+        # Returns True once a chunk is ready, so async callers can flush off the event loop.
+        self._row_number += 1
+        if not any(value.strip() for value in values):
+            return False
+        if self._columns is None:
+            self._read_header(values)
+            return False
+        self.total += 1
+        raw = {
+            column: value.strip()
+            for column, value in zip(self._columns, values)
+            if column in FIELD_COLUMNS and value.strip()
+        }
+        try:
+            for column in FLAG_COLUMNS & raw.keys():
+                raw[column] = parse_flag(raw[column])
+            field = SensitiveFieldCreate(**raw)
+        except ValueError as exc:
+            self._fail(self._row_number, raw.get("field_id"), _message(exc))
+            return False
+        if field.field_id in self._seen:
+            self._fail(self._row_number, field.field_id, "Duplicate field_id in upload")
+            return False
+        self._seen.add(field.field_id)
+        self._pending.append((self._row_number, field.dict(include=set(self._columns))))
+        return len(self._pending) >= self.chunk_size
+
+    def run(self, rows: Iterable[Sequence[str]]) -> None:
+        for values in rows:
+            if self.add(values):
+                self.flush()
+        self.finish()
+
+    def finish(self) -> None:
+        if self._columns is None:
+            raise ValueError("Upload is empty")
+        self.flush()
+
+    def flush(self) -> None:
+        chunk, self._pending = self._pending, []
+        if not chunk:
+            return
+        columns = [column for column in FIELD_COLUMNS if column in self._columns]
+        with self.session_factory() as db:
+            try:
+                ids = [row["field_id"] for _, row in chunk]
+                existing = set(db.execute(select(_fields.c.field_id).where(_fields.c.field_id.in_(ids))).scalars())
+                inserts = [row for _, row in chunk if row["field_id"] not in existing]
+                updates = [
+                    {"key": row["field_id"], **{f"new_{column}": row[column] for column in columns}}
+                    for _, row in chunk
+                    if row["field_id"] in existing
+                ]
+                if inserts:
+                    db.execute(_fields.insert(), inserts)
+                if updates:
+                    db.execute(
+                        _fields.update()
+                        .where(_fields.c.field_id == bindparam("key"))
+                        .values({column: bindparam(f"new_{column}") for column in columns}),
+                        updates,
+                    )
+                bump_version(db, FIELD_REGISTRY)
+                db.commit()
+            except SQLAlchemyError as exc:
+                db.rollback()
+                for row_number, row in chunk:
+                    self._fail(row_number, row["field_id"], f"Database error: {exc.__class__.__name__}")
+                return
+        self.created += len(inserts)
+        self.updated += len(updates)
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    def _read_header(self, values: Sequence[str]) -> None:
+        columns = [value.strip().lower() for value in values]
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        self._columns = columns
+
+    def _fail(self, row_number: int, field_id: Optional[str], message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "field_id": field_id, "message": message})
+
+
+def _message(exc: ValueError) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+    return str(exc)
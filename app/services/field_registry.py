@@ -0,0 +1,108 @@
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.crypto import blind_index
+from app.db import models
+from app.services.versioning import read_version
+
+FIELD_REGISTRY = "sensitive_fields"
+
+FieldKey = Tuple[str, str]
+# Re-read a little history on every sync so clock skew between workers cannot hide an update.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    field_id: str
+    table_name: str
+    field_name: str
+    algorithm_type: str
+    allow_plain_text_read: bool
+    blind_index_column: Optional[str]
+
+    @classmethod
+    def from_model(cls, field: models.SensitiveField) -> "FieldSpec":
+        return cls(
+            field_id=field.field_id,
+            table_name=field.table_name,
+            field_name=field.field_name,
+            algorithm_type=field.algorithm_type,
+            allow_plain_text_read=bool(field.allow_plain_text_read),
+            blind_index_column=(
+                field.blind_index_column or blind_index.default_column(field.field_name)
+                if field.blind_index_enabled
+                else None
+            ),
+        )
+
+
+def _key(table_name: str, field_name: str) -> FieldKey:
+    return table_name.lower(), field_name.lower()
+
+
+class FieldRegistry:
+    def __init__(self):
+        self._by_key: Dict[FieldKey, FieldSpec] = {}
+        self._by_id: Dict[str, FieldSpec] = {}
+        self._by_table: Dict[str, Dict[str, FieldSpec]] = {}
+        self._synced_until: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def lookup(self, table_name: str, field_name: str) -> Optional[FieldSpec]:
+        return self._by_key.get(_key(table_name, field_name))
+
+    def get(self, field_id: str) -> Optional[FieldSpec]:
+        return self._by_id.get(field_id)
+
+    def fields_for_table(self, table_name: str) -> Dict[str, FieldSpec]:
+        return self._by_table.get(table_name.lower(), {})
+
+    def load(self, db: Session, version: Optional[int] = None) -> None:
+        rows = db.query(models.SensitiveField).all()
+        with self._lock:
+            self._by_key, self._by_id, self._by_table = {}, {}, {}
+            self._synced_until = None
+            self._apply(rows)
+            if version is not None:
+                self.version = version
+
+    def sync(self, db: Session, version: Optional[int] = None) -> None:
+        # Incremental: only rows touched since the newest updated_at already applied.
+        query = db.query(models.SensitiveField)
+        if self._synced_until is not None:
+            query = query.filter(models.SensitiveField.updated_at >= self._synced_until - SYNC_OVERLAP)
+        rows = query.all()
+        with self._lock:
+            self._apply(rows)
+            if version is not None:
+                self.version = version
+
+    def refresh(self, db: Session) -> None:
+        self.sync(db, read_version(db, FIELD_REGISTRY))
+
+    def _apply(self, rows: List[models.SensitiveField]) -> None:
+        # Builds fresh dicts and swaps them in, so lock-free readers never see a half-applied change.
+        by_key, by_id = dict(self._by_key), dict(self._by_id)
+        for row in rows:
+            previous = by_id.pop(row.field_id, None)
+            if previous is not None:
+                by_key.pop(_key(previous.table_name, previous.field_name), None)
+            if row.is_enabled:
+                spec = FieldSpec.from_model(row)
+                by_id[spec.field_id] = spec
+                by_key[_key(spec.table_name, spec.field_name)] = spec
+            if row.updated_at and (self._synced_until is None or row.updated_at > self._synced_until):
+                self._synced_until = row.updated_at
+        by_table: Dict[str, Dict[str, FieldSpec]] = {}
+        for (table_name, field_name), spec in by_key.items():
+            by_table.setdefault(table_name, {})[field_name] = spec
+        self._by_key, self._by_id, self._by_table = by_key, by_id, by_table
+
+
+field_registry = FieldRegistry()
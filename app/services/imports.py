@@ -0,0 +1,122 @@
+import codecs
+import csv
+import re
+import zipfile
+from typing import AsyncIterator, Dict, IO, Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_CELL_REF = re.compile(r"([A-Z]+)")
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    # Lines are only handed to the csv module once a record is complete (an even number of
+    # quotes so far), so quoted values may span lines and chunk boundaries.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    record: List[str] = []
+    quotes = 0
+    async for chunk in chunks:
+        parts = (pending + decoder.decode(chunk)).split("\n")
+        pending = parts.pop()
+        complete: List[str] = []
+        for part in parts:
+            line = part + "\n"
+            record.append(line)
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                complete.append("".join(record))
+                record, quotes = [], 0
+        for row in csv.reader(complete):
+            yield row
+    rest = "".join(record) + pending + decoder.decode(b"", final=True)
+    if rest.strip():
+        for row in csv.reader([rest]):
+            yield row
+
+
+def iter_xlsx_rows(fileobj: IO[bytes]) -> Iterator[List[str]]:
+    # Rows of the first worksheet, parsed element by element; only shared strings are held in memory.
+    with zipfile.ZipFile(fileobj) as archive:
+        shared = _shared_strings(archive)
+        with archive.open(_first_sheet(archive)) as sheet:
+            for _, element in iterparse(sheet, events=("end",)):
+                if element.tag != f"{_MAIN_NS}row":
+                    continue
+                values: Dict[int, str] = {}
+                for position, cell in enumerate(element.iter(f"{_MAIN_NS}c")):
+                    match = _CELL_REF.match(cell.get("r", ""))
+                    column = _column_index(match.group(1)) if match else position
+                    values[column] = _cell_text(cell, shared)
+                element.clear()
+                if values:
+                    yield [values.get(column, "") for column in range(max(values) + 1)]
+                else:
+                    yield []
+
+
+def _first_sheet(archive: zipfile.ZipFile) -> str:
+    try:
+        with archive.open("xl/workbook.xml") as workbook:
+            sheet = next(
+                element for _, element in iterparse(workbook, events=("end",)) if element.tag == f"{_MAIN_NS}sheet"
+            )
+        relation_id = sheet.get(f"{_REL_NS}id")
+        with archive.open("xl/_rels/workbook.xml.rels") as rels:
+            for _, element in iterparse(rels, events=("end",)):
+                if element.tag == f"{_PKG_REL_NS}Relationship" and element.get("Id") == relation_id:
+                    target = element.get("Target", "").lstrip("/")
+                    return target if target.startswith("xl/") else f"xl/{target}"
+    except (KeyError, StopIteration):
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings: List[str] = []
+    with archive.open("xl/sharedStrings.xml") as handle:
+        for _, element in iterparse(handle, events=("end",)):
+            if element.tag == f"{_MAIN_NS}si":
+                strings.append(_inline_text(element))
+                element.clear()
+    return strings
+
+
+def _cell_text(cell, shared: List[str]) -> str:
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        inline = cell.find(f"{_MAIN_NS}is")
+        return _inline_text(inline) if inline is not None else ""
+    value = cell.findtext(f"{_MAIN_NS}v")
+    if value is None:
+        return ""
+    if kind == "s":
+        return shared[int(value)]
+    return value
+
+
+def _inline_text(element) -> str:
+    # Plain <t>, or rich-text runs <r><t>; phonetic hints (<rPh>) are not part of the value.
+    parts = [element.findtext(f"{_MAIN_NS}t") or ""]
+    parts.extend(run.findtext(f"{_MAIN_NS}t") or "" for run in element.findall(f"{_MAIN_NS}r"))
+    return "".join(parts)
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def parse_flag(value: Optional[str]) -> bool:
+    text = (value or "").strip().lower()
+    if text in {"1", "true", "yes", "y", "是"}:
+        return True
+    if text in {"0", "false", "no", "n", "否", ""}:
+        return False
+    raise ValueError(f"'{value}' is not a boolean")
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+TASK_EVENT = "task"
+SUBSCRIBER_QUEUE_SIZE = 256
+# Progress columns pushed to subscribers; the checkpoint changes every batch and is left to the REST API.
+TASK_FIELDS = (
+    "status",
+    "progress",
+    "total_rows",
+    "processed_count",
+    "success_count",
+    "failure_count",
+    "column_counts",
+    "failure_reason",
+    "effective_batch_size",
+    "effective_concurrency",
+    "avg_batch_latency_ms",
+    "started_at",
+    "finished_at",
+)
+
+SnapshotBuilder = Callable[[Session], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class LiveEvent:
+    name: str
+    data: Dict[str, Any]
+
+    def encode(self) -> str:
+        return f"event: {self.name}\ndata: {json.dumps(self.data, default=_json_default, ensure_ascii=False)}\n\n"
+
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, task_id: Optional[str] = None, max_events: int = SUBSCRIBER_QUEUE_SIZE):
+        self.loop = loop
+        self.task_id = task_id
+        self.queue: "asyncio.Queue[Optional[LiveEvent]]" = asyncio.Queue(maxsize=max_events)
+        self.closed = False
+
+    def wants(self, event: LiveEvent) -> bool:
+        return event.name != TASK_EVENT or self.task_id is None or event.data["task_id"] == self.task_id
+
+    def offer(self, event: Optional[LiveEvent]) -> None:
+        # Called from the producer thread; the queue belongs to the subscriber's event loop.
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            self.closed = True
+
+    def _put(self, event: Optional[LiveEvent]) -> None:
+        if self.closed:
+            return
+        if event is None:
+            self._close()
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client that cannot keep up is dropped; EventSource reconnects and starts from fresh state.
+            self._close()
+
+    def _close(self) -> None:
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class LiveBroker:
+    # One producer reads task progress and builds snapshots per tick, however many clients are
+    # connected, and fans the result out; with no subscribers it does not touch the database.
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval: Optional[float] = None,
+        snapshot_interval: Optional[float] = None,
+    ):
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.interval = interval if interval is not None else settings.live_push_seconds
+        self.snapshot_interval = snapshot_interval if snapshot_interval is not None else settings.load_sample_seconds
+        self._builders: Dict[str, SnapshotBuilder] = {}
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: List[Subscription] = []
+        self._next_snapshot = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register_snapshot(self, name: str, builder: SnapshotBuilder) -> None:
+        self._builders[name] = builder
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, task_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), task_id)
+        with self._lock:
+            # Seed with the cached state so later deltas apply on top of it.
+            for name, data in self._snapshots.items():
+                subscription.offer(LiveEvent(name, data))
+            for data in self._tasks.values():
+                event = LiveEvent(TASK_EVENT, data)
+                if subscription.wants(event):
+                    subscription.offer(event)
+            self._subscribers.append(subscription)
+            if not self._snapshots:
+                self._next_snapshot = 0.0
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def tick(self) -> None:
+        if not self._subscribers:
+            return
+        now = time.monotonic()
+        with self.session_factory() as db:
+            rows = db.query(models.MigrationTask.task_id, *[getattr(models.MigrationTask, name) for name in TASK_FIELDS]).all()
+            snapshots: Dict[str, Dict[str, Any]] = {}
+            if self._builders and now >= self._next_snapshot:
+                self._next_snapshot = now + self.snapshot_interval
+                snapshots = {name: builder(db) for name, builder in self._builders.items()}
+        with self._lock:
+            events = [LiveEvent(name, data) for name, data in snapshots.items() if self._snapshots.get(name) != data]
+            self._snapshots.update(snapshots)
+            for row in rows:
+                current = dict(zip(("task_id",) + TASK_FIELDS, row))
+                previous = self._tasks.get(current["task_id"])
+                self._tasks[current["task_id"]] = current
+                if previous is None:
+                    events.append(LiveEvent(TASK_EVENT, current))
+                    continue
+                delta = {name: value for name, value in current.items() if previous.get(name) != value}
+                if delta:
+                    events.append(LiveEvent(TASK_EVENT, {"task_id": current["task_id"], **delta}))
+            self._subscribers = [subscription for subscription in self._subscribers if not subscription.closed]
+            for event in events:
+                for subscription in self._subscribers:
+                    if subscription.wants(event):
+                        subscription.offer(event)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="live-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # End open streams so shutdown does not wait on long-lived connections.
+        with self._lock:
+            for subscription in self._subscribers:
+                subscription.offer(None)
+            self._subscribers = []
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Live update tick failed")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+live_broker = LiveBroker()
@@ -0,0 +1,190 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.config_cache import config_cache
+
+DEFAULT_MAX_FAILURES = 5
+DEFAULT_LOCKOUT_MINUTES = 15
+TRACKED_KEYS = 100000
+
+Clock = Callable[[], float]
+
+
+class LoginRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_minute: float, clock: Clock = time.monotonic, max_keys: int = TRACKED_KEYS):
+        self.capacity = capacity
+        self.rate = per_minute / 60
+        self.clock = clock
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str) -> float:
+        # Returns 0 when a token was taken, otherwise the seconds until one is available.
+        now = self.clock()
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - stamp) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate if self.rate else float("inf")
+            self._buckets[key] = (tokens, now)
+            # Least recently seen keys go first; a forgotten key simply starts with a full bucket.
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class LoginGuard:
+    # Cheap checks (rate limits, known lockouts) run on the event loop before any hashing;
+    # password verification runs on a small dedicated pool so a login burst cannot starve
+    # the threadpool that serves every other sync endpoint.
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: int = 64,
+        ip_per_minute: float = 60,
+        user_per_minute: float = 30,
+        shared: bool = False,
+        session_factory=SessionLocal,
+        clock: Clock = time.time,
+    ):
+        self.max_pending = max(1, max_pending)
+        self.shared = shared
+        self.session_factory = session_factory
+        self.clock = clock
+        self.ip_bucket = TokenBucket(ip_per_minute, ip_per_minute)
+        self.user_bucket = TokenBucket(user_per_minute, user_per_minute)
+        self._workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        # username -> (consecutive failures, locked until)
+        self._states: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_failures(self) -> int:
+        return config_cache.get_int("login_max_failures", DEFAULT_MAX_FAILURES)
+
+    @property
+    def lockout_seconds(self) -> float:
+        return config_cache.get_float("login_lockout_minutes", DEFAULT_LOCKOUT_MINUTES) * 60
+
+    def admit(self, username: str, client_ip: str) -> None:
+        wait = self.ip_bucket.take(client_ip)
+        if wait:
+            raise LoginRejected(429, "Too many login attempts from this address", wait)
+        wait = self.user_bucket.take(username.lower())
+        if wait:
+            raise LoginRejected(429, "Too many login attempts for this account", wait)
+        self.check_lock(username)
+
+    def check_lock(self, username: str) -> None:
+        _, locked_until = self._states.get(username.lower(), (0, 0.0))
+        remaining = locked_until - self.clock()
+        if remaining > 0:
+            raise LoginRejected(423, "Account temporarily locked", remaining)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise LoginRejected(503, "Login service busy", 1)
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="login-hash")
+        try:
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def load_shared(self, db: Session, username: str) -> None:
+        # Another worker may have locked the account; adopt its state before verifying.
+        if not self.shared:
+            return
+        row = db.query(models.LoginLockout).filter(models.LoginLockout.username == username.lower()).first()
+        if row is not None:
+            locked_until = _timestamp(row.locked_until) if row.locked_until else 0.0
+            self._set(username, row.failures, locked_until)
+            self.check_lock(username)
+
+    def record_failure(self, db: Optional[Session], username: str) -> None:
+        key = username.lower()
+        with self._lock:
+            failures, locked_until = self._states.get(key, (0, 0.0))
+            failures += 1
+            if failures >= self.max_failures:
+                locked_until = self.clock() + self.lockout_seconds
+                failures = 0
+            self._states[key] = (failures, locked_until)
+            self._states.move_to_end(key)
+            while len(self._states) > TRACKED_KEYS:
+                self._states.popitem(last=False)
+        if self.shared and db is not None:
+            self._persist(db, key, failures, locked_until)
+
+    def record_success(self, db: Optional[Session], username: str) -> None:
+        key = username.lower()
+        with self._lock:
+            known = self._states.pop(key, None)
+        if self.shared and db is not None and known is not None:
+            db.query(models.LoginLockout).filter(models.LoginLockout.username == key).delete(synchronize_session=False)
+            db.commit()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _set(self, username: str, failures: int, locked_until: float) -> None:
+        with self._lock:
+            self._states[username.lower()] = (failures, locked_until)
+
+    def _persist(self, db: Session, key: str, failures: int, locked_until: float) -> None:
+        row = db.query(models.LoginLockout).filter(models.LoginLockout.username == key).first()
+        if row is None:
+            row = models.LoginLockout(username=key)
+            db.add(row)
+        row.failures = failures
+        row.locked_until = datetime.utcfromtimestamp(locked_until) if locked_until else None
+        db.commit()
+
+
+def _timestamp(moment: datetime) -> float:
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+def _build_guard() -> LoginGuard:
+    settings = get_settings()
+    return LoginGuard(
+        workers=settings.login_hash_workers,
+        max_pending=settings.login_max_pending,
+        ip_per_minute=settings.login_ip_per_minute,
+        user_per_minute=settings.login_user_per_minute,
+        shared=settings.login_lockout_shared,
+    )
+
+
+login_guard = _build_guard()
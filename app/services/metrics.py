@@ -0,0 +1,235 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.session import engine, target_engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+Sampler = Callable[[], Iterable[Tuple[LabelValues, float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), sampler: Optional[Sampler] = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        # Callback metrics read their value at scrape time instead of on the hot path.
+        self.sampler = sampler
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def remove(self, **labels: object) -> None:
+        # Drops every series matching the given labels (e.g. all outcomes of one task), so label
+        # values that stop being used, like finished task ids, leave the scrape.
+        self._discard(self._values, labels)
+
+    def _discard(self, series: Dict[LabelValues, Any], labels: Dict[str, object]) -> None:
+        wanted = [(self.label_names.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            for key in [key for key in series if all(key[index] == value for index, value in wanted)]:
+                del series[key]
+
+    def samples(self) -> List[str]:
+        items = list(self.sampler()) if self.sampler else self._snapshot()
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in items]
+
+    def _snapshot(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]. Cumulative
+        # counts are only built at scrape time, so observe() touches a single cell.
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def remove(self, **labels: object) -> None:
+        self._discard(self._series, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        lines: List[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = (), sampler: Optional[Sampler] = None) -> Counter:
+        return self.register(Counter(name, documentation, labels, sampler))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = (), sampler: Optional[Sampler] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, sampler))
+
+    def histogram(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "gmdb_http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route", "status"]
+)
+db_queries = registry.counter("gmdb_db_queries_total", "SQL statements executed.", ["engine", "operation"])
+db_query_duration = registry.histogram("gmdb_db_query_duration_seconds", "SQL statement execution time.", ["engine"])
+migration_batch_duration = registry.histogram(
+    "gmdb_migration_batch_duration_seconds", "Migration batch latency (read, encrypt, write).", ["task_id"], BATCH_BUCKETS
+)
+migration_rows = registry.counter("gmdb_migration_rows_total", "Rows processed by migration tasks.", ["task_id", "outcome"])
+migration_throughput = registry.gauge(
+    "gmdb_migration_rows_per_second", "Rows per second of the most recent migration batch.", ["task_id"]
+)
+proxy_statement_duration = registry.histogram(
+    "gmdb_proxy_statement_duration_seconds", "Encryption proxy statement latency.", ["statement"]
+)
+
+_STATEMENT_KINDS = ("select", "insert", "update", "delete")
+
+
+def instrument_engine(bind: Engine, name: str) -> None:
+    @event.listens_for(bind, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("gmdb_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["gmdb_query_start"].pop()
+        verb = statement.lstrip()[:6].lower()
+        db_queries.inc(engine=name, operation=verb if verb in _STATEMENT_KINDS else "other")
+        db_query_duration.observe(time.perf_counter() - started, engine=name)
+
+    @event.listens_for(bind, "handle_error")
+    def _error(context):
+        connection = context.connection
+        if connection is not None and connection.info.get("gmdb_query_start"):
+            connection.info["gmdb_query_start"].pop()
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware: no extra task per request, and the timer
+    # stops when the last body chunk is sent, so streamed exports are measured in full.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
+
+
+instrument_engine(engine, "main")
+if target_engine is not engine:
+    instrument_engine(target_engine, "target")
@@ -0,0 +1,62 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import SessionLocal
+
+USER_CACHE = "users"
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    full_name: Optional[str]
+    role: models.RoleEnum
+    is_active: bool
+
+    @classmethod
+    def from_model(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=bool(user.is_active),
+        )
+
+
+class PrincipalCache:
+    # Authenticated users resolved once per username; user edits bump the "users" version so
+    # every worker drops its copies on the next poll.
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._principals: Dict[str, Principal] = {}
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[Principal]:
+        principal = self._principals.get(username)
+        if principal is not None:
+            return principal
+        with self.session_factory() as db:
+            user = db.query(models.User).filter(models.User.username == username).first()
+            if user is None:
+                return None
+            principal = Principal.from_model(user)
+        with self._lock:
+            self._principals[username] = principal
+        return principal
+
+    def forget(self, username: str) -> None:
+        with self._lock:
+            self._principals.pop(username, None)
+
+    def invalidate(self, db: Session, version: int) -> None:
+        with self._lock:
+            self._principals = {}
+
+
+principal_cache = PrincipalCache()
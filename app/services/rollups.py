@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import and_, event, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import SessionLocal
+
+PERIOD_TOTAL = "total"
+PERIOD_DAY = "day"
+PERIOD_MINUTE = "minute"
+# Running totals live in a single bucket per (log_type, status).
+TOTAL_BUCKET = datetime(1970, 1, 1)
+MINUTE_RETENTION = timedelta(days=2)
+PRUNE_INTERVAL_SECONDS = 3600
+REBUILD_BATCH_SIZE = 5000
+ERROR_STATUS = "error"
+
+RollupKey = Tuple[str, datetime, models.AuditLogType, str]
+
+_rollups = models.AuditRollup.__table__
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def rollup_counts(events: Iterable[Tuple[Optional[datetime], Any, Optional[str]]]) -> Counter:
+    counts: Counter = Counter()
+    for created_at, log_type, status in events:
+        created_at = created_at or datetime.utcnow()
+        log_type = models.AuditLogType(log_type)
+        status = status or ""
+        counts[(PERIOD_TOTAL, TOTAL_BUCKET, log_type, status)] += 1
+        counts[(PERIOD_DAY, created_at.replace(hour=0, minute=0, second=0, microsecond=0), log_type, status)] += 1
+        counts[(PERIOD_MINUTE, created_at.replace(second=0, microsecond=0), log_type, status)] += 1
+    return counts
+
+
+def apply_rollups(conn: Connection, counts: Mapping[RollupKey, int]) -> None:
+    now = datetime.utcnow()
+    for (period, bucket, log_type, status), amount in counts.items():
+        key = and_(
+            _rollups.c.period == period,
+            _rollups.c.bucket == bucket,
+            _rollups.c.log_type == log_type,
+            _rollups.c.status == status,
+        )
+        # UPDATE-then-INSERT works on every supported backend; a batch touches a handful of keys.
+        result = conn.execute(_rollups.update().where(key).values(count=_rollups.c.count + amount, updated_at=now))
+        if result.rowcount == 0:
+            conn.execute(
+                _rollups.insert().values(
+                    period=period, bucket=bucket, log_type=log_type, status=status, count=amount, updated_at=now
+                )
+            )
+    _maybe_prune(conn)
+
+
+def record_rows(conn: Connection, rows: Iterable[Mapping[str, Any]]) -> None:
+    apply_rollups(conn, rollup_counts((row.get("created_at"), row["log_type"], row.get("status")) for row in rows))
+
+
+def rebuild_rollups(conn: Connection) -> None:
+    conn.execute(_rollups.delete())
+    log = models.AuditLog.__table__
+    result = conn.execution_options(stream_results=True).execute(select(log.c.created_at, log.c.log_type, log.c.status))
+    counts: Counter = Counter()
+    for partition in result.partitions(REBUILD_BATCH_SIZE):
+        counts.update(rollup_counts(partition))
+    apply_rollups(conn, counts)
+
+
+def ensure_rollups(conn: Connection) -> None:
+    # Upgraded deployments start with audit rows but no rollups; backfill them once.
+    has_rollups = conn.execute(select(_rollups.c.id).limit(1)).first() is not None
+    has_logs = conn.execute(select(models.AuditLog.__table__.c.id).limit(1)).first() is not None
+    if has_logs and not has_rollups:
+        rebuild_rollups(conn)
+
+
+def read_totals(db: Session) -> Dict[str, int]:
+    rows = (
+        db.query(models.AuditRollup.log_type, models.AuditRollup.status, models.AuditRollup.count)
+        .filter(models.AuditRollup.period == PERIOD_TOTAL, models.AuditRollup.bucket == TOTAL_BUCKET)
+        .all()
+    )
+    totals = {"encryptions": 0, "decryptions": 0, "errors": 0}
+    for log_type, status, count in rows:
+        if log_type == models.AuditLogType.ENCRYPTION:
+            totals["encryptions"] += count
+        elif log_type == models.AuditLogType.DECRYPTION:
+            totals["decryptions"] += count
+        if status == ERROR_STATUS:
+            totals["errors"] += count
+    return totals
+
+
+def read_daily(db: Session, start: date, end: date) -> List[Dict[str, Any]]:
+    rows = (
+        db.query(models.AuditRollup.bucket, models.AuditRollup.log_type, models.AuditRollup.status, models.AuditRollup.count)
+        .filter(
+            models.AuditRollup.period == PERIOD_DAY,
+            models.AuditRollup.bucket >= datetime.combine(start, datetime.min.time()),
+            models.AuditRollup.bucket <= datetime.combine(end, datetime.min.time()),
+        )
+        .all()
+    )
+    days: Dict[date, Dict[str, Any]] = {}
+    current = start
+    while current <= end:
+        days[current] = {"day": current, "encryptions": 0, "decryptions": 0, "errors": 0, "total": 0}
+        current += timedelta(days=1)
+    for bucket, log_type, status, count in rows:
+        day = days[bucket.date()]
+        day["total"] += count
+        if log_type == models.AuditLogType.ENCRYPTION:
+            day["encryptions"] += count
+        elif log_type == models.AuditLogType.DECRYPTION:
+            day["decryptions"] += count
+        if status == ERROR_STATUS:
+            day["errors"] += count
+    return list(days.values())
+
+
+def _maybe_prune(conn: Connection) -> None:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = time.monotonic()
+    cutoff = datetime.utcnow() - MINUTE_RETENTION
+    conn.execute(_rollups.delete().where(_rollups.c.period == PERIOD_MINUTE, _rollups.c.bucket < cutoff))
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _rollup_orm_audit_logs(session: Session, flush_context) -> None:
+    # Audit rows added through the ORM (single POST /api/logs, migration summaries) are counted in
+    # the same transaction; the buffered sink calls record_rows() itself.
+    logs = [obj for obj in session.new if isinstance(obj, models.AuditLog)]
+    if logs:
+        apply_rollups(session.connection(), rollup_counts((log.created_at, log.log_type, log.status) for log in logs))
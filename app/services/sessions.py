@@ -0,0 +1,293 @@
+import abc
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+SESSION_STORE = "auth_sessions"
+BACKEND_MEMORY = "memory"
+BACKEND_DATABASE = "database"
+
+Clock = Callable[[], float]
+
+
+@dataclass
+class SessionRecord:
+    username: str
+    expires_at: float
+    last_seen: float
+    # When last_seen was last written to the shared store.
+    persisted_seen: float = 0.0
+
+    def deadline(self, idle_seconds: float) -> float:
+        return min(self.expires_at, self.last_seen + idle_seconds)
+
+
+class SessionStore(abc.ABC):
+    # Tokens have an absolute lifetime (expires_at) and a sliding idle timeout: every
+    # successful resolve() pushes the idle deadline forward.
+    def __init__(self, idle_seconds: float, sweep_seconds: float, clock: Clock = time.time):
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self.clock = clock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @abc.abstractmethod
+    def create(self, token: str, username: str, expires_at: float) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def resolve(self, token: str) -> Optional[str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def revoke(self, token: str) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def sweep(self, now: Optional[float] = None) -> int:
+        raise NotImplementedError
+
+    def invalidate(self, db: Session, version: int) -> None:
+        pass
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Expired session sweep failed")
+
+
+class MemorySessionStore(SessionStore):
+    # Timer wheel: tokens sit in the bucket of the slot their deadline falls into. resolve() only
+    # slides last_seen; a token whose deadline moved is re-bucketed when its old slot comes due.
+    def __init__(self, idle_seconds: float, resolution: float = 5.0, clock: Clock = time.time):
+        super().__init__(idle_seconds, resolution, clock)
+        self.resolution = resolution
+        self._sessions: Dict[str, SessionRecord] = {}
+        self._wheel: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, token: str, username: str, expires_at: float) -> None:
+        record = SessionRecord(username=username, expires_at=expires_at, last_seen=self.clock())
+        with self._lock:
+            self._sessions[token] = record
+            self._schedule(token, record.deadline(self.idle_seconds))
+
+    def resolve(self, token: str) -> Optional[str]:
+        record = self._sessions.get(token)
+        if record is None:
+            return None
+        now = self.clock()
+        if record.deadline(self.idle_seconds) <= now:
+            self.revoke(token)
+            return None
+        record.last_seen = now
+        return record.username
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = self.clock() if now is None else now
+        current = self._slot(now)
+        removed = 0
+        with self._lock:
+            for slot in [slot for slot in self._wheel if slot <= current]:
+                for token in self._wheel.pop(slot):
+                    record = self._sessions.get(token)
+                    if record is None:
+                        continue
+                    deadline = record.deadline(self.idle_seconds)
+                    if deadline <= now:
+                        del self._sessions[token]
+                        removed += 1
+                    else:
+                        self._schedule(token, deadline)
+        return removed
+
+    def _slot(self, moment: float) -> int:
+        return int(moment // self.resolution)
+
+    def _schedule(self, token: str, deadline: float) -> None:
+        self._wheel.setdefault(self._slot(deadline), set()).add(token)
+
+
+class DatabaseSessionStore(SessionStore):
+    # Shared through the auth_sessions table so every worker accepts every token. An LRU of
+    # resolved sessions keeps the common path off the database; revocations bump a version
+    # row so peers drop their cached copies on the next poll.
+    def __init__(
+        self,
+        idle_seconds: float,
+        cache_size: int = 10000,
+        session_factory=SessionLocal,
+        sweep_seconds: float = 60.0,
+        clock: Clock = time.time,
+    ):
+        super().__init__(idle_seconds, sweep_seconds, clock)
+        self.session_factory = session_factory
+        self.cache_size = max(1, cache_size)
+        # last_seen is written back at most this often; peers allow the same grace when they
+        # judge idleness from the row, so an active session is never cut short.
+        self.touch_seconds = min(60.0, idle_seconds / 10)
+        self._cache: "OrderedDict[str, SessionRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, token: str, username: str, expires_at: float) -> None:
+        now = self.clock()
+        record = SessionRecord(username=username, expires_at=expires_at, last_seen=now, persisted_seen=now)
+        key = _hash(token)
+        with self.session_factory() as db:
+            db.add(
+                models.AuthSession(
+                    token_hash=key,
+                    username=username,
+                    created_at=_datetime(now),
+                    expires_at=_datetime(expires_at),
+                    last_seen_at=_datetime(now),
+                )
+            )
+            db.commit()
+        self._remember(key, record)
+
+    def resolve(self, token: str) -> Optional[str]:
+        key = _hash(token)
+        now = self.clock()
+        with self._lock:
+            record = self._cache.get(key)
+            if record is not None:
+                self._cache.move_to_end(key)
+        if record is None or record.deadline(self.idle_seconds) <= now:
+            # Missing locally, or idle here but possibly kept alive by another worker.
+            record = self._load(key)
+            if record is None or record.deadline(self.idle_seconds + self.touch_seconds) <= now:
+                self._forget(key)
+                if record is not None:
+                    self._delete(key)
+                return None
+            self._remember(key, record)
+        record.last_seen = now
+        if now - record.persisted_seen >= self.touch_seconds:
+            record.persisted_seen = now
+            with self.session_factory() as db:
+                db.query(models.AuthSession).filter(models.AuthSession.token_hash == key).update(
+                    {models.AuthSession.last_seen_at: _datetime(now)}, synchronize_session=False
+                )
+                db.commit()
+        return record.username
+
+    def revoke(self, token: str) -> None:
+        key = _hash(token)
+        self._forget(key)
+        with self.session_factory() as db:
+            db.query(models.AuthSession).filter(models.AuthSession.token_hash == key).delete(synchronize_session=False)
+            bump_version(db, SESSION_STORE)
+            db.commit()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = self.clock() if now is None else now
+        with self.session_factory() as db:
+            removed = (
+                db.query(models.AuthSession)
+                .filter(
+                    or_(
+                        models.AuthSession.expires_at <= _datetime(now),
+                        models.AuthSession.last_seen_at <= _datetime(now - self.idle_seconds - self.touch_seconds),
+                    )
+                )
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+        with self._lock:
+            for key in [key for key, record in self._cache.items() if record.expires_at <= now]:
+                del self._cache[key]
+        return removed
+
+    def invalidate(self, db: Session, version: int) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _load(self, key: str) -> Optional[SessionRecord]:
+        with self.session_factory() as db:
+            row = db.query(models.AuthSession).filter(models.AuthSession.token_hash == key).first()
+            if row is None:
+                return None
+            last_seen = _timestamp(row.last_seen_at)
+            return SessionRecord(
+                username=row.username, expires_at=_timestamp(row.expires_at), last_seen=last_seen, persisted_seen=last_seen
+            )
+
+    def _delete(self, key: str) -> None:
+        with self.session_factory() as db:
+            db.query(models.AuthSession).filter(models.AuthSession.token_hash == key).delete(synchronize_session=False)
+            db.commit()
+
+    def _remember(self, key: str, record: SessionRecord) -> None:
+        with self._lock:
+            self._cache[key] = record
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _datetime(timestamp: float) -> datetime:
+    return datetime.utcfromtimestamp(timestamp)
+
+
+def _timestamp(moment: datetime) -> float:
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+def build_session_store() -> SessionStore:
+    settings = get_settings()
+    idle_seconds = settings.session_idle_minutes * 60
+    if settings.session_backend == BACKEND_MEMORY:
+        return MemorySessionStore(idle_seconds)
+    if settings.session_backend == BACKEND_DATABASE:
+        return DatabaseSessionStore(idle_seconds, settings.session_cache_size)
+    raise ValueError(f"Unknown session backend '{settings.session_backend}'")
+
+
+session_store = build_session_store()
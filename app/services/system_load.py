@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.db.session import engine, target_engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_THREAD_PREFIX = "migration-"
+
+
+@dataclass(frozen=True)
+class LoadSample:
+    sampled_at: datetime
+    cpu_percent: float
+    memory_percent: float
+    rss_mb: float
+    disk_read_kbps: float
+    disk_write_kbps: float
+    db_connections: int
+    target_db_connections: int
+    pool_size: Optional[int]
+    pool_overflow: Optional[int]
+    threads: int
+    migration_threads: int
+
+    @property
+    def disk_io(self) -> float:
+        return round(self.disk_read_kbps + self.disk_write_kbps, 1)
+
+
+class PoolGauge:
+    # Counts connections through pool events so it works for QueuePool and NullPool alike.
+    def __init__(self, bind: Engine):
+        self.bind = bind
+        self.checked_out = 0
+        self._lock = threading.Lock()
+        event.listen(bind, "checkout", self._on_checkout)
+        event.listen(bind, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checked_out += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def capacity(self) -> Tuple[Optional[int], Optional[int]]:
+        pool = self.bind.pool
+        size = pool.size() if hasattr(pool, "size") else None
+        overflow = pool.overflow() if hasattr(pool, "overflow") else None
+        return size, overflow
+
+
+class LoadSampler:
+    def __init__(
+        self,
+        bind: Engine = engine,
+        target_bind: Optional[Engine] = target_engine,
+        interval: Optional[float] = None,
+        proc_root: str = "/proc",
+    ):
+        self.interval = interval if interval is not None else get_settings().load_sample_seconds
+        self.proc_root = proc_root
+        self.pool = PoolGauge(bind)
+        self.target_pool = PoolGauge(target_bind) if target_bind is not None and target_bind is not bind else None
+        self._previous: Optional[Tuple[float, Tuple[int, int], Tuple[int, int]]] = None
+        self._latest: Optional[LoadSample] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def latest(self) -> LoadSample:
+        sample = self._latest
+        return sample if sample is not None else self.sample()
+
+    def sample(self) -> LoadSample:
+        with self._lock:
+            now = time.monotonic()
+            cpu = self._cpu_times()
+            io = self._io_bytes()
+            cpu_percent = read_kbps = write_kbps = 0.0
+            if self._previous is not None:
+                previous_time, previous_cpu, previous_io = self._previous
+                elapsed = max(now - previous_time, 1e-6)
+                busy = max(0, cpu[0] - previous_cpu[0])
+                total = max(0, cpu[1] - previous_cpu[1])
+                cpu_percent = busy / total * 100 if total else 0.0
+                read_kbps = max(0, io[0] - previous_io[0]) / 1024 / elapsed
+                write_kbps = max(0, io[1] - previous_io[1]) / 1024 / elapsed
+            self._previous = (now, cpu, io)
+            memory_percent, rss_mb = self._memory()
+            size, overflow = self.pool.capacity()
+            threads = threading.enumerate()
+            sample = LoadSample(
+                sampled_at=datetime.utcnow(),
+                cpu_percent=round(cpu_percent, 1),
+                memory_percent=round(memory_percent, 1),
+                rss_mb=round(rss_mb, 1),
+                disk_read_kbps=round(read_kbps, 1),
+                disk_write_kbps=round(write_kbps, 1),
+                db_connections=self.pool.checked_out,
+                target_db_connections=self.target_pool.checked_out if self.target_pool else self.pool.checked_out,
+                pool_size=size,
+                pool_overflow=overflow,
+                threads=len(threads),
+                migration_threads=sum(1 for thread in threads if thread.name.startswith(MIGRATION_THREAD_PREFIX)),
+            )
+            self._latest = sample
+            return sample
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="load-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("System load sample failed")
+
+    def _read(self, *parts: str) -> Sequence[str]:
+        try:
+            with open(os.path.join(self.proc_root, *parts), encoding="ascii", errors="replace") as handle:
+                return handle.read().splitlines()
+        except OSError:
+            return []
+
+    def _cpu_times(self) -> Tuple[int, int]:
+        # (busy, total) jiffies from the aggregate "cpu" line; idle and iowait count as idle.
+        for line in self._read("stat"):
+            if line.startswith("cpu "):
+                values = [int(value) for value in line.split()[1:]]
+                # guest/guest_nice are already included in user/nice.
+                total = sum(values[:8])
+                idle = values[3] + (values[4] if len(values) > 4 else 0)
+                return total - idle, total
+        return 0, 0
+
+    def _io_bytes(self) -> Tuple[int, int]:
+        fields = _key_values(self._read("self", "io"))
+        return fields.get("read_bytes", 0), fields.get("write_bytes", 0)
+
+    def _memory(self) -> Tuple[float, float]:
+        meminfo = _key_values(self._read("meminfo"))
+        status = _key_values(self._read("self", "status"))
+        total, available = meminfo.get("MemTotal", 0), meminfo.get("MemAvailable", 0)
+        memory_percent = (1 - available / total) * 100 if total else 0.0
+        return memory_percent, status.get("VmRSS", 0) / 1024
+
+
+def _key_values(lines: Sequence[str]) -> Dict[str, int]:
+    values: Dict[str, int] = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts and parts[0].isdigit():
+            values[key.strip()] = int(parts[0])
+    return values
+
+
+load_sampler = LoadSampler()
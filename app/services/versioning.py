@@ -0,0 +1,85 @@
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import models
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+VersionListener = Callable[[Session, int], None]
+
+
+def bump_version(db: Session, name: str) -> None:
+    # Runs inside the caller's transaction so the version moves together with the data it guards.
+    updated = (
+        db.query(models.CacheVersion)
+        .filter(models.CacheVersion.name == name)
+        .update({models.CacheVersion.version: models.CacheVersion.version + 1}, synchronize_session=False)
+    )
+    if not updated:
+        db.add(models.CacheVersion(name=name, version=1))
+        db.flush()
+
+
+def ensure_version(db: Session, name: str) -> None:
+    if not db.query(models.CacheVersion).filter(models.CacheVersion.name == name).first():
+        db.add(models.CacheVersion(name=name, version=0))
+
+
+def read_version(db: Session, name: str) -> int:
+    return db.query(models.CacheVersion.version).filter(models.CacheVersion.name == name).scalar() or 0
+
+
+def read_versions(db: Session) -> Dict[str, int]:
+    return {name: version for name, version in db.query(models.CacheVersion.name, models.CacheVersion.version)}
+
+
+class VersionPoller:
+    def __init__(self, session_factory=SessionLocal, interval: Optional[float] = None):
+        self.session_factory = session_factory
+        self.interval = interval if interval is not None else get_settings().cache_poll_seconds
+        self._listeners: Dict[str, List[VersionListener]] = {}
+        self._seen: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, listener: VersionListener) -> None:
+        self._listeners.setdefault(name, []).append(listener)
+
+    def poll_once(self) -> None:
+        with self.session_factory() as db:
+            versions = read_versions(db)
+            for name, listeners in self._listeners.items():
+                version = versions.get(name, 0)
+                if self._seen.get(name) == version:
+                    continue
+                self._seen[name] = version
+                for listener in listeners:
+                    listener(db, version)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-version-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Cache version poll failed")
+
+
+poller = VersionPoller()
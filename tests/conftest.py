@@ -1,6 +1,9 @@
+import os
 import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("GMDB_DATABASE_URL", "sqlite:///./test_gmdb.db")
@@ -0,0 +1,67 @@
+import pathlib
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.session import SessionLocal
+from app.main import app
+from app.services.login_guard import LoginGuard, LoginRejected, TokenBucket, login_guard
+
+
+def _get_auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "ChangeMe123!"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_token_bucket_refills_at_configured_rate():
+    now = [0.0]
+    bucket = TokenBucket(capacity=2, per_minute=60, clock=lambda: now[0])
+    assert bucket.take("10.0.0.1") == 0
+    assert bucket.take("10.0.0.1") == 0
+    assert bucket.take("10.0.0.1") == pytest.approx(1.0)
+    assert bucket.take("10.0.0.2") == 0
+    now[0] += 1.0
+    assert bucket.take("10.0.0.1") == 0
+
+
+def test_repeated_failures_lock_the_account(monkeypatch):
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        client.post(
+            "/api/users",
+            json={"username": "lock_me", "full_name": "Lock", "password": "Correct123!", "role": "auditor"},
+            headers=headers,
+        )
+        for _ in range(5):
+            response = client.post("/api/auth/login", json={"username": "lock_me", "password": "wrong-pass"})
+            assert response.status_code == 401
+        response = client.post("/api/auth/login", json={"username": "lock_me", "password": "Correct123!"})
+        assert response.status_code == 423
+        assert int(response.headers["Retry-After"]) > 14 * 60
+
+        monkeypatch.setattr(login_guard, "clock", lambda: time.time() + 16 * 60)
+        response = client.post("/api/auth/login", json={"username": "lock_me", "password": "Correct123!"})
+        assert response.status_code == 200
+
+
+def test_lockout_is_shared_through_the_database():
+    with TestClient(app):
+        worker_a = LoginGuard(shared=True)
+        worker_b = LoginGuard(shared=True)
+        with SessionLocal() as db:
+            for _ in range(5):
+                worker_a.record_failure(db, "Shared_User")
+            with pytest.raises(LoginRejected) as rejected:
+                worker_b.load_shared(db, "shared_user")
+            assert rejected.value.status_code == 423
+            worker_b.record_success(db, "shared_user")
+            worker_a._states.clear()
+            worker_a.load_shared(db, "shared_user")
+
+
+def teardown_module(module):
+    db_path = pathlib.Path("test_gmdb.db")
+    if db_path.exists():
+        db_path.unlink()
@@ -0,0 +1,111 @@
+import csv
+import io
+import pathlib
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.export import XLSX_MEDIA_TYPE
+from app.services.field_registry import field_registry
+from app.services.imports import iter_xlsx_rows
+
+
+def _get_auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "ChangeMe123!"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def test_csv_import_upserts_in_chunks_and_reports_bad_rows():
+    header = ["field_id", "table_name", "field_name", "algorithm_type", "blind_index_enabled", "remarks"]
+    rows = [header] + [[f"BULK_{i}", "lis_result", f"col_{i}", "SM4", "false", ""] for i in range(1200)]
+    rows[1][5] = "multi-line\nremark, with comma"
+    rows += [
+        ["BULK_BAD_FLAG", "lis_result", "x", "SM4", "maybe", ""],
+        ["BULK_NO_ALG", "lis_result", "y", "", "true", ""],
+        ["BULK_5", "lis_result", "dup", "SM4", "false", ""],
+    ]
+
+    def chunked(data: bytes, size: int = 4096):
+        for offset in range(0, len(data), size):
+            yield data[offset : offset + size]
+
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post("/api/fields/sensitive/import", content=chunked(_csv(rows)), headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["total"], body["created"], body["updated"], body["failed"]) == (1203, 1200, 0, 3)
+        assert [error["field_id"] for error in body["errors"]] == ["BULK_BAD_FLAG", "BULK_NO_ALG", "BULK_5"]
+        assert body["errors"][0]["row"] == 1202
+        assert field_registry.lookup("lis_result", "col_7") is not None
+
+        listed = client.get("/api/fields/sensitive", params={"field_name": "col_0"}, headers=headers).json()
+        assert listed[0]["remarks"] == "multi-line\nremark, with comma"
+
+        update = _csv([["field_id", "table_name", "field_name", "algorithm_type"], ["BULK_0", "lis_result", "col_0", "SM4-GCM"]])
+        body = client.post("/api/fields/sensitive/import", content=update, headers=headers).json()
+        assert (body["created"], body["updated"]) == (0, 1)
+        assert field_registry.lookup("lis_result", "col_0").algorithm_type == "SM4-GCM"
+        # Columns missing from the upload are left untouched.
+        listed = client.get("/api/fields/sensitive", params={"field_name": "col_0"}, headers=headers).json()
+        assert listed[0]["remarks"] == "multi-line\nremark, with comma"
+
+        response = client.post("/api/fields/sensitive/import", content=b"field_id,table_name\nA,B\n", headers=headers)
+        assert response.status_code == 400
+
+
+def test_xlsx_export_round_trips_through_import():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        client.post(
+            "/api/fields/sensitive/import",
+            content=_csv([["field_id", "table_name", "field_name", "algorithm_type"], ["XLSX_1", "billing", "card_no", "SM4"]]),
+            headers=headers,
+        )
+        response = client.get("/api/fields/sensitive/export", params={"format": "xlsx", "table_name": "billing"}, headers=headers)
+        assert response.status_code == 200
+        rows = list(iter_xlsx_rows(io.BytesIO(response.content)))
+        assert rows[0][:4] == ["field_id", "table_name", "field_name", "algorithm_type"]
+        assert rows[1][:4] == ["XLSX_1", "billing", "card_no", "SM4"]
+
+        response = client.post(
+            "/api/fields/sensitive/import",
+            content=response.content,
+            headers={**headers, "Content-Type": XLSX_MEDIA_TYPE},
+        )
+        assert response.json()["updated"] == 1 and response.json()["failed"] == 0
+
+        exported = client.get("/api/fields/sensitive/export", params={"table_name": "billing"}, headers=headers)
+        assert exported.text.splitlines()[1].startswith("XLSX_1,billing,card_no,SM4")
+
+
+def test_xlsx_reader_handles_shared_strings_and_sparse_cells():
+    ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "xl/sharedStrings.xml",
+            f'<sst {ns}><si><t>field_id</t></si><si><r><t>ri</t></r><r><t>ch</t></r><rPh><t>x</t></rPh></si></sst>',
+        )
+        archive.writestr(
+            "xl/worksheets/sheet1.xml",
+            f'<worksheet {ns}><sheetData>'
+            '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>'
+            '<row r="2"><c r="B2"><v>42</v></c><c r="C2" t="b"><v>1</v></c></row>'
+            "</sheetData></worksheet>",
+        )
+    assert list(iter_xlsx_rows(buffer)) == [["field_id", "", "rich"], ["", "42", "1"]]
+
+
+def teardown_module(module):
+    db_path = pathlib.Path("test_gmdb.db")
+    if db_path.exists():
+        db_path.unlink()
@@ -0,0 +1,194 @@
+import csv
+import io
+import os
+import pathlib
+import threading
+import zipfile
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+from xml.etree import ElementTree
+
+from app.db import models
+from app.db.session import SessionLocal, engine, ensure_indexes
+from app.main import app
+from app.services import export
+from app.services.audit import AuditSink, audit_sink
+
+BASE_TIME = datetime(2024, 3, 1, 8, 0, 0)
+
+
+def _get_auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "ChangeMe123!"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _seed_logs() -> None:
+    with SessionLocal() as db:
+        db.query(models.AuditLog).delete()
+        # Pairs of rows share a timestamp so the cursor has to break ties on id.
+        db.add_all(
+            models.AuditLog(
+                log_type=models.AuditLogType.ENCRYPTION,
+                username="seed",
+                operation=f"op-{index}",
+                status="success",
+                created_at=BASE_TIME + timedelta(minutes=index // 2),
+            )
+            for index in range(25)
+        )
+        db.commit()
+
+
+def test_logs_are_paged_by_cursor_and_filtered_by_time_range():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        _seed_logs()
+
+        seen = []
+        params = {"user": "seed", "limit": 10}
+        while True:
+            response = client.get("/api/logs", params=params, headers=headers)
+            assert response.status_code == 200
+            body = response.json()
+            seen += [item["operation"] for item in body["items"]]
+            if body["next_cursor"] is None:
+                break
+            params["cursor"] = body["next_cursor"]
+        assert len(seen) == 25 and len(set(seen)) == 25
+        assert seen[0] == "op-24" and seen[-1] == "op-0"
+
+        response = client.get(
+            "/api/logs",
+            params={
+                "user": "seed",
+                "start": (BASE_TIME + timedelta(minutes=2)).isoformat(),
+                "end": (BASE_TIME + timedelta(minutes=4)).isoformat(),
+            },
+            headers=headers,
+        )
+        body = response.json()
+        assert [item["operation"] for item in body["items"]] == ["op-7", "op-6", "op-5", "op-4"]
+        assert body["next_cursor"] is None
+
+        response = client.get("/api/logs", params={"cursor": "not-a-cursor"}, headers=headers)
+        assert response.status_code == 400
+
+
+def test_export_streams_filtered_csv_and_real_xlsx():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        _seed_logs()
+
+        response = client.get("/api/logs/export", params={"format": "csv", "user": "seed"}, headers=headers)
+        assert response.status_code == 200
+        rows = list(csv.reader(io.StringIO(response.content.decode("utf-8"))))
+        assert rows[0][0] == "时间" and len(rows) == 26
+        assert rows[1][1:3] == ["seed", "encryption"] and rows[1][6] == "op-24"
+
+        response = client.get(
+            "/api/logs/export",
+            params={"format": "excel", "user": "seed", "start": (BASE_TIME + timedelta(minutes=10)).isoformat()},
+            headers=headers,
+        )
+        assert response.headers["content-type"] == export.XLSX_MEDIA_TYPE
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            assert archive.testzip() is None
+            sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+        namespace = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+        values = [[cell.findtext("x:is/x:t", namespaces=namespace) for cell in row] for row in sheet.iter(f"{{{namespace['x']}}}row")]
+        assert values[0][0] == "时间"
+        assert [row[6] for row in values[1:]] == ["op-24", "op-23", "op-22", "op-21", "op-20"]
+
+
+def test_xlsx_writer_emits_a_chunk_per_batch():
+    batches = ([[os.urandom(32).hex(), "<&>"] for _ in range(2000)] for _ in range(4))
+    chunks = list(export.iter_xlsx(["a", "b"], batches))
+    # Deflate output for each batch leaves the writer before the next batch is produced.
+    assert len(chunks) >= 4 and max(len(chunk) for chunk in chunks) < 200_000
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    assert sheet.count("<row>") == 8001 and "&lt;&amp;&gt;" in sheet
+
+
+def test_batch_endpoint_queues_events_for_group_commit():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        events = [{"log_type": "decryption", "operation": f"batch-{index}", "status": "success"} for index in range(3)]
+        response = client.post("/api/logs/batch", json={"events": events}, headers=headers)
+        assert response.status_code == 202 and response.json() == {"accepted": 3}
+        assert audit_sink.flush()
+        items = client.get("/api/logs", params={"log_type": "decryption", "user": "admin"}, headers=headers).json()["items"]
+        assert {"batch-0", "batch-1", "batch-2"} <= {item["operation"] for item in items}
+
+
+class _GatedEngine:
+    def __init__(self):
+        self.gate = threading.Event()
+
+    def begin(self):
+        self.gate.wait(5)
+        return engine.begin()
+
+
+def test_audit_sink_spills_on_overflow_and_replays(tmp_path):
+    with TestClient(app):
+        gated = _GatedEngine()
+        sink = AuditSink(bind=gated, max_queue=2, batch_size=1, flush_ms=1, overflow="spill", spill_path=str(tmp_path / "spill.jsonl"))
+        sink.start()
+        sink.submit_many({"log_type": "encryption", "operation": "spill-test", "details": {"n": index}} for index in range(10))
+        # The writer is stuck on its first event and the queue holds two more; everything else goes to disk.
+        assert sink.spilled >= 7
+        assert len((tmp_path / "spill.jsonl").read_text(encoding="utf-8").splitlines()) == sink.spilled
+        gated.gate.set()
+        assert sink.flush()
+        sink.stop()
+
+        sink.bind = engine
+        queued = sink.written
+        assert sink.replay_spill() == 10 - queued
+        assert not (tmp_path / "spill.jsonl").exists()
+        with SessionLocal() as db:
+            rows = db.query(models.AuditLog).filter(models.AuditLog.operation == "spill-test").all()
+        assert sorted(row.details["n"] for row in rows) == list(range(10))
+
+
+def _query_plan(query) -> str:
+    sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_audit_indexes_are_created_idempotently_and_used_by_the_planner():
+    with TestClient(app):
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_audit_logs_type_created"))
+        ensure_indexes(engine)
+        ensure_indexes(engine)
+        names = {index["name"] for index in inspect(engine).get_indexes("audit_logs")}
+        assert {"ix_audit_logs_type_created", "ix_audit_logs_status_created", "ix_audit_logs_created_id"} <= names
+
+        with SessionLocal() as db:
+            logs = db.query(models.AuditLog)
+            by_type = logs.filter(models.AuditLog.log_type == models.AuditLogType.ENCRYPTION)
+            assert "ix_audit_logs_type_created" in _query_plan(by_type.with_entities(models.AuditLog.id))
+            plan = _query_plan(by_type.order_by(models.AuditLog.created_at.desc(), models.AuditLog.id.desc()).limit(200))
+            assert "ix_audit_logs_type_created" in plan and "TEMP B-TREE" not in plan
+
+            recent_errors = logs.filter(models.AuditLog.status == "error").order_by(models.AuditLog.created_at.desc()).limit(10)
+            plan = _query_plan(recent_errors)
+            assert "ix_audit_logs_status_created" in plan and "TEMP B-TREE" not in plan
+
+            plan = _query_plan(logs.order_by(models.AuditLog.created_at.desc(), models.AuditLog.id.desc()).limit(200))
+            assert "ix_audit_logs_created_id" in plan and "TEMP B-TREE" not in plan
+
+            by_task = logs.filter(models.AuditLog.task_id == "MIG001").order_by(models.AuditLog.created_at.desc())
+            assert "ix_audit_logs_task_created" in _query_plan(by_task)
+
+
+def teardown_module(module):
+    db_path = pathlib.Path("test_gmdb.db")
+    if db_path.exists():
+        db_path.unlink()
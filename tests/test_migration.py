@@ -0,0 +1,638 @@
+import pathlib
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, select
+
+from app import crypto
+from app.crypto import registry
+from app.db import bulk, models
+from app.db.session import Base, SessionLocal, engine, target_engine
+from app.main import app
+from app.migration.adaptive import AdaptiveController
+from app.migration.executor import MigrationRunner, executor
+from app.migration.scheduler import MigrationScheduler, scheduler
+from app.services.config_cache import config_cache
+
+metadata = MetaData()
+patient_info = Table(
+    "patient_info",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("patient_id_plain", String(100)),
+)
+insurance_card = Table(
+    "insurance_card",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("insurance_no", String(100)),
+    Column("insurance_no_bidx", String(64)),
+)
+lab_result = Table(
+    "lab_result",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("insurance_no", String(100)),
+)
+outpatient_visit = Table(
+    "outpatient_visit",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("patient_name", String(100)),
+    Column("phone", String(100)),
+    Column("id_card", String(100)),
+)
+discharge_summary = Table(
+    "discharge_summary",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("diagnosis", String(200)),
+    Column("doctor_phone", String(100)),
+)
+referral_note = Table(
+    "referral_note",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("note", String(200)),
+)
+
+
+class BrokenCipher(crypto.Cipher):
+    name = "BROKEN-TEST"
+
+    def encrypt_batch(self, values):
+        raise crypto.CipherError("key unavailable")
+
+
+@pytest.fixture
+def broken_cipher(monkeypatch):
+    # Registered on copies of the registry tables, so the cipher is gone again after the test.
+    for name in ("_factories", "_aliases", "_instances"):
+        monkeypatch.setattr(registry, name, dict(getattr(registry, name)))
+    crypto.register_cipher("BROKEN-TEST", lambda key: BrokenCipher())
+
+
+def _get_auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "ChangeMe123!"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _wait_for_status(client: TestClient, headers: dict[str, str], task_id: str, status: str) -> dict:
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        body = client.get(f"/api/migration/tasks/{task_id}", headers=headers).json()
+        if body["status"] == status:
+            return body
+        time.sleep(0.05)
+    raise AssertionError(f"Task {task_id} did not reach {status}: {body}")
+
+
+def setup_module(module):
+    metadata.drop_all(target_engine)
+    metadata.create_all(target_engine)
+    with target_engine.begin() as conn:
+        conn.execute(
+            patient_info.insert(),
+            [{"id": i, "patient_id_plain": None if i % 100 == 0 else f"P{i:08d}"} for i in range(1, 2501)],
+        )
+        conn.execute(
+            lab_result.insert(),
+            [
+                {"id": i, "insurance_no": crypto.encrypt_value("SM4", f"I{i}") if i <= 600 or 900 < i <= 1200 else f"I{i}"}
+                for i in range(1, 2501)
+            ],
+        )
+
+
+def test_migration_encrypts_column_in_keyset_batches():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post(
+            "/api/migration/tasks",
+            json={
+                "task_id": "MIG001",
+                "table_name": "patient_info",
+                "field_name": "patient_id_plain",
+                "batch_size": 300,
+                "concurrency": 3,
+                "overwrite_plaintext": True,
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+
+        response = client.post("/api/migration/tasks/MIG001/control", params={"action": "start"}, headers=headers)
+        assert response.status_code == 200
+
+        body = _wait_for_status(client, headers, "MIG001", "完成")
+        assert body["progress"] == 100
+        assert body["total_rows"] == 2500
+        assert body["processed_count"] == 2500
+        assert body["success_count"] == 2475
+        assert body["failure_count"] == 0
+        assert body["effective_batch_size"] >= 50
+        assert 1 <= body["effective_concurrency"] <= 3
+
+    with target_engine.connect() as conn:
+        rows = conn.execute(select(patient_info).order_by(patient_info.c.id)).all()
+    for row in rows:
+        if row.id % 100 == 0:
+            assert row.patient_id_plain is None
+        else:
+            assert crypto.is_encrypted(row.patient_id_plain)
+            assert crypto.decrypt_value(row.patient_id_plain) == f"P{row.id:08d}"
+
+
+def test_process_mode_offloads_encryption_to_worker_processes():
+    with target_engine.begin() as conn:
+        conn.execute(patient_info.delete())
+        conn.execute(patient_info.insert(), [{"id": i, "patient_id_plain": f"Q{i}"} for i in range(1, 801)])
+
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post(
+            "/api/migration/tasks",
+            json={
+                "task_id": "MIG004",
+                "table_name": "patient_info",
+                "field_name": "patient_id_plain",
+                "batch_size": 200,
+                "concurrency": 2,
+                "overwrite_plaintext": True,
+                "execution_mode": "process",
+            },
+            headers=headers,
+        )
+        assert response.json()["execution_mode"] == "process"
+        client.post("/api/migration/tasks/MIG004/control", params={"action": "start"}, headers=headers)
+        body = _wait_for_status(client, headers, "MIG004", "完成")
+        assert body["success_count"] == 800
+
+    with target_engine.connect() as conn:
+        values = conn.execute(select(patient_info.c.patient_id_plain).order_by(patient_info.c.id)).scalars().all()
+    assert crypto.decrypt_values(values) == [f"Q{i}" for i in range(1, 801)]
+
+
+def test_blind_index_filled_during_migration_and_used_for_lookup():
+    with target_engine.begin() as conn:
+        conn.execute(insurance_card.insert(), [{"id": i, "insurance_no": f"YB{i:06d}"} for i in range(1, 501)])
+
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post(
+            "/api/fields/sensitive",
+            json={
+                "field_id": "SF_BIDX",
+                "table_name": "insurance_card",
+                "field_name": "insurance_no",
+                "algorithm_type": "SM4-CBC",
+                "blind_index_enabled": True,
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        client.post(
+            "/api/migration/tasks",
+            json={
+                "task_id": "MIG005",
+                "table_name": "insurance_card",
+                "field_name": "insurance_no",
+                "batch_size": 100,
+                "overwrite_plaintext": True,
+            },
+            headers=headers,
+        )
+        client.post("/api/migration/tasks/MIG005/control", params={"action": "start"}, headers=headers)
+        _wait_for_status(client, headers, "MIG005", "完成")
+
+        response = client.post(
+            "/api/fields/sensitive/SF_BIDX/lookup", json={"value": "YB000123"}, headers=headers
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["blind_index_column"] == "insurance_no_bidx"
+        assert body["matches"] == [123]
+
+    with target_engine.connect() as conn:
+        row = conn.execute(select(insurance_card).where(insurance_card.c.id == 123)).one()
+    assert row.insurance_no.startswith("$SM4-CBC$")
+    assert crypto.decrypt_value(row.insurance_no) == "YB000123"
+
+
+def test_adaptive_controller_tracks_latency_target_and_backs_off():
+    controller = AdaptiveController(batch_size=500, max_concurrency=8, target_latency_ms=200)
+    controller.observe(rows=500, batch_seconds=0.05, write_seconds=0.01)
+    assert controller.batch_size == 1000
+
+    controller.observe(rows=1000, batch_seconds=0.8, write_seconds=0.01)
+    assert controller.batch_size == 500
+
+    controller.observe(rows=500, batch_seconds=0.2, write_seconds=0.5)
+    assert controller.concurrency == 4
+    assert controller.batch_size == 250
+
+    fixed = AdaptiveController(batch_size=500, max_concurrency=4, target_latency_ms=200, enabled=False)
+    fixed.observe(rows=500, batch_seconds=0.01, write_seconds=5)
+    assert (fixed.batch_size, fixed.concurrency) == (500, 4)
+
+
+def test_migration_fails_for_missing_column():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        client.post(
+            "/api/migration/tasks",
+            json={"task_id": "MIG002", "table_name": "patient_info", "field_name": "missing_column"},
+            headers=headers,
+        )
+        client.post("/api/migration/tasks/MIG002/control", params={"action": "start"}, headers=headers)
+        body = _wait_for_status(client, headers, "MIG002", "失败")
+        assert "missing_column" in body["failure_reason"]
+
+
+def test_failed_batches_count_every_row_of_their_range(monkeypatch):
+    with target_engine.begin() as conn:
+        conn.execute(referral_note.insert(), [{"id": i, "note": f"R{i}"} for i in range(1, 251)])
+
+    def fail(self, key_range):
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(MigrationRunner, "_process", fail)
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        client.post(
+            "/api/migration/tasks",
+            json={
+                "task_id": "MIG009",
+                "table_name": "referral_note",
+                "field_name": "note",
+                "batch_size": 100,
+                "adaptive": False,
+                "overwrite_plaintext": True,
+            },
+            headers=headers,
+        )
+        client.post("/api/migration/tasks/MIG009/control", params={"action": "start"}, headers=headers)
+        body = _wait_for_status(client, headers, "MIG009", "失败")
+        assert body["success_count"] == 0
+        assert body["failure_count"] == 250
+        assert body["failure_reason"] == "connection reset"
+        assert body["progress"] < 100
+
+        logs = client.get("/api/logs", params={"log_type": "migration"}, headers=headers).json()["items"]
+        finished = next(log for log in logs if log["task_id"] == "MIG009" and log["operation"] == "migration_finished")
+        assert finished["status"] == "error"
+
+        deadline = time.time() + 5
+        while executor.is_running("MIG009") and time.time() < deadline:
+            time.sleep(0.05)
+        assert 'task_id="MIG009"' not in client.get("/metrics").text
+
+
+def test_startup_resumes_running_task_from_checkpoint():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(
+            models.MigrationTask(
+                task_id="MIG003",
+                table_name="lab_result",
+                field_name="insurance_no",
+                batch_size=250,
+                concurrency=2,
+                overwrite_plaintext=True,
+                status=models.MigrationTaskStatus.RUNNING,
+                total_rows=2500,
+                processed_count=900,
+                success_count=900,
+                checkpoint={
+                    "high_water_mark": 600,
+                    "frontier": 1200,
+                    "in_flight": [{"worker": "migration-MIG003-w1", "lower": 600, "upper": 900}],
+                },
+            )
+        )
+        db.commit()
+
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        body = _wait_for_status(client, headers, "MIG003", "完成")
+        assert body["processed_count"] == 2500
+        assert body["success_count"] == 2500
+        assert body["checkpoint"]["high_water_mark"] == 2500
+        assert body["checkpoint"]["in_flight"] == []
+
+    with target_engine.connect() as conn:
+        values = conn.execute(select(lab_result.c.insurance_no).order_by(lab_result.c.id)).scalars().all()
+    assert [crypto.decrypt_value(value) for value in values] == [f"I{i}" for i in range(1, 2501)]
+
+
+def test_plan_groups_fields_of_a_table_into_one_single_pass_task():
+    with target_engine.begin() as conn:
+        conn.execute(
+            outpatient_visit.insert(),
+            [
+                {"id": i, "patient_name": f"N{i}", "phone": None if i % 50 == 0 else f"138{i:08d}", "id_card": f"C{i}"}
+                for i in range(1, 1201)
+            ],
+        )
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE outpatient_visit"):
+            statements.append("update")
+        elif statement.startswith("SELECT") and "outpatient_visit.phone" in statement:
+            statements.append("read")
+
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        for index, (table_name, field_name) in enumerate(
+            [("outpatient_visit", "patient_name"), ("outpatient_visit", "phone"), ("outpatient_visit", "id_card"), ("missing_table", "x")]
+        ):
+            response = client.post(
+                "/api/fields/sensitive",
+                json={"field_id": f"SF_PLAN{index}", "table_name": table_name, "field_name": field_name, "algorithm_type": "SM4"},
+                headers=headers,
+            )
+            assert response.status_code == 200
+
+        payload = {"table_names": ["outpatient_visit", "missing_table"], "task_prefix": "PLAN-T", "overwrite_plaintext": True}
+        preview = client.post("/api/migration/plan", json={**payload, "dry_run": True}, headers=headers).json()
+        assert preview["dry_run"] is True
+        assert client.get("/api/migration/tasks/PLAN-T-001", headers=headers).status_code == 404
+
+        body = client.post("/api/migration/plan", json=payload, headers=headers).json()
+        assert [task["task_id"] for task in body["tasks"]] == ["PLAN-T-001"]
+        planned = body["tasks"][0]
+        assert planned["field_names"] == ["patient_name", "phone", "id_card"]
+        assert planned["estimated_rows"] == 1200
+        assert planned["batch_size"] >= 1 and planned["concurrency"] >= 1
+        assert body["skipped"] == [{"table_name": "missing_table", "field_name": "x", "reason": "Table does not exist"}]
+        again = client.post("/api/migration/plan", json={**payload, "task_prefix": "PLAN-U"}, headers=headers).json()
+        assert again["tasks"] == []
+        assert len(again["skipped"]) == 4
+        # Queued tasks still cover their fields. The scheduler is parked so it cannot admit the task meanwhile.
+        scheduler.stop()
+        try:
+            with SessionLocal() as db:
+                plan_task = db.query(models.MigrationTask).filter(models.MigrationTask.task_id == "PLAN-T-001")
+                plan_task.update({"status": models.MigrationTaskStatus.QUEUED}, synchronize_session=False)
+                db.commit()
+                queued = client.post("/api/migration/plan", json={**payload, "task_prefix": "PLAN-U"}, headers=headers).json()
+                plan_task.update({"status": models.MigrationTaskStatus.PENDING}, synchronize_session=False)
+                db.commit()
+        finally:
+            scheduler.start()
+        assert queued["tasks"] == []
+        assert [item["reason"] for item in queued["skipped"][:3]] == ["Covered by an unfinished task"] * 3
+
+        event.listen(target_engine, "before_cursor_execute", capture)
+        try:
+            client.post("/api/migration/tasks/PLAN-T-001/control", params={"action": "start"}, headers=headers)
+            body = _wait_for_status(client, headers, "PLAN-T-001", "完成")
+        finally:
+            event.remove(target_engine, "before_cursor_execute", capture)
+        assert body["field_names"] == ["patient_name", "phone", "id_card"]
+        assert body["processed_count"] == 1200
+        assert body["success_count"] == 1200
+
+    # One read and one write per batch, however many columns the task encrypts.
+    assert statements.count("read") >= 1
+    assert statements.count("update") == statements.count("read")
+    with target_engine.connect() as conn:
+        rows = conn.execute(select(outpatient_visit).order_by(outpatient_visit.c.id)).all()
+    for row in rows:
+        assert crypto.decrypt_value(row.patient_name) == f"N{row.id}"
+        assert crypto.decrypt_value(row.id_card) == f"C{row.id}"
+        if row.id % 50 == 0:
+            assert row.phone is None
+        else:
+            assert crypto.decrypt_value(row.phone) == f"138{row.id:08d}"
+
+
+def test_multi_column_task_counts_each_column_and_isolates_failures(broken_cipher):
+    with target_engine.begin() as conn:
+        conn.execute(
+            discharge_summary.insert(),
+            [{"id": i, "diagnosis": f"D{i}", "doctor_phone": f"139{i:08d}"} for i in range(1, 401)],
+        )
+
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post(
+            "/api/fields/sensitive",
+            json={"field_id": "SF_BROKEN", "table_name": "discharge_summary", "field_name": "doctor_phone", "algorithm_type": "BROKEN-TEST"},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        response = client.post(
+            "/api/migration/tasks",
+            json={"task_id": "MIG006", "table_name": "discharge_summary", "field_name": "diagnosis"},
+            headers=headers,
+        )
+        assert response.json()["field_names"] is None
+        response = client.post(
+            "/api/migration/tasks",
+            json={"task_id": "MIG007", "table_name": "discharge_summary", "field_names": ["diagnosis", "diagnosis"]},
+            headers=headers,
+        )
+        assert response.status_code == 422
+        response = client.post(
+            "/api/migration/tasks",
+            json={
+                "task_id": "MIG008",
+                "table_name": "discharge_summary",
+                "field_names": ["diagnosis", "doctor_phone"],
+                "batch_size": 100,
+                "overwrite_plaintext": True,
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["field_name"] == "diagnosis"
+
+        client.post("/api/migration/tasks/MIG008/control", params={"action": "start"}, headers=headers)
+        # No row ended up with every column encrypted, so the task as a whole failed.
+        body = _wait_for_status(client, headers, "MIG008", "失败")
+        assert body["column_counts"] == {
+            "diagnosis": {"success": 400, "failure": 0},
+            "doctor_phone": {"success": 0, "failure": 400},
+        }
+        assert body["success_count"] == 0
+        assert body["failure_count"] == 400
+        assert body["failure_reason"].startswith("doctor_phone: ")
+
+    with target_engine.connect() as conn:
+        rows = conn.execute(select(discharge_summary).order_by(discharge_summary.c.id)).all()
+    assert [crypto.decrypt_value(row.diagnosis) for row in rows] == [f"D{i}" for i in range(1, 401)]
+    assert [row.doctor_phone for row in rows] == [f"139{i:08d}" for i in range(1, 401)]
+
+
+class FakeRunners:
+    def __init__(self):
+        self.running = {}
+
+    def is_running(self, task_id):
+        return task_id in self.running
+
+    def start(self, task_id, quota=None):
+        self.running[task_id] = quota
+
+    def set_quota(self, task_id, workers):
+        self.running[task_id] = workers
+
+    def stop(self, task_id, wait=False):
+        self.running.pop(task_id, None)
+
+
+def test_scheduler_admits_by_priority_within_budget_and_throttles_outside_window():
+    Base.metadata.create_all(bind=engine)
+    settings = {
+        "migration_db_workers": "4",
+        "migration_host_workers": "3",
+        "migration_window": "22:00-06:00",
+        "migration_off_window_workers": "1",
+    }
+    with SessionLocal() as db:
+        db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key.in_(list(settings))).delete(
+            synchronize_session=False
+        )
+        db.add_all(models.SystemConfiguration(key=key, value=value) for key, value in settings.items())
+        for task_id, priority in (("SCH1", 0), ("SCH2", 5), ("SCH3", 0)):
+            db.add(
+                models.MigrationTask(
+                    task_id=task_id,
+                    table_name="patient_info",
+                    field_name="patient_id_plain",
+                    concurrency=2,
+                    priority=priority,
+                    status=models.MigrationTaskStatus.QUEUED,
+                )
+            )
+        db.commit()
+        config_cache.refresh(db)
+
+    now = datetime(2026, 3, 1, 23, 0)
+    runners = FakeRunners()
+    scheduler = MigrationScheduler(runners=runners, clock=lambda: now)
+    scheduler.tick()
+    assert runners.running == {"SCH2": 2, "SCH1": 1}
+
+    def statuses():
+        with SessionLocal() as db:
+            return dict(
+                db.query(models.MigrationTask.task_id, models.MigrationTask.status).filter(
+                    models.MigrationTask.task_id.in_(["SCH1", "SCH2", "SCH3"])
+                )
+            )
+
+    assert statuses() == {"SCH1": "进行中", "SCH2": "进行中", "SCH3": "排队中"}
+
+    # Daytime: one worker left, kept by the higher-priority task; the other is re-queued.
+    now = datetime(2026, 3, 2, 10, 0)
+    scheduler.tick()
+    assert runners.running == {"SCH2": 1}
+    assert statuses() == {"SCH1": "排队中", "SCH2": "进行中", "SCH3": "排队中"}
+
+    with SessionLocal() as db:
+        db.query(models.MigrationTask).filter(models.MigrationTask.task_id.in_(["SCH1", "SCH2", "SCH3"])).delete(
+            synchronize_session=False
+        )
+        db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key.in_(list(settings))).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        config_cache.refresh(db)
+
+
+def test_recover_requeues_only_tasks_whose_owner_is_gone():
+    Base.metadata.create_all(bind=engine)
+    checkpoint = {"frontier": 400, "in_flight": []}
+    task_ids = ["REC1", "REC2", "LIVE1"]
+    with SessionLocal() as db:
+        for task_id, status, heartbeat_at in (
+            ("REC1", models.MigrationTaskStatus.RUNNING, None),
+            ("REC2", models.MigrationTaskStatus.RUNNING, datetime.utcnow() - timedelta(minutes=10)),
+            ("LIVE1", models.MigrationTaskStatus.QUEUED, None),
+        ):
+            db.add(
+                models.MigrationTask(
+                    task_id=task_id,
+                    table_name="patient_info",
+                    field_name="patient_id_plain",
+                    status=status,
+                    checkpoint=checkpoint,
+                    heartbeat_at=heartbeat_at,
+                )
+            )
+        db.commit()
+
+    # A sibling worker admits LIVE1 and keeps running it; its ticks refresh the heartbeat.
+    sibling = FakeRunners()
+    MigrationScheduler(runners=sibling).tick()
+    assert set(sibling.running) == {"LIVE1"}
+
+    def tasks():
+        with SessionLocal() as db:
+            return {
+                task.task_id: task
+                for task in db.query(models.MigrationTask).filter(models.MigrationTask.task_id.in_(task_ids))
+            }
+
+    # This worker restarts: only the tasks nobody heartbeats any more go back in the queue.
+    executor.recover(timeout=60)
+    assert not executor.is_running("REC1")
+    recovered = tasks()
+    assert recovered["REC1"].status == models.MigrationTaskStatus.QUEUED
+    assert recovered["REC2"].status == models.MigrationTaskStatus.QUEUED
+    assert recovered["LIVE1"].status == models.MigrationTaskStatus.RUNNING
+    assert recovered["REC1"].checkpoint == checkpoint
+
+    runners = FakeRunners()
+    MigrationScheduler(runners=runners).tick()
+    assert "REC1" in runners.running and "LIVE1" not in runners.running
+    with SessionLocal() as db:
+        db.query(models.MigrationTask).filter(models.MigrationTask.task_id.in_(task_ids)).delete(synchronize_session=False)
+        db.commit()
+
+
+@pytest.mark.parametrize("strategy", [bulk.EXECUTEMANY, bulk.TEMP_TABLE])
+def test_bulk_update_writes_every_column_and_keeps_nulls_unchanged(strategy):
+    scratch = create_engine("sqlite://")
+    visits = Table(
+        "visits",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+        Column("phone", String(100)),
+    )
+    visits.create(scratch)
+    with scratch.begin() as conn:
+        conn.execute(visits.insert(), [{"id": i, "name": f"n{i}", "phone": f"p{i}"} for i in range(1, 51)])
+    for attempt in range(2):
+        with scratch.begin() as conn:
+            written = bulk.bulk_update(
+                conn,
+                visits,
+                visits.c.id,
+                ["name", "phone"],
+                [(i, f"N{attempt}-{i}", None if i % 2 else f"P{attempt}-{i}") for i in range(1, 51)],
+                strategy=strategy,
+            )
+            assert written == 50
+    with scratch.connect() as conn:
+        rows = conn.execute(select(visits).order_by(visits.c.id)).all()
+    assert [row.name for row in rows] == [f"N1-{i}" for i in range(1, 51)]
+    assert [row.phone for row in rows] == [f"p{i}" if i % 2 else f"P1-{i}" for i in range(1, 51)]
+    with pytest.raises(ValueError):
+        bulk.strategy_for("sqlite", bulk.MERGE)
+    assert bulk.strategy_for("postgresql") == bulk.TEMP_TABLE
+    assert bulk.strategy_for("mssql") == bulk.MERGE
+
+
+def teardown_module(module):
+    metadata.drop_all(target_engine)
+    db_path = pathlib.Path("test_gmdb.db")
+    if db_path.exists():
+        db_path.unlink()
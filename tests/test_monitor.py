@@ -0,0 +1,197 @@
+import asyncio
+import pathlib
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.db import models
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.services.audit import audit_sink
+from app.services.live import LiveBroker
+from app.services.metrics import Counter, Histogram
+from app.services.rollups import read_totals, rebuild_rollups
+from app.services.system_load import LoadSampler
+
+
+def _get_auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "ChangeMe123!"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _today_report(client: TestClient, headers: dict[str, str]) -> dict:
+    today = datetime.utcnow().date().isoformat()
+    response = client.get("/api/monitor/reports/daily", params={"start": today, "end": today}, headers=headers)
+    assert response.status_code == 200
+    return response.json()[0]
+
+
+def test_monitor_totals_and_daily_report_follow_audit_writes():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        before = client.get("/api/monitor/status", headers=headers).json()["service"]
+        report_before = _today_report(client, headers)
+
+        client.post("/api/logs", json={"log_type": "encryption", "operation": "encrypt", "status": "error"}, headers=headers)
+        client.post(
+            "/api/logs/batch",
+            json={"events": [{"log_type": "decryption", "operation": "decrypt", "status": "success"}] * 3},
+            headers=headers,
+        )
+        assert audit_sink.flush()
+
+        after = client.get("/api/monitor/status", headers=headers).json()["service"]
+        assert after["total_encryptions"] == before["total_encryptions"] + 1
+        assert after["total_decryptions"] == before["total_decryptions"] + 3
+        assert after["total_errors"] == before["total_errors"] + 1
+
+        report = _today_report(client, headers)
+        assert report["encryptions"] == report_before["encryptions"] + 1
+        assert report["decryptions"] == report_before["decryptions"] + 3
+        assert report["total"] == report_before["total"] + 4
+
+        response = client.get("/api/monitor/reports/daily", params={"start": "2024-02-01", "end": "2024-01-01"}, headers=headers)
+        assert response.status_code == 400
+
+
+def test_rebuilt_rollups_match_audit_log_counts():
+    with TestClient(app):
+        with engine.begin() as conn:
+            rebuild_rollups(conn)
+        with SessionLocal() as db:
+            totals = read_totals(db)
+            logs = db.query(models.AuditLog)
+            assert totals["encryptions"] == logs.filter(models.AuditLog.log_type == models.AuditLogType.ENCRYPTION).count()
+            assert totals["decryptions"] == logs.filter(models.AuditLog.log_type == models.AuditLogType.DECRYPTION).count()
+            assert totals["errors"] == logs.filter(models.AuditLog.status == "error").count()
+
+
+def _write_proc(root, cpu_line: str, read_bytes: int, write_bytes: int) -> None:
+    (root / "self").mkdir(parents=True, exist_ok=True)
+    (root / "stat").write_text(f"{cpu_line}\ncpu0 1 2 3 4\n")
+    (root / "meminfo").write_text("MemTotal:       8000000 kB\nMemFree:        1000000 kB\nMemAvailable:   2000000 kB\n")
+    (root / "self" / "status").write_text("Name:\tpython\nVmRSS:\t  204800 kB\n")
+    (root / "self" / "io").write_text(f"rchar: 1\nread_bytes: {read_bytes}\nwrite_bytes: {write_bytes}\n")
+
+
+def test_load_sampler_reads_proc_deltas_and_pool_usage(tmp_path):
+    _write_proc(tmp_path, "cpu  100 0 100 700 100 0 0 0 0 0", 0, 0)
+    sampler = LoadSampler(bind=engine, target_bind=None, interval=60, proc_root=str(tmp_path))
+    first = sampler.sample()
+    assert first.cpu_percent == 0 and first.memory_percent == 75.0 and first.rss_mb == 200.0
+
+    _write_proc(tmp_path, "cpu  250 0 250 800 100 0 0 0 0 0", 4096 * 1024, 0)
+    with engine.connect():
+        second = sampler.sample()
+    # 300 busy jiffies out of 400 elapsed.
+    assert second.cpu_percent == 75.0
+    assert second.disk_read_kbps > 0 and second.disk_write_kbps == 0
+    assert second.db_connections == 1
+    assert sampler.sample().db_connections == 0
+
+
+def test_monitor_status_reports_sampled_load():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        body = client.get("/api/monitor/status", headers=headers).json()
+        assert body["load"]["sampled_at"] is not None
+        assert body["load"]["rss_mb"] > 0
+        assert body["service"]["current_threads"] >= 2
+
+
+def test_metrics_endpoint_exposes_route_histograms_and_sql_counters():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        client.get("/api/monitor/status", headers=headers)
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE gmdb_http_request_duration_seconds histogram" in body
+        assert 'gmdb_http_request_duration_seconds_bucket{method="GET",route="/api/monitor/status",status="200",le="+Inf"}' in body
+        assert 'gmdb_db_queries_total{engine="main",operation="select"}' in body
+        assert "gmdb_audit_queue_depth " in body
+
+    histogram = Histogram("test_seconds", "test", ["kind"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, kind="a")
+    lines = histogram.samples()
+    assert 'test_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{kind="a",le="1"} 3' in lines
+    assert 'test_seconds_bucket{kind="a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{kind="a"} 4' in lines
+    histogram.observe(0.5, kind="b")
+    histogram.remove(kind="a")
+    assert not any('kind="a"' in line for line in histogram.samples())
+    assert 'test_seconds_count{kind="b"} 1' in histogram.samples()
+
+    counter = Counter("test_total", "test", ["task", "outcome"])
+    for task, outcome in (("t1", "success"), ("t1", "failure"), ("t2", "success")):
+        counter.inc(task=task, outcome=outcome)
+    counter.remove(task="t1")
+    assert counter.samples() == ['test_total{task="t2",outcome="success"} 1']
+
+
+def test_live_broker_fans_out_one_read_as_task_deltas():
+    builds = []
+
+    def build(db):
+        builds.append(1)
+        return {"builds": len(builds)}
+
+    async def scenario():
+        broker = LiveBroker(interval=60, snapshot_interval=3600)
+        broker.register_snapshot("monitor", build)
+        watchers = [broker.subscribe() for _ in range(3)]
+        only_other = broker.subscribe(task_id="live-other")
+        broker.tick()
+        await asyncio.sleep(0)
+        assert len(builds) == 1
+        for watcher in watchers:
+            names = []
+            while not watcher.queue.empty():
+                names.append((await watcher.queue.get()).name)
+            assert names[0] == "monitor" and "task" in names
+
+        with SessionLocal() as db:
+            task = db.query(models.MigrationTask).filter(models.MigrationTask.task_id == "live-task").one()
+            task.progress = 40
+            task.success_count = 400
+            db.commit()
+        broker.tick()
+        broker.tick()
+        await asyncio.sleep(0)
+        delta = await watchers[0].queue.get()
+        assert delta.name == "task"
+        assert delta.data == {"task_id": "live-task", "progress": 40, "success_count": 400}
+        assert watchers[0].queue.empty()
+        assert len(builds) == 1
+        assert (await only_other.queue.get()).name == "monitor" and only_other.queue.empty()
+        assert '"progress": 40' in delta.encode()
+
+        broker.stop()
+        await asyncio.sleep(0)
+        assert await watchers[1].queue.get() is None
+
+    with TestClient(app):
+        with SessionLocal() as db:
+            db.add(
+                models.MigrationTask(
+                    task_id="live-task", table_name="customers", field_name="phone", status=models.MigrationTaskStatus.RUNNING
+                )
+            )
+            db.commit()
+        asyncio.run(scenario())
+
+
+def test_stream_requires_token():
+    with TestClient(app) as client:
+        assert client.get("/api/monitor/stream").status_code == 401
+        assert client.get("/api/monitor/stream", params={"access_token": "bogus"}).status_code == 401
+
+
+def teardown_module(module):
+    db_path = pathlib.Path("test_gmdb.db")
+    if db_path.exists():
+        db_path.unlink()
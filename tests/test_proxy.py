@@ -0,0 +1,202 @@
+import pathlib
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+
+from app import crypto
+from app.db.session import target_engine
+from app.main import app
+from app.proxy import proxy
+from app.services.audit import audit_sink
+
+metadata = MetaData()
+outpatient_visit = Table(
+    "outpatient_visit",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("patient_name", String(200)),
+    Column("id_card", String(200)),
+    Column("id_card_bidx", String(64)),
+    Column("phone", String(200)),
+)
+
+
+def _get_auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "ChangeMe123!"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _register_fields(client: TestClient, headers: dict[str, str]) -> None:
+    for payload in (
+        {"field_id": "PX_NAME", "field_name": "patient_name", "algorithm_type": "SM4", "allow_plain_text_read": True},
+        {
+            "field_id": "PX_IDCARD",
+            "field_name": "id_card",
+            "algorithm_type": "SM4-CBC",
+            "allow_plain_text_read": True,
+            "blind_index_enabled": True,
+        },
+        {"field_id": "PX_PHONE", "field_name": "phone", "algorithm_type": "SM4-GCM"},
+    ):
+        response = client.post("/api/fields/sensitive", json={"table_name": "outpatient_visit", **payload}, headers=headers)
+        assert response.status_code == 200
+
+
+def setup_module(module):
+    metadata.drop_all(target_engine)
+    metadata.create_all(target_engine)
+    proxy.reset()
+
+
+def test_proxy_encrypts_writes_and_decrypts_reads():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        _register_fields(client, headers)
+
+        response = client.post(
+            "/api/proxy/execute",
+            json={
+                "sql": "INSERT INTO outpatient_visit (id, patient_name, id_card, phone) VALUES (?, ?, ?, ?), (2, '王五', NULL, '13800000002')",
+                "params": [1, "张三", "110101199001011234", "13800000001"],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["rowcount"] == 2
+
+        with target_engine.connect() as conn:
+            rows = conn.execute(select(outpatient_visit).order_by(outpatient_visit.c.id)).all()
+        assert rows[0].patient_name.startswith("$SM4-ECB$")
+        assert crypto.decrypt_value(rows[0].id_card) == "110101199001011234"
+        assert rows[0].id_card_bidx is not None and rows[1].id_card_bidx is None
+        assert crypto.decrypt_value(rows[1].phone) == "13800000002"
+
+        statement = {"sql": "SELECT id, patient_name AS name, id_card, phone FROM outpatient_visit WHERE id_card = ?"}
+        response = client.post(
+            "/api/proxy/execute", json={**statement, "params": ["110101199001011234"]}, headers=headers
+        )
+        body = response.json()
+        assert body["columns"] == ["id", "name", "id_card", "phone"]
+        assert body["rows"][0][:3] == [1, "张三", "110101199001011234"]
+        # phone does not allow plaintext reads, so the proxy hands back ciphertext.
+        assert body["rows"][0][3].startswith("$SM4-GCM$")
+        assert body["cache_hit"] is False
+
+        # Equality on a deterministic cipher works without a blind index.
+        response = client.post(
+            "/api/proxy/execute",
+            json={"sql": "SELECT * FROM outpatient_visit WHERE patient_name = '王五'"},
+            headers=headers,
+        )
+        body = response.json()
+        assert body["rows"] == [[2, "王五", None, None, body["rows"][0][4]]]
+
+        response = client.post(
+            "/api/proxy/execute", json={**statement, "params": ["missing"]}, headers=headers
+        )
+        assert response.json()["cache_hit"] is True and response.json()["rows"] == []
+
+        response = client.post(
+            "/api/proxy/execute",
+            json={"sql": "UPDATE outpatient_visit SET id_card = :card WHERE id = :id", "params": {"card": "X1", "id": 2}},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        with target_engine.connect() as conn:
+            row = conn.execute(select(outpatient_visit).where(outpatient_visit.c.id == 2)).one()
+        assert crypto.decrypt_value(row.id_card) == "X1" and row.id_card_bidx is not None
+
+        response = client.post(
+            "/api/proxy/execute",
+            json={"sql": "SELECT id FROM outpatient_visit WHERE phone LIKE ?", "params": ["138%"]},
+            headers=headers,
+        )
+        assert response.status_code == 400
+
+        stats = client.get("/api/proxy/stats", headers=headers).json()
+        assert stats["hits"] >= 1
+        select_stats = next(item for item in stats["statements"] if item["fingerprint"].startswith("select id , patient_name"))
+        assert select_stats["executions"] == 2 and select_stats["cache_hits"] == 1
+
+        assert audit_sink.flush()
+        logs = client.get("/api/logs", params={"log_type": "proxy"}, headers=headers).json()["items"]
+        assert any(log["operation"] == "insert" and log["table_name"] == "outpatient_visit" for log in logs)
+
+
+def test_statement_cache_shares_plans_and_tracks_registry_version():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        proxy.reset()
+        first, _, hit = proxy.cache.get("select id from outpatient_visit where patient_name = 'a'")
+        assert not hit
+        second, sources, hit = proxy.cache.get("SELECT id FROM outpatient_visit WHERE patient_name='b'")
+        assert hit and second is first and sources == [("literal", "b")]
+
+        client.put("/api/fields/sensitive/PX_NAME", json={"algorithm_type": "SM4-CBC"}, headers=headers)
+        misses = proxy.cache.misses
+        response = client.post(
+            "/api/proxy/execute",
+            json={"sql": "SELECT id FROM outpatient_visit WHERE patient_name = ?", "params": ["张三"]},
+            headers=headers,
+        )
+        assert response.status_code == 400
+        assert "blind index" in response.json()["detail"]
+        assert proxy.cache.misses == misses + 1
+
+
+def test_malformed_statements_are_client_errors():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post("/api/proxy/execute", json={"sql": "SELECT 'abc"}, headers=headers)
+        assert response.status_code == 400
+        assert "Unexpected character" in response.json()["detail"]
+
+        response = client.post("/api/proxy/execute", json={"sql": "SELECT @x FROM outpatient_visit"}, headers=headers)
+        assert response.status_code == 400
+        assert "'@'" in response.json()["detail"]
+
+        sql = (
+            "SELECT id FROM outpatient_visit WHERE id = 1; "
+            "INSERT INTO outpatient_visit (id, phone) VALUES (9, '13800000009')"
+        )
+        response = client.post("/api/proxy/execute", json={"sql": sql}, headers=headers)
+        assert response.status_code == 400
+        assert "one statement" in response.json()["detail"]
+        with target_engine.connect() as conn:
+            assert conn.execute(select(outpatient_visit.c.id).where(outpatient_visit.c.id == 9)).first() is None
+        response = client.post("/api/proxy/execute", json={"sql": "SELECT id FROM outpatient_visit;;"}, headers=headers)
+        assert response.status_code == 200
+
+
+def test_proxy_refuses_management_tables():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        client.post(
+            "/api/users",
+            json={"username": "proxy_op", "full_name": "Op", "password": "Secret123!", "role": "operator"},
+            headers=headers,
+        )
+        login = client.post("/api/auth/login", json={"username": "proxy_op", "password": "Secret123!"})
+        operator = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        for sql in (
+            "SELECT username, hashed_password FROM users",
+            "UPDATE users SET role = 'admin' WHERE username = 'proxy_op'",
+            "DELETE FROM audit_logs",
+            'SELECT id FROM outpatient_visit WHERE id IN (SELECT id FROM "auth_sessions")',
+            "SELECT * FROM main.system_configurations",
+        ):
+            response = client.post("/api/proxy/execute", json={"sql": sql}, headers=operator)
+            assert response.status_code == 400, sql
+            assert "cannot be accessed through the proxy" in response.json()["detail"]
+
+        response = client.post("/api/proxy/execute", json={"sql": "SELECT id FROM outpatient_visit"}, headers=operator)
+        assert response.status_code == 200
+
+
+def teardown_module(module):
+    metadata.drop_all(target_engine)
+    db_path = pathlib.Path("test_gmdb.db")
+    if db_path.exists():
+        db_path.unlink()
@@ -0,0 +1,186 @@
+import pathlib
+
+from sqlalchemy import event
+
+from fastapi.testclient import TestClient
+
+from app.db import models
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.services.config_cache import CONFIG_CACHE, ConfigCache, config_cache
+from app.services.sessions import SESSION_STORE, DatabaseSessionStore, MemorySessionStore
+from app.services.field_registry import FIELD_REGISTRY, FieldRegistry, field_registry
+from app.services.versioning import VersionPoller, bump_version
+
+
+def _get_auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": "admin", "password": "ChangeMe123!"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_field_registry_tracks_api_changes_and_peer_versions():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post(
+            "/api/fields/sensitive",
+            json={"field_id": "SF_REG", "table_name": "Outpatient", "field_name": "ID_No", "algorithm_type": "SM4"},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        spec = field_registry.lookup("outpatient", "id_no")
+        assert spec is not None and spec.algorithm_type == "SM4"
+
+        client.put("/api/fields/sensitive/SF_REG", json={"algorithm_type": "SM4-GCM"}, headers=headers)
+        assert field_registry.lookup("outpatient", "id_no").algorithm_type == "SM4-GCM"
+
+        # A peer worker only learns about the change through the version row.
+        peer = FieldRegistry()
+        peer_poller = VersionPoller(interval=60)
+        peer_poller.register(FIELD_REGISTRY, peer.sync)
+        with SessionLocal() as db:
+            peer.load(db)
+        client.delete("/api/fields/sensitive/SF_REG", headers=headers)
+        assert field_registry.lookup("outpatient", "id_no") is None
+        assert peer.lookup("outpatient", "id_no") is not None
+        peer_poller.poll_once()
+        assert peer.lookup("outpatient", "id_no") is None
+        assert peer.version == field_registry.version
+
+
+def test_bump_version_creates_missing_rows():
+    with TestClient(app):
+        with SessionLocal() as db:
+            bump_version(db, "unit-test")
+            bump_version(db, "unit-test")
+            db.commit()
+            row = db.query(models.CacheVersion).filter(models.CacheVersion.name == "unit-test").one()
+            assert row.version == 2
+
+
+def test_config_cache_write_through_and_peer_invalidation():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        peer = ConfigCache(ttl=3600)
+        peer_poller = VersionPoller(interval=60)
+        peer_poller.register(CONFIG_CACHE, peer.load)
+        peer_poller.poll_once()
+        assert peer.get_int("default_batch_size", 0) == 500
+
+        response = client.put("/api/config/default_batch_size", json={"value": "800"}, headers=headers)
+        assert response.status_code == 200
+        assert config_cache.get_int("default_batch_size", 0) == 800
+        # The peer keeps serving its copy from memory until the version row moves.
+        assert peer.get_int("default_batch_size", 0) == 500
+        peer_poller.poll_once()
+        assert peer.get_int("default_batch_size", 0) == 800
+        assert peer.version == config_cache.version
+
+        client.post("/api/config", json={"key": "unit_flag", "value": "yes"}, headers=headers)
+        assert config_cache.get_bool("unit_flag", False) is True
+        assert config_cache.get_float("unit_missing", 1.5) == 1.5
+        assert config_cache.get_datetime("key_valid_until") is not None
+
+
+def test_config_cache_defaults_are_per_caller():
+    with TestClient(app), SessionLocal() as db:
+        db.add(models.SystemConfiguration(key="unit_malformed", value="many"))
+        db.commit()
+        cache = ConfigCache(ttl=3600)
+        cache.load(db)
+        assert cache.get_int("unit_absent", 3) == 3
+        assert cache.get_int("unit_absent", 7) == 7
+        assert cache.get_int("unit_malformed", 2) == 2
+        assert cache.get_int("unit_malformed", 9) == 9
+        db.query(models.SystemConfiguration).filter(models.SystemConfiguration.key == "unit_malformed").delete()
+        db.commit()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_memory_session_store_slides_idle_timeout_and_sweeps():
+    clock = FakeClock()
+    store = MemorySessionStore(idle_seconds=600, resolution=5, clock=clock)
+    store.create("active", "alice", clock.now + 3600)
+    store.create("idle", "bob", clock.now + 3600)
+    for _ in range(3):
+        clock.now += 400
+        assert store.resolve("active") == "alice"
+    # "idle" passed its deadline without being presented; the sweeper reclaims it.
+    assert store.sweep() == 1 and len(store) == 1
+    assert store.resolve("idle") is None
+
+    clock.now += 3600
+    assert store.sweep() == 1 and len(store) == 0
+
+
+def test_database_session_store_is_shared_between_workers():
+    with TestClient(app):
+        clock = FakeClock()
+        worker_a = DatabaseSessionStore(idle_seconds=600, clock=clock)
+        worker_b = DatabaseSessionStore(idle_seconds=600, clock=clock)
+        peer_poller = VersionPoller(interval=60)
+        peer_poller.register(SESSION_STORE, worker_b.invalidate)
+        peer_poller.poll_once()
+
+        worker_a.create("shared-token", "alice", clock.now + 3600)
+        assert worker_b.resolve("shared-token") == "alice"
+        # Activity on worker A keeps the session alive for worker B as well.
+        for _ in range(3):
+            clock.now += 300
+            assert worker_a.resolve("shared-token") == "alice"
+        assert worker_b.resolve("shared-token") == "alice"
+
+        worker_a.revoke("shared-token")
+        peer_poller.poll_once()
+        assert worker_b.resolve("shared-token") is None
+
+        worker_a.create("idle-token", "bob", clock.now + 3600)
+        clock.now += 1200
+        assert worker_a.sweep() >= 1
+        assert worker_b.resolve("idle-token") is None
+
+
+def test_authenticated_principal_is_cached_until_the_user_changes():
+    with TestClient(app) as client:
+        headers = _get_auth_headers(client)
+        response = client.post(
+            "/api/users",
+            json={"username": "cached_op", "full_name": "Op", "password": "Secret123!", "role": "operator"},
+            headers=headers,
+        )
+        user_id = response.json()["id"]
+        login = client.post("/api/auth/login", json={"username": "cached_op", "password": "Secret123!"})
+        operator = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        assert client.get("/api/migration/tasks", headers=operator).status_code == 200
+
+        user_selects = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if "FROM users" in statement:
+                user_selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            for _ in range(5):
+                assert client.get("/api/migration/tasks", headers=operator).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert user_selects == []
+
+        client.put(f"/api/users/{user_id}", json={"role": "auditor"}, headers=headers)
+        assert client.post("/api/proxy/execute", json={"sql": "SELECT 1"}, headers=operator).status_code == 403
+        client.delete(f"/api/users/{user_id}", headers=headers)
+        assert client.get("/api/migration/tasks", headers=operator).status_code == 401
+
+
+def teardown_module(module):
+    db_path = pathlib.Path("test_gmdb.db")
+    if db_path.exists():
+        db_path.unlink()